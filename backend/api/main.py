@@ -3,18 +3,70 @@ FastAPI application with Strawberry GraphQL
 Main entry point for the backend API
 """
 
-from fastapi import FastAPI
+import asyncio
+import codecs
+from contextlib import asynccontextmanager
+import io
+from operator import attrgetter
+import os
+import tempfile
+from typing import Literal, Optional
+import uuid
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from strawberry.fastapi import GraphQLRouter
-from graphql_schema.schema import schema
+from graphql_schema.schema import operation_cache, response_cache, schema
+from appointment_service import appointment_service
+from async_appointment_service import async_appointment_service
+from storage.snapshot import DEFAULT_PUBLISH_INTERVAL, SnapshotPublisher
+from utils.bulk_import import import_appointments
+from utils.export import EXPORT_BATCH_ROWS, check_date_range, export_response
+from utils.http_middleware import ConditionalGetMiddleware, compression_middleware
+from utils.request_metrics import MetricsMiddleware, metrics_response, register_app_metrics
+
+# Export columns, named as in the GraphQL schema
+EXPORT_COLUMNS = ("id", "patientName", "date", "time", "duration", "doctorName", "status", "mode", "createdAt")
+_export_values = attrgetter("id", "patient_name", "date", "time", "duration", "doctor_name", "status", "mode", "created_at")
+
+# Uploads larger than this are spooled to disk instead of memory
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+# Where rejected-row sidecar files of /import are written
+IMPORT_REJECTS_DIR = os.getenv("IMPORT_REJECTS_DIR", tempfile.gettempdir())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # APPOINTMENT_SNAPSHOT_DIR makes this process the writer behind api.replica
+    # workers: it republishes the store there at most every
+    # APPOINTMENT_SNAPSHOT_INTERVAL seconds while writes keep arriving
+    publisher = None
+    if os.getenv("APPOINTMENT_SNAPSHOT_DIR"):
+        publisher = SnapshotPublisher(
+            appointment_service,
+            os.environ["APPOINTMENT_SNAPSHOT_DIR"],
+            interval=float(os.getenv("APPOINTMENT_SNAPSHOT_INTERVAL", DEFAULT_PUBLISH_INTERVAL))
+        ).start()
+    yield
+    if publisher is not None:
+        publisher.stop()
+    # Flush the write-ahead log and close storage connections on shutdown
+    await async_appointment_service.close()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="SwasthiQ EMR - Appointment Management API",
     description="GraphQL API for appointment scheduling and management",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Version ETags / 304s for GraphQL GET queries (persisted hashes included) and
+# compression of large bodies (added first so CORS still wraps the 304s)
+app.add_middleware(ConditionalGetMiddleware, versions=appointment_service.versions, operations=operation_cache)
+compression, compression_options = compression_middleware()
+app.add_middleware(compression, **compression_options)
+
 # Configure CORS for frontend access
 app.add_middleware(
     CORSMiddleware,
@@ -24,6 +76,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency and in-flight gauge, outermost so every middleware is timed;
+# X-Trace-Timing requests get a Server-Timing breakdown
+app.add_middleware(MetricsMiddleware)
+register_app_metrics(appointment_service.storage_stats, schema.extensions, response_cache)
+
 # Create GraphQL router
 graphql_app = GraphQLRouter(schema)
 
@@ -40,6 +97,63 @@ async def root():
     }
 
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
+def health_check():
+    return {"status": "healthy", "storage": appointment_service.storage_stats()}
+
+@app.get("/metrics")
+def metrics():
+    return metrics_response()
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return response_cache.stats() if response_cache else {"enabled": False}
+
+# Streaming CSV / NDJSON export; rows are read from the index one page at a time
+@app.get("/export/appointments")
+def export_appointments(
+    format: Literal["csv", "ndjson"] = "csv",
+    date_from: Optional[str] = Query(None, alias="dateFrom"),
+    date_to: Optional[str] = Query(None, alias="dateTo"),
+    doctor: Optional[str] = None,
+    status: Optional[str] = None
+):
+    try:
+        check_date_range(date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    appointments = appointment_service.iter_appointments(
+        status=status,
+        doctor_name=doctor,
+        date_from=date_from,
+        date_to=date_to,
+        batch_size=EXPORT_BATCH_ROWS
+    )
+    return export_response(map(_export_values, appointments), EXPORT_COLUMNS, format)
+
+# Bulk import of a CSV / NDJSON request body; rejected rows go to a sidecar file
+@app.post("/import")
+async def import_file(request: Request, format: Literal["csv", "ndjson"] = "csv"):
+    body = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES)
+    # Check the upload decodes as it arrives, so a bad byte is refused
+    # before any row is validated, rejected or loaded
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        async for chunk in request.stream():
+            decoder.decode(chunk)
+            body.write(chunk)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        body.close()
+        raise HTTPException(status_code=400, detail=f"File is not UTF-8: {e}")
+    body.seek(0)
+    rejects_path = os.path.join(IMPORT_REJECTS_DIR, f"import-{uuid.uuid4().hex}.rejects.ndjson")
+
+    def run():
+        with io.TextIOWrapper(body, encoding="utf-8-sig", newline="") as lines, open(rejects_path, "w", encoding="utf-8") as rejects:
+            return import_appointments(appointment_service, lines, format, rejects)
 
+    # Parsing, worker round trips and the load all block: keep them off the event loop
+    report = await asyncio.to_thread(run)
+    if not report.rejected:
+        os.remove(rejects_path)
+    return {**report._asdict(), "rejects_file": rejects_path if report.rejected else None}
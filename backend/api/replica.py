@@ -0,0 +1,57 @@
+"""
+Read replica of the GraphQL API
+Serves appointment queries from the writer's published snapshot; run any number of workers:
+
+    APPOINTMENT_SNAPSHOT_DIR=/dev/shm/appointments uvicorn api.main:app --port 8000
+    APPOINTMENT_SNAPSHOT_DIR=/dev/shm/appointments uvicorn api.replica:app --port 8001 --workers 4
+"""
+
+import time
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from strawberry.fastapi import GraphQLRouter
+from graphql_schema.replica import replica_schema, snapshot_reader
+from utils.request_metrics import MetricsMiddleware, metrics_response
+
+app = FastAPI(
+    title="SwasthiQ EMR - Appointment Read Replica",
+    description="Read-only GraphQL API over the latest published appointment snapshot",
+    version="1.0.0"
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # In production, specify exact origins
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+app.add_middleware(MetricsMiddleware)
+
+app.include_router(GraphQLRouter(replica_schema), prefix="/graphql")
+
+# Load balancers take a replica out of rotation while it has no snapshot or
+# one staler than APPOINTMENT_REPLICA_MAX_STALENESS
+@app.get("/health")
+def health_check():
+    snapshot = snapshot_reader.current()
+    if snapshot is None:
+        return JSONResponse({"status": "unavailable", "reason": "no snapshot published"}, status_code=503)
+    lag = snapshot_reader.staleness(snapshot)
+    stale = bool(snapshot_reader.max_staleness) and lag.seconds > snapshot_reader.max_staleness
+    return JSONResponse({
+        "status": "stale" if stale else "healthy",
+        "snapshot": {
+            "version": snapshot.version,
+            "appointments": len(snapshot),
+            "age_seconds": round(time.time() - snapshot.published_at, 3),
+        },
+        "lag_writes": lag.writes,
+        "staleness_seconds": round(lag.seconds, 3),
+    }, status_code=503 if stale else 200)
+
+@app.get("/metrics")
+def metrics():
+    return metrics_response()
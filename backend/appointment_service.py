@@ -3,18 +3,121 @@ Core business logic for appointment management
 Simulates Aurora PostgreSQL with in-memory storage
 """
 
-from models.appointment import Appointment, AppointmentCreate
-from typing import List, Optional, Dict
-from datetime import datetime
+from models.appointment import STATUSES, Appointment, AppointmentCreate
+from models.series import AppointmentSeries, SeriesCreate, occurrence_id, split_occurrence_id
+from storage.columnar_store import ColumnarAppointmentStore
+from storage.memory_store import MemoryAppointmentStore
+from storage.persistence import PersistentTable
+from storage.series_store import SeriesStore
+from storage.sharded_store import ShardedAppointmentStore
+from storage.sqlite_store import SQLiteAppointmentStore
+from utils.availability import AvailabilitySearch
+from utils.change_feed import CREATED, DELETED, UPDATED, ChangeFeed
+from utils.conflict_detector import find_batch_conflicts, parse_date
+from utils.response_cache import ScopeVersions
+from utils.stats_counter import AppointmentStatsCounter
+from utils.striped_lock import StripedLock
+from pydantic import TypeAdapter, ValidationError
+from typing import Any, Iterator, List, Optional, Dict, Tuple
+from datetime import date as Date, datetime
+from heapq import merge
+from itertools import islice
+import os
+import threading
 import uuid
 
+_batch_adapter = TypeAdapter(List[AppointmentCreate])
+
+
+def _sort_key(appointment: Appointment) -> Tuple[str, str, str]:
+    """Listing order shared by the backends and series occurrences"""
+    return appointment.date, appointment.time, appointment.id
+
+# Storage backends selectable with the APPOINTMENT_STORE environment variable
+STORE_BACKENDS = {
+    "memory": MemoryAppointmentStore,
+    "columnar": ColumnarAppointmentStore,
+    "sqlite": SQLiteAppointmentStore,
+}
+
+
+def create_store(backend: Optional[str] = None, shards: Optional[int] = None):
+    """
+    Instantiate the configured storage backend
+    
+    APPOINTMENT_SHARDS=N (N > 0) spreads the default in-memory store over
+    N shard processes partitioned by doctor; the WAL, counters and caches
+    stay in this process, which routes every call.
+    """
+    backend = backend or os.getenv("APPOINTMENT_STORE", "memory")
+    if backend not in STORE_BACKENDS:
+        raise ValueError(f"Unknown appointment store: {backend}")
+    shards = int(os.getenv("APPOINTMENT_SHARDS", "0")) if shards is None else shards
+    if shards:
+        if backend != "memory":
+            raise ValueError("APPOINTMENT_SHARDS only shards the memory store")
+        return ShardedAppointmentStore(shards)
+    return STORE_BACKENDS[backend]()
+
 
 class AppointmentService:
-    """Singleton service managing appointment lifecycle"""
+    """
+    Singleton service managing appointment lifecycle
+    
+    Writes are safe under threadpool concurrency. Each write holds the
+    striped lock of the (doctor_name, date) it touches from its conflict
+    check until its WAL record is durable, so bookings for one doctor's
+    day are serialized while unrelated bookings share group commits. The
+    in-memory store and counters are only mutated under a short apply
+    lock, which snapshots also hold so they never split a write.
+    
+    Recurring series are kept beside the backend as one record each, in
+    every storage mode, and their occurrences are merged into listings,
+    counts, stats and conflict checks only inside the window asked for.
+    """
     
-    def __init__(self):
-        self._appointments: Dict[str, Appointment] = {}
-        self._initialize_mock_data()
+    def __init__(self, store=None, data_dir: Optional[str] = None):
+        self._backend = store if store is not None else create_store()
+        self._series = SeriesStore()
+        self._stats = AppointmentStatsCounter()
+        self._availability = AvailabilitySearch(self._day_schedule)
+        self._persistence: Optional[PersistentTable] = None
+        self._series_persistence: Optional[PersistentTable] = None
+        self._schedule_locks = StripedLock()
+        self._apply_lock = threading.Lock()
+        # Deltas for appointmentChanged subscriptions
+        self.changes = ChangeFeed()
+        # Per-(date, doctor) versions that invalidate cached query responses
+        self.versions = ScopeVersions()
+        
+        data_dir = data_dir or os.getenv("APPOINTMENT_DATA_DIR")
+        if self._backend.durable:
+            # The backend keeps its own rows; only the counters need rebuilding
+            if len(self._backend):
+                for apt in self._backend:
+                    self._count(apt)
+            else:
+                self._initialize_mock_data()
+        elif not data_dir:
+            self._initialize_mock_data()
+        else:
+            self._persistence = PersistentTable(
+                data_dir,
+                "appointments",
+                group_commit=os.getenv("APPOINTMENT_WAL_GROUP_COMMIT", "1") != "0"
+            )
+            rows = self._persistence.recover()
+            if rows is None:
+                self._initialize_mock_data()
+                self._persistence.snapshot(apt.to_dict() for apt in self._backend)
+            else:
+                for row in rows:
+                    self._store(Appointment(**row))
+        
+        # Series are logged in their own table next to the appointments WAL
+        # (or beside the durable backend, when a data directory is given)
+        if data_dir:
+            self._recover_series(data_dir)
     
     def _initialize_mock_data(self):
         """Initialize with 15 realistic appointments"""
@@ -41,27 +144,175 @@ class AppointmentService:
             {"patient_name": "Nikhil Rao", "date": "2025-12-25", "time": "09:30", "duration": 45, "doctor_name": "Dr. Rajesh Verma", "status": "Completed", "mode": "Video"},
         ]
         
+        created_at = datetime.now().isoformat()
         for data in mock_data:
-            appointment = Appointment(**data)
-            self._appointments[appointment.id] = appointment
+            self._store(Appointment(id=str(uuid.uuid4()), created_at=created_at, **data))
+    
+    def _recover_series(self, data_dir: str) -> None:
+        """
+        Reload logged series
+        
+        Detaching an occurrence logs the stand-alone appointment before
+        the series exception; if a crash came between the two, the
+        exception is re-applied here so the occurrence is not listed twice.
+        """
+        self._series_persistence = PersistentTable(
+            data_dir,
+            "series",
+            group_commit=os.getenv("APPOINTMENT_WAL_GROUP_COMMIT", "1") != "0"
+        )
+        for row in self._series_persistence.recover() or ():
+            series = AppointmentSeries(**row)
+            occurrences = list(series.occurrences())
+            detached = [
+                occurrence.date
+                for occurrence, stored in zip(occurrences, self._backend.get_many([apt.id for apt in occurrences]))
+                if stored is not None
+            ]
+            if detached:
+                series = series.replace(exceptions=sorted((*series.exceptions, *detached)))
+                self._series_persistence.log_put(series.to_dict())
+            self._series.put(series)
+    
+    def get_appointments(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> List[Appointment]:
+        """Retrieve appointments with optional filtering, ordered by (date, time)"""
+        rows = self._backend.query(date, status, doctor_name, date_from, date_to)
+        occurrences = self._series.query(date, status, doctor_name, date_from, date_to)
+        if not occurrences:
+            return rows
+        return list(merge(rows, occurrences, key=_sort_key))
     
-    def get_appointments(self, date: Optional[str] = None, status: Optional[str] = None, doctor_name: Optional[str] = None) -> List[Appointment]:
-        """Retrieve appointments with optional filtering"""
-        appointments = list(self._appointments.values())
+    def page_appointments(
+        self,
+        first: int,
+        after: Optional[Tuple[str, str, str]] = None,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> Tuple[List[Appointment], bool]:
+        """
+        Retrieve one page of appointments after a (date, time, id) position
         
-        if date:
-            appointments = [apt for apt in appointments if apt.date == date]
-        if status:
-            appointments = [apt for apt in appointments if apt.status == status]
-        if doctor_name:
-            appointments = [apt for apt in appointments if apt.doctor_name == doctor_name]
+        Returns the page and whether more rows follow it. Only first + 1
+        index keys are read, so cost is bounded by page size.
+        """
+        page = self._backend.query(date, status, doctor_name, date_from, date_to, after=after, limit=first + 1)
+        occurrences = self._series.query(date, status, doctor_name, date_from, date_to, after=after, limit=first + 1)
+        if occurrences:
+            page = list(islice(merge(page, occurrences, key=_sort_key), first + 1))
+        return page[:first], len(page) > first
+    
+    def iter_appointments(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        batch_size: int = 500
+    ) -> Iterator[Appointment]:
+        """
+        Walk matching appointments in (date, time, id) order, one keyset page at a time
+        
+        Memory is bounded by batch_size however many rows match. Rows
+        written mid-walk may or may not be included; rows that exist
+        throughout are yielded exactly once.
+        """
+        after = None
+        while True:
+            page, more = self.page_appointments(batch_size, after, date, status, doctor_name, date_from, date_to)
+            yield from page
+            if not more:
+                return
+            last = page[-1]
+            after = (last.date, last.time, last.id)
+    
+    def count_appointments(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """Count matching appointments from the index without loading rows"""
+        return (
+            self._backend.count(date, status, doctor_name, date_from, date_to)
+            + self._series.count(date, status, doctor_name, date_from, date_to)
+        )
+    
+    def estimate_appointments(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """Upper bound on count_appointments, cheap enough to size every query"""
+        return (
+            self._backend.estimate_count(date, status, doctor_name, date_from, date_to)
+            + self._series.count(date, status, doctor_name, date_from, date_to)
+        )
+    
+    def count_doctors(self) -> int:
+        """Doctors with at least one appointment"""
+        return len(self._doctor_names())
+    
+    def get_stats(
+        self,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        doctor_name: Optional[str] = None
+    ) -> Dict:
+        """Aggregate status/mode counts from the maintained counters and the series in range"""
+        return self._stats.summarize(date_from, date_to, doctor_name, self._series.tally(date_from, date_to, doctor_name))
+    
+    def available_slots(
+        self,
+        date_from: str,
+        date_to: str,
+        duration: int,
+        doctor_name: Optional[str] = None,
+        buffer_minutes: int = 5
+    ) -> List[Tuple[str, str, int, int]]:
+        """
+        Free (doctor_name, date, start, end) windows for booking `duration` minutes
         
-        appointments.sort(key=lambda x: (x.date, x.time))
-        return appointments
+        Gaps come from a sweep over each doctor's sorted busy intervals
+        and are cached per (doctor, date) until that day is written.
+        Without doctor_name every doctor with appointments is searched.
+        """
+        doctors = [doctor_name] if doctor_name else self._doctor_names()
+        return self._availability.search(doctors, date_from, date_to, duration, buffer_minutes)
     
     def get_appointment(self, appointment_id: str) -> Optional[Appointment]:
-        """Retrieve single appointment by ID"""
-        return self._appointments.get(appointment_id)
+        """Retrieve single appointment by ID; occurrence ids are answered from their series"""
+        return self._backend.get(appointment_id) or self._get_occurrence(appointment_id)
+    
+    def get_appointments_by_ids(self, appointment_ids: List[str]) -> List[Optional[Appointment]]:
+        """Retrieve appointments by ID in one storage call, None where missing"""
+        found = self._backend.get_many(appointment_ids)
+        if not self._series:
+            return found
+        return [apt or self._get_occurrence(appointment_id) for appointment_id, apt in zip(appointment_ids, found)]
+    
+    def get_appointment_lists(self, filters: List[Tuple[Optional[str], ...]]) -> List[List[Appointment]]:
+        """get_appointments for each (date, status, doctor_name, date_from, date_to) tuple"""
+        return [self.get_appointments(*arguments) for arguments in filters]
+    
+    def get_series(self, series_id: str) -> Optional[AppointmentSeries]:
+        """Retrieve a recurring series by ID"""
+        return self._series.get(series_id)
     
     def create_appointment(self, data: AppointmentCreate) -> Appointment:
         """Create new appointment with validation"""
@@ -77,41 +328,467 @@ class AppointmentService:
             created_at=datetime.now().isoformat()
         )
         
-        if self._has_conflict(new_appointment):
-            raise ValueError(f"Time conflict: {data.doctor_name} already has an appointment at {data.time} on {data.date}")
+        with self._schedule_locks.holding((data.doctor_name, data.date)):
+            with self._apply_lock:
+                inserted = not self._clashes_with_series(new_appointment) and self._backend.insert_if_free(new_appointment)
+                if inserted:
+                    self._count(new_appointment)
+            if not inserted:
+                raise ValueError(f"Time conflict: {data.doctor_name} already has an appointment at {data.time} on {data.date}")
+            self._log_puts([new_appointment])
+            self._publish(CREATED, new_appointment)
         
-        self._appointments[new_appointment.id] = new_appointment
+        self._maybe_snapshot()
         return new_appointment
     
+    def create_many(self, items: List[Dict[str, Any]]) -> Tuple[List[Appointment], Dict[int, str]]:
+        """
+        Create a batch of appointments atomically
+        
+        The whole batch is validated in one pass, checked for overlaps
+        within itself by a sorted sweep and against the store through the
+        schedule index. Nothing is written unless every item passes.
+        
+        Returns:
+            (created appointments, {batch position: error message})
+        """
+        errors: Dict[int, str] = {}
+        try:
+            validated = _batch_adapter.validate_python(items)
+        except ValidationError as e:
+            for error in e.errors():
+                position = error["loc"][0]
+                field = ".".join(str(part) for part in error["loc"][1:])
+                errors.setdefault(position, f"{field}: {error['msg']}" if field else error["msg"])
+            validated = [
+                AppointmentCreate.model_validate(item) if position not in errors else None
+                for position, item in enumerate(items)
+            ]
+        
+        created_at = datetime.now().isoformat()
+        candidates: Dict[int, Appointment] = {}
+        for position, data in enumerate(validated):
+            if data is None:
+                continue
+            candidates[position] = Appointment(
+                id=str(uuid.uuid4()),
+                patient_name=data.patient_name,
+                date=data.date,
+                time=data.time,
+                duration=data.duration,
+                doctor_name=data.doctor_name,
+                status=data.status or "Scheduled",
+                mode=data.mode,
+                created_at=created_at
+            )
+        
+        intervals = []
+        for position, apt in candidates.items():
+            if apt.status != "Cancelled":
+                intervals.append((apt.doctor_name, apt.date, apt.start, apt.end, position))
+        for position, other in find_batch_conflicts(intervals).items():
+            errors.setdefault(position, f"Time conflict: overlaps item {other} in this batch")
+        
+        shards = [(apt.doctor_name, apt.date) for apt in candidates.values()]
+        with self._schedule_locks.holding(*shards):
+            with self._apply_lock:
+                for doctor_name, date, start, end, position in intervals:
+                    if (self._series.has_conflict(doctor_name, date, start, end)
+                            or self._backend.has_conflict(doctor_name, date, start, end)):
+                        apt = candidates[position]
+                        errors[position] = f"Time conflict: {apt.doctor_name} already has an appointment at {apt.time} on {apt.date}"
+                if errors:
+                    return [], dict(sorted(errors.items()))
+                
+                created = [candidates[position] for position in range(len(items))]
+                self._backend.put_many(created)
+                for apt in created:
+                    self._count(apt)
+            self._log_puts(created)
+            for apt in created:
+                self._publish(CREATED, apt)
+        
+        self._maybe_snapshot()
+        return created, {}
+    
+    def import_appointments(self, appointments: List[Appointment], batch_size: int = 10000) -> Dict[int, str]:
+        """
+        Bulk-load already validated appointments, rejecting conflicts row by row
+        
+        Unlike create_many the load is not all-or-nothing. Rows are sorted
+        by (doctor, date, start) once, so overlaps within the import are
+        found by a single linear sweep (earlier starts win) and each batch
+        touches only a few doctors' days. Batches of batch_size rows are
+        checked against the store, applied and logged under one lock
+        acquisition and one WAL append each.
+        
+        Returns:
+            {position in appointments: error message} for every rejected row
+        """
+        sort_keys = [(apt.doctor_name, apt.date, apt.start) for apt in appointments]
+        order = sorted(range(len(appointments)), key=sort_keys.__getitem__)
+        intervals = []
+        for position in order:
+            apt = appointments[position]
+            if apt.status != "Cancelled":
+                intervals.append((apt.doctor_name, apt.date, apt.start, apt.end, position))
+        errors: Dict[int, str] = {
+            position: f"Time conflict: overlaps the {appointments[other].time} appointment with {appointments[other].doctor_name} in this import"
+            for position, other in find_batch_conflicts(intervals).items()
+        }
+        for offset in range(0, len(order), batch_size):
+            batch = [position for position in order[offset:offset + batch_size] if position not in errors]
+            if not batch:
+                continue
+            shards = {(appointments[position].doctor_name, appointments[position].date) for position in batch}
+            with self._schedule_locks.holding(*shards):
+                accepted = []
+                with self._apply_lock:
+                    for position in batch:
+                        if self._clashes_with_series(appointments[position]):
+                            apt = appointments[position]
+                            errors[position] = f"Time conflict: {apt.doctor_name} has a recurring appointment at {apt.time} on {apt.date}"
+                    batch = [position for position in batch if position not in errors]
+                    rows = [appointments[position] for position in batch]
+                    try:
+                        inserted = self._backend.put_many_if_free(rows)
+                    except Exception:
+                        # A backend may fail part way through; the rows carry fresh
+                        # ids, so removing them takes back exactly what it stored
+                        for apt in rows:
+                            self._backend.remove(apt.id)
+                        raise
+                    for position, free in zip(batch, inserted):
+                        apt = appointments[position]
+                        if free:
+                            accepted.append(apt)
+                        else:
+                            errors[position] = f"Time conflict: {apt.doctor_name} already has an appointment at {apt.time} on {apt.date}"
+                    # Stats per row, but caches once per doctor's day rather than once per row
+                    for apt in accepted:
+                        self._stats.add(apt.date, apt.doctor_name, apt.status, apt.mode)
+                    for doctor_name, date in shards:
+                        self._availability.invalidate(doctor_name, date)
+                        self.versions.bump(date, doctor_name)
+                self._log_puts(accepted)
+                for apt in accepted:
+                    self._publish(CREATED, apt)
+            self._maybe_snapshot()
+        return errors
+    
     def update_appointment_status(self, appointment_id: str, new_status: str) -> Optional[Appointment]:
-        """Update appointment status"""
-        appointment = self._appointments.get(appointment_id)
+        """Update appointment status; an occurrence is detached from its series first"""
+        if new_status not in STATUSES:
+            raise ValueError(f"Invalid status '{new_status}', expected one of: {', '.join(STATUSES)}")
+        appointment = self._backend.get(appointment_id)
         if not appointment:
-            return None
+            occurrence = split_occurrence_id(appointment_id)
+            return self._detach_occurrence(*occurrence, new_status) if occurrence else None
+        
+        with self._schedule_locks.holding((appointment.doctor_name, appointment.date)):
+            # Re-read so an update that finished while we waited is not lost
+            appointment = self._backend.get(appointment_id)
+            if not appointment:
+                return None
+            updated_appointment = appointment.replace(status=new_status)
+            with self._apply_lock:
+                previous = self._backend.replace(updated_appointment)
+                if previous is None:
+                    return None
+                self._uncount(previous)
+                self._count(updated_appointment)
+            self._log_puts([updated_appointment])
+            self._publish(UPDATED, updated_appointment)
         
-        updated_appointment = appointment.model_copy(update={"status": new_status})
-        self._appointments[appointment_id] = updated_appointment
+        self._maybe_snapshot()
         return updated_appointment
     
     def delete_appointment(self, appointment_id: str) -> bool:
-        """Delete appointment"""
-        if appointment_id in self._appointments:
-            del self._appointments[appointment_id]
-            return True
-        return False
-    
-    def _has_conflict(self, new_appointment: Appointment) -> bool:
-        """Detect time conflicts"""
-        from utils.conflict_detector import detect_time_conflict
-        
-        return detect_time_conflict(
-            new_date=new_appointment.date,
-            new_time=new_appointment.time,
-            new_duration=new_appointment.duration,
-            doctor_name=new_appointment.doctor_name,
-            existing_appointments=list(self._appointments.values()),
-            exclude_id=None
+        """Delete appointment; deleting an occurrence skips that date of its series"""
+        appointment = self._backend.get(appointment_id)
+        if appointment is None:
+            occurrence = split_occurrence_id(appointment_id)
+            return self._skip_occurrence(*occurrence) if occurrence else False
+        
+        with self._schedule_locks.holding((appointment.doctor_name, appointment.date)):
+            with self._apply_lock:
+                appointment = self._unstore(appointment_id)
+                if appointment is None:
+                    return False
+            if self._persistence:
+                self._persistence.log_delete(appointment_id)
+            self.changes.publish(DELETED, appointment_id, appointment.doctor_name, appointment.date)
+        
+        self._maybe_snapshot()
+        return True
+    
+    def create_series(self, data: SeriesCreate) -> AppointmentSeries:
+        """
+        Book a recurring series as one record
+        
+        Holds the lock of every day the series covers while it is checked
+        against the doctor's appointments and other series, so no booking
+        can slip into one of its slots in between.
+        """
+        series = AppointmentSeries(
+            id=str(uuid.uuid4()),
+            patient_name=data.patient_name,
+            date=data.date,
+            time=data.time,
+            duration=data.duration,
+            doctor_name=data.doctor_name,
+            status=data.status or "Scheduled",
+            mode=data.mode,
+            frequency=data.frequency,
+            count=data.count,
+            until=data.until,
+            exceptions=tuple(data.exceptions),
+            created_at=datetime.now().isoformat()
+        )
+        
+        with self._schedule_locks.holding(*((data.doctor_name, date) for date in data.occurrence_dates())):
+            with self._apply_lock:
+                conflict = self._series_conflict(series)
+                if conflict is None:
+                    self._series.put(series)
+                    self._invalidate_series(series)
+            if conflict is not None:
+                raise ValueError(conflict)
+            self._log_series(series)
+            for occurrence in series.occurrences():
+                self._publish(CREATED, occurrence)
+        
+        self._maybe_snapshot()
+        return series
+    
+    def delete_series(self, series_id: str) -> bool:
+        """Delete a series and its remaining occurrences; detached occurrences stay booked"""
+        series = self._series.get(series_id)
+        if series is None:
+            return False
+        
+        dates = [occurrence.date for occurrence in series.occurrences()]
+        with self._schedule_locks.holding(*((series.doctor_name, date) for date in dates)):
+            with self._apply_lock:
+                series = self._series.remove(series_id)
+                if series is None:
+                    return False
+                self._invalidate_series(series)
+            if self._series_persistence:
+                self._series_persistence.log_delete(series_id)
+            for occurrence in series.occurrences():
+                self.changes.publish(DELETED, occurrence.id, occurrence.doctor_name, occurrence.date)
+        
+        self._maybe_snapshot()
+        return True
+    
+    def storage_stats(self) -> Dict[str, Any]:
+        """Stored appointments and index entry counts, for monitoring"""
+        return {"appointments": len(self._backend), "indexes": {**self._backend.index_sizes(), "series": len(self._series)}}
+    
+    @property
+    def durable_storage(self) -> bool:
+        """Whether the backend keeps its own rows on disk (e.g. SQLite)"""
+        return self._backend.durable
+    
+    @property
+    def blocking_storage(self) -> bool:
+        """Whether backend calls block on disk I/O or on shard processes"""
+        return self._backend.blocking
+    
+    @property
+    def persistent(self) -> bool:
+        """Whether writes are logged to the write-ahead log"""
+        return self._persistence is not None
+    
+    @property
+    def write_version(self) -> int:
+        """Stamp of the latest applied write; grows with every write"""
+        return self.versions.stamp((None, None))
+    
+    def snapshot_rows(self) -> Tuple[int, List[Appointment]]:
+        """
+        Every stored appointment and the write version they reflect, taken atomically
+        
+        Series are expanded here, since replicas only serve appointment rows.
+        """
+        with self._apply_lock:
+            occurrences = [occurrence for series in self._series for occurrence in series.occurrences()]
+            return self.write_version, list(self._backend) + occurrences
+    
+    def close(self) -> None:
+        """Flush and close the write-ahead logs and the storage backend"""
+        if self._persistence:
+            self._persistence.close()
+        if self._series_persistence:
+            self._series_persistence.close()
+        self._backend.close()
+    
+    def _log_puts(self, appointments: List[Appointment]) -> None:
+        """
+        Make applied writes durable before they are acknowledged
+        
+        Called after the apply lock is released but with the shard lock
+        still held, so records for one doctor's day reach the log in the
+        order they were applied.
+        """
+        if self._persistence:
+            self._persistence.log_puts([apt.to_dict() for apt in appointments])
+    
+    def _maybe_snapshot(self) -> None:
+        """Compact the WAL into a snapshot once enough records accumulate"""
+        if self._persistence and self._persistence.snapshot_due():
+            # Every applied write is either in the rows or logged after the truncate
+            with self._apply_lock:
+                if self._persistence.snapshot_due():
+                    self._persistence.snapshot(apt.to_dict() for apt in self._backend)
+        if self._series_persistence and self._series_persistence.snapshot_due():
+            with self._apply_lock:
+                if self._series_persistence.snapshot_due():
+                    self._series_persistence.snapshot(series.to_dict() for series in self._series)
+    
+    def _publish(self, kind: str, appointment: Appointment) -> None:
+        """Push an acknowledged write to subscribers of its doctor and day"""
+        self.changes.publish(kind, appointment.id, appointment.doctor_name, appointment.date, appointment)
+    
+    def _store(self, appointment: Appointment) -> None:
+        """Write appointment to the store and stats counters"""
+        self._backend.put(appointment)
+        self._count(appointment)
+    
+    def _unstore(self, appointment_id: str) -> Optional[Appointment]:
+        """Remove appointment from the store and stats counters"""
+        appointment = self._backend.remove(appointment_id)
+        if appointment:
+            self._uncount(appointment)
+        return appointment
+    
+    def _count(self, appointment: Appointment) -> None:
+        """Add a stored appointment to the stats and invalidate what was cached for its day"""
+        self._stats.add(appointment.date, appointment.doctor_name, appointment.status, appointment.mode)
+        self._availability.invalidate(appointment.doctor_name, appointment.date)
+        self.versions.bump(appointment.date, appointment.doctor_name)
+    
+    def _uncount(self, appointment: Appointment) -> None:
+        """Remove a deleted appointment from the stats and invalidate what was cached for its day"""
+        self._stats.remove(appointment.date, appointment.doctor_name, appointment.status, appointment.mode)
+        self._availability.invalidate(appointment.doctor_name, appointment.date)
+        self.versions.bump(appointment.date, appointment.doctor_name)
+    
+    def _doctor_names(self) -> List[str]:
+        """Doctors with at least one appointment or series"""
+        return list(dict.fromkeys(self._stats.doctor_names() + self._series.doctor_names()))
+    
+    def _day_schedule(self, doctor_name: str, date: str) -> List[Tuple[int, int]]:
+        """Busy (start, end) minutes of a doctor's day, series occurrences included"""
+        busy = self._backend.schedule(doctor_name, date)
+        occurrences = self._series.schedule(doctor_name, date) if self._series else None
+        return sorted(busy + occurrences) if occurrences else busy
+    
+    def _get_occurrence(self, appointment_id: str) -> Optional[Appointment]:
+        """The series occurrence an id names, if that date is one of its occurrences"""
+        occurrence = split_occurrence_id(appointment_id)
+        series = self._series.get(occurrence[0]) if occurrence else None
+        if series is None:
+            return None
+        try:
+            day = parse_date(occurrence[1])
+        except ValueError:
+            return None
+        return series.occurrence(day) if series.is_occurrence(day) else None
+    
+    def _clashes_with_series(self, appointment: Appointment) -> bool:
+        """Whether a single booking overlaps a series occurrence that day"""
+        return appointment.status != "Cancelled" and bool(self._series) and self._series.has_conflict(
+            appointment.doctor_name, appointment.date, appointment.start, appointment.end
         )
+    
+    def _series_conflict(self, series: AppointmentSeries, buffer_minutes: int = 5) -> Optional[str]:
+        """
+        Why a new series cannot be booked, or None
+        
+        The doctor's appointments over the series' whole span are read in
+        one index range scan and swept once, each tested against the
+        occurrence on its own day, rather than running a conflict check
+        per occurrence. Other series are compared by weekday.
+        """
+        gap = 2 * buffer_minutes
+        rows = self._backend.query(
+            doctor_name=series.doctor_name,
+            date_from=series.date,
+            date_to=Date.fromordinal(series.last_day).isoformat()
+        )
+        for apt in rows:
+            if (apt.status != "Cancelled" and series.is_occurrence(apt.day)
+                    and apt.start < series.end + gap and apt.end > series.start - gap):
+                return f"Time conflict: {series.doctor_name} already has an appointment at {apt.time} on {apt.date}"
+        clash = self._series.conflicting_series(series, buffer_minutes)
+        if clash is not None:
+            day, other = clash
+            return f"Time conflict: {series.doctor_name} has a recurring appointment at {other.time} on {Date.fromordinal(day).isoformat()}"
+        return None
+    
+    def _detach_occurrence(self, series_id: str, date: str, new_status: str) -> Optional[Appointment]:
+        """
+        Turn one occurrence into a stand-alone appointment with a new status
+        
+        The appointment keeps the occurrence id and slot, and the date
+        becomes an exception of the series, so later edits and deletes of
+        that id reach the stored row.
+        """
+        occurrence = self._get_occurrence(occurrence_id(series_id, date))
+        if occurrence is None:
+            return None
+        
+        with self._schedule_locks.holding((occurrence.doctor_name, occurrence.date)):
+            with self._apply_lock:
+                series = self._series.get(series_id)
+                if series is None or not series.is_occurrence(occurrence.day):
+                    return None
+                updated_series = series.replace(exceptions=sorted((*series.exceptions, occurrence.date)))
+                appointment = occurrence.replace(status=new_status)
+                # Row first: if the backend refuses it the series still holds the occurrence
+                self._store(appointment)
+                self._series.put(updated_series)
+            # Appointment first: recovery re-applies an exception whose record was lost
+            self._log_puts([appointment])
+            self._log_series(updated_series)
+            self._publish(UPDATED, appointment)
+        
+        self._maybe_snapshot()
+        return appointment
+    
+    def _skip_occurrence(self, series_id: str, date: str) -> bool:
+        """Delete one occurrence by adding its date to the series exceptions"""
+        occurrence = self._get_occurrence(occurrence_id(series_id, date))
+        if occurrence is None:
+            return False
+        
+        with self._schedule_locks.holding((occurrence.doctor_name, occurrence.date)):
+            with self._apply_lock:
+                series = self._series.get(series_id)
+                if series is None or not series.is_occurrence(occurrence.day):
+                    return False
+                updated_series = series.replace(exceptions=sorted((*series.exceptions, occurrence.date)))
+                self._series.put(updated_series)
+                self._availability.invalidate(occurrence.doctor_name, occurrence.date)
+                self.versions.bump(occurrence.date, occurrence.doctor_name)
+            self._log_series(updated_series)
+            self.changes.publish(DELETED, occurrence.id, occurrence.doctor_name, occurrence.date)
+        
+        self._maybe_snapshot()
+        return True
+    
+    def _invalidate_series(self, series: AppointmentSeries) -> None:
+        """Invalidate what was cached for every day a series occupies"""
+        for occurrence in series.occurrences():
+            self._availability.invalidate(occurrence.doctor_name, occurrence.date)
+            self.versions.bump(occurrence.date, occurrence.doctor_name)
+    
+    def _log_series(self, series: AppointmentSeries) -> None:
+        """Make a series write durable before it is acknowledged"""
+        if self._series_persistence:
+            self._series_persistence.log_put(series.to_dict())
 
 
 # Global singleton instance
@@ -0,0 +1,195 @@
+"""
+Asyncio front end for the appointment service
+Keeps in-memory work on the event loop and offloads blocking storage I/O
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import weakref
+
+from appointment_service import AppointmentService, appointment_service
+from models.appointment import Appointment, AppointmentCreate
+from models.series import AppointmentSeries, SeriesCreate
+from utils.change_feed import Change
+
+
+class AsyncAppointmentService:
+    """
+    async def wrapper around AppointmentService
+
+    Reads and writes against the in-memory stores are microseconds of CPU
+    work, so they run inline instead of paying a thread hop. Calls that
+    reach blocking I/O (SQLite reads, shard processes, WAL or SQLite
+    writes) go through asyncio.to_thread. Writes hold an asyncio lock for
+    each (doctor_name, date) shard they touch, so a conflict check and its
+    insert are never interleaved with another write to the same doctor's
+    day.
+    """
+
+    def __init__(self, service: AppointmentService):
+        self._service = service
+        self._offload_reads = service.blocking_storage
+        self._offload_writes = service.blocking_storage or service.persistent
+        # Locks vanish once no coroutine holds or waits on them
+        self._locks: "weakref.WeakValueDictionary[Tuple[str, str], asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    async def _read(self, fn, *args, **kwargs):
+        if self._offload_reads:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+
+    async def _write(self, shards: Iterable[Tuple[str, str]], fn, *args):
+        # Sorted acquisition keeps multi-shard batches deadlock free
+        locks = []
+        for shard in sorted(set(shards)):
+            lock = self._locks.get(shard)
+            if lock is None:
+                lock = self._locks[shard] = asyncio.Lock()
+            locks.append(lock)
+        for position, lock in enumerate(locks):
+            try:
+                await lock.acquire()
+            except BaseException:
+                for held in locks[:position]:
+                    held.release()
+                raise
+        try:
+            if self._offload_writes:
+                return await asyncio.to_thread(fn, *args)
+            return fn(*args)
+        finally:
+            for lock in locks:
+                lock.release()
+
+    async def get_appointments(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> List[Appointment]:
+        """Retrieve appointments with optional filtering, ordered by (date, time)"""
+        return await self._read(self._service.get_appointments, date, status, doctor_name, date_from, date_to)
+
+    async def page_appointments(
+        self,
+        first: int,
+        after: Optional[Tuple[str, str, str]] = None,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> Tuple[List[Appointment], bool]:
+        """Retrieve one page of appointments after a (date, time, id) position"""
+        return await self._read(self._service.page_appointments, first, after, date, status, doctor_name, date_from, date_to)
+
+    async def count_appointments(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """Count matching appointments"""
+        return await self._read(self._service.count_appointments, date, status, doctor_name, date_from, date_to)
+
+    async def get_stats(
+        self,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        doctor_name: Optional[str] = None
+    ) -> Dict:
+        """Aggregate status/mode counts; always served from in-memory counters"""
+        return self._service.get_stats(date_from, date_to, doctor_name)
+
+    async def available_slots(
+        self,
+        date_from: str,
+        date_to: str,
+        duration: int,
+        doctor_name: Optional[str] = None,
+        buffer_minutes: int = 5
+    ) -> List[Tuple[str, str, int, int]]:
+        """Free (doctor_name, date, start, end) windows; cache misses may read storage"""
+        return await self._read(self._service.available_slots, date_from, date_to, duration, doctor_name, buffer_minutes)
+
+    async def get_appointment(self, appointment_id: str) -> Optional[Appointment]:
+        """Retrieve single appointment by ID"""
+        return await self._read(self._service.get_appointment, appointment_id)
+
+    async def get_appointments_by_ids(self, appointment_ids: List[str]) -> List[Optional[Appointment]]:
+        """Retrieve appointments by ID, one thread hop for the lot when storage blocks"""
+        return await self._read(self._service.get_appointments_by_ids, appointment_ids)
+
+    async def get_appointment_lists(self, filters: List[Tuple[Optional[str], ...]]) -> List[List[Appointment]]:
+        """Run several filtered listings, one thread hop for the lot when storage blocks"""
+        return await self._read(self._service.get_appointment_lists, filters)
+
+    async def get_series(self, series_id: str) -> Optional[AppointmentSeries]:
+        """Retrieve a recurring series by ID; series are always held in memory"""
+        return self._service.get_series(series_id)
+
+    async def create_appointment(self, data: AppointmentCreate) -> Appointment:
+        """Create new appointment under its (doctor_name, date) lock"""
+        return await self._write([(data.doctor_name, data.date)], self._service.create_appointment, data)
+
+    async def create_many(self, items: List[Dict[str, Any]]) -> Tuple[List[Appointment], Dict[int, str]]:
+        """Create a batch atomically, holding the lock of every shard it touches"""
+        shards = [
+            (item.get("doctor_name"), item.get("date"))
+            for item in items
+            if isinstance(item.get("doctor_name"), str) and isinstance(item.get("date"), str)
+        ]
+        return await self._write(shards, self._service.create_many, items)
+
+    async def update_appointment_status(self, appointment_id: str, new_status: str) -> Optional[Appointment]:
+        """Update appointment status under the appointment's shard lock"""
+        appointment = await self.get_appointment(appointment_id)
+        if not appointment:
+            return None
+        return await self._write(
+            [(appointment.doctor_name, appointment.date)],
+            self._service.update_appointment_status, appointment_id, new_status
+        )
+
+    async def delete_appointment(self, appointment_id: str) -> bool:
+        """Delete appointment under the appointment's shard lock"""
+        appointment = await self.get_appointment(appointment_id)
+        if not appointment:
+            return False
+        return await self._write(
+            [(appointment.doctor_name, appointment.date)],
+            self._service.delete_appointment, appointment_id
+        )
+
+    async def create_series(self, data: SeriesCreate) -> AppointmentSeries:
+        """Create a recurring series, holding the lock of every day it covers"""
+        return await self._write(
+            [(data.doctor_name, date) for date in data.occurrence_dates()],
+            self._service.create_series, data
+        )
+
+    async def delete_series(self, series_id: str) -> bool:
+        """Delete a recurring series under the locks of its remaining occurrences"""
+        series = self._service.get_series(series_id)
+        if series is None:
+            return False
+        return await self._write(
+            [(occurrence.doctor_name, occurrence.date) for occurrence in series.occurrences()],
+            self._service.delete_series, series_id
+        )
+
+    def subscribe(self, doctor_name: Optional[str] = None, date: Optional[str] = None) -> AsyncIterator[Change]:
+        """Stream changes to one doctor and/or day, whichever front end wrote them"""
+        return self._service.changes.subscribe(doctor_name, date)
+
+    async def close(self) -> None:
+        """Flush and close storage off the event loop"""
+        await asyncio.to_thread(self._service.close)
+
+
+# Global instance sharing the synchronous singleton's storage
+async_appointment_service = AsyncAppointmentService(appointment_service)
@@ -0,0 +1,95 @@
+"""
+Free-slot search latency: 50 doctors x 30 days, cold cache, warm cache and after a write
+Run from backend/: python -m benchmarks.availability_search
+(set APPOINTMENT_STORE to benchmark another storage backend)
+"""
+
+import random
+import time
+import uuid
+from datetime import date as Date, timedelta
+from statistics import median
+
+from appointment_service import AppointmentService
+from benchmarks.create_latency import bench_store
+import graphql_schema.queries as queries
+from models.appointment import Appointment, AppointmentCreate
+
+DOCTORS = 50
+DAYS = 30
+APPOINTMENTS_PER_DAY = 10
+FIRST_DAY = Date(2030, 1, 1)
+REPEATS = 50
+
+
+def seeded_service() -> AppointmentService:
+    """Each doctor gets APPOINTMENTS_PER_DAY non-overlapping bookings per day"""
+    rng = random.Random(7)
+    service = AppointmentService(store=bench_store())
+    batch = []
+    for doctor in range(DOCTORS):
+        for day in range(DAYS):
+            starts = sorted(rng.sample(range(8 * 60, 20 * 60 - 60, 60), APPOINTMENTS_PER_DAY))
+            for start in starts:
+                batch.append(Appointment(
+                    id=str(uuid.uuid4()),
+                    patient_name="Bench Patient",
+                    date=(FIRST_DAY + timedelta(days=day)).isoformat(),
+                    time=f"{start // 60:02d}:{start % 60:02d}",
+                    duration=rng.choice([15, 30, 45]),
+                    doctor_name=f"Dr. {doctor}",
+                    status="Scheduled",
+                    mode="Video",
+                    created_at="2030-01-01T00:00:00",
+                ))
+    service._backend.put_many(batch)
+    for apt in batch:
+        service._count(apt)
+    return service
+
+
+def timed_ms(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1e3
+
+
+def main():
+    service = seeded_service()
+    date_from = FIRST_DAY.isoformat()
+    date_to = (FIRST_DAY + timedelta(days=DAYS - 1)).isoformat()
+
+    def search():
+        return service.available_slots(date_from, date_to, duration=30)
+
+    cold = timed_ms(search)
+    slots = len(search())
+    warm = median(timed_ms(search) for _ in range(REPEATS))
+
+    # One booking per repeat invalidates a single (doctor, date)
+    after_write = []
+    for i in range(REPEATS):
+        doctor, date, start, end = search()[i * 7]
+        service.create_appointment(AppointmentCreate(
+            patient_name="Bench Patient", date=date, time=f"{start // 60:02d}:{start % 60:02d}",
+            duration=15, doctor_name=doctor, mode="Phone",
+        ))
+        after_write.append(timed_ms(search))
+
+    # The same search through the GraphQL resolver, including type conversion
+    queries.appointment_service = service
+    query = queries.Query()
+    resolver = median(
+        timed_ms(lambda: query.available_slots(date_from=date_from, date_to=date_to, duration=30))
+        for _ in range(REPEATS)
+    )
+
+    print(f"{DOCTORS} doctors x {DAYS} days, {DOCTORS * DAYS * APPOINTMENTS_PER_DAY} appointments, {slots} free windows")
+    print(f"  cold cache        {cold:8.2f} ms")
+    print(f"  warm cache        {warm:8.2f} ms")
+    print(f"  after one write   {median(after_write):8.2f} ms")
+    print(f"  GraphQL resolver  {resolver:8.2f} ms (warm)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Concurrency stress test for appointment creation
+Run from backend/: python -m benchmarks.booking_stress [threads...]
+"""
+
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date as Date, timedelta
+
+from appointment_service import STORE_BACKENDS, AppointmentService
+from benchmarks.create_latency import bench_store, slot_date
+from models.appointment import AppointmentCreate
+from utils.conflict_detector import time_to_minutes
+
+DEFAULT_THREADS = [1, 2, 4, 8, 16]
+RACE_THREADS = 16
+RACE_ATTEMPTS = 300  # per thread, all aimed at a handful of doctor-days
+RACE_DOCTORS = 4
+RACE_DAYS = 2
+WRITES_PER_RUN = 4000
+FIRST_LOAD_DAY = Date(2030, 1, 1)
+
+LEGACY_CREATE = """
+mutation Create($input: AppointmentInput!) {
+  createAppointment(input: $input) { id }
+}
+"""
+
+
+def race_slot(rng: random.Random):
+    """A random 30-minute slot on one of a few contested doctor-days"""
+    minutes = 9 * 60 + rng.randrange(0, 180, 5)
+    return (
+        f"Dr. Race {rng.randrange(RACE_DOCTORS)}",
+        slot_date(rng.randrange(RACE_DAYS)),
+        f"{minutes // 60:02d}:{minutes % 60:02d}",
+    )
+
+
+def hammer(book, threads: int = RACE_THREADS):
+    """Run `book(rng)` RACE_ATTEMPTS times on each thread, all released at once"""
+    start = threading.Barrier(threads)
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        start.wait()
+        for _ in range(RACE_ATTEMPTS):
+            book(rng)
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+
+def double_bookings(intervals, gap: int) -> int:
+    """Pairs of (start, end) intervals on the same doctor-day closer than `gap`"""
+    by_day = defaultdict(list)
+    for doctor, date, start, end in intervals:
+        by_day[(doctor, date)].append((start, end))
+    clashes = 0
+    for day in by_day.values():
+        day.sort()
+        for (_, previous_end), (start, _) in zip(day, day[1:]):
+            clashes += start < previous_end + gap
+    return clashes
+
+
+def race_service(backend: str):
+    service = AppointmentService(store=bench_store(backend))
+
+    def book(rng):
+        doctor, date, time_ = race_slot(rng)
+        try:
+            service.create_appointment(AppointmentCreate(
+                patient_name="Race Patient", date=date, time=time_, duration=30, doctor_name=doctor, mode="Video"
+            ))
+        except ValueError:
+            pass  # conflict rejected, as it should be
+
+    hammer(book)
+    booked = [apt for apt in service.get_appointments() if apt.doctor_name.startswith("Dr. Race")]
+    intervals = [
+        (apt.doctor_name, apt.date, apt.start, apt.end)
+        for apt in booked
+    ]
+    service.close()
+    return len(booked), double_bookings(intervals, gap=10)
+
+
+def race_legacy():
+    import main as legacy
+    logging.getLogger("strawberry.execution").setLevel(logging.CRITICAL)  # expected conflict errors
+
+    def book(rng):
+        doctor, date, time_ = race_slot(rng)
+        legacy.schema.execute_sync(LEGACY_CREATE, variable_values={"input": {
+            "patientName": "Race Patient", "date": date, "time": time_, "duration": 30,
+            "doctorName": doctor, "status": "Scheduled", "mode": "Video",
+        }})
+
+    hammer(book)
+    booked = [apt for apt in legacy.appointments_db if apt["doctorName"].startswith("Dr. Race")]
+    intervals = [
+        (apt["doctorName"], apt["date"], time_to_minutes(apt["time"]), time_to_minutes(apt["time"]) + apt["duration"])
+        for apt in booked
+    ]
+    ids = [apt["id"] for apt in legacy.appointments_db]
+    return len(booked), double_bookings(intervals, gap=0), len(ids) - len(set(ids))
+
+
+def create_rate(threads: int) -> float:
+    """Durable creates per second with the WAL on, each thread booking its own doctor"""
+    with tempfile.TemporaryDirectory() as directory:
+        service = AppointmentService(store=bench_store("memory"), data_dir=directory)
+        per_thread = WRITES_PER_RUN // threads
+        start = threading.Barrier(threads + 1)
+
+        def worker(thread: int):
+            start.wait()
+            for i in range(per_thread):
+                day, slot = divmod(i, 20)
+                minutes = 8 * 60 + slot * 30
+                service.create_appointment(AppointmentCreate(
+                    patient_name="Load Patient", date=(FIRST_LOAD_DAY + timedelta(days=day)).isoformat(), time=f"{minutes // 60:02d}:{minutes % 60:02d}",
+                    duration=15, doctor_name=f"Dr. Load {thread}", mode="Video"
+                ))
+
+        workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+        for thread in workers:
+            thread.start()
+        start.wait()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        service.close()
+        return per_thread * threads / elapsed
+
+
+def main(thread_counts):
+    # Switch threads as often as possible so unguarded check-then-insert would race
+    sys.setswitchinterval(1e-6)
+    print(f"{RACE_THREADS} threads x {RACE_ATTEMPTS} contested creates on {RACE_DOCTORS * RACE_DAYS} doctor-days")
+    for backend in STORE_BACKENDS:
+        booked, clashes = race_service(backend)
+        print(f"  service/{backend:<9} booked {booked:>4}  double-bookings {clashes}")
+    booked, clashes, duplicate_ids = race_legacy()
+    print(f"  legacy main.py    booked {booked:>4}  double-bookings {clashes}  duplicate ids {duplicate_ids}")
+    sys.setswitchinterval(0.005)
+
+    print(f"\n{'threads':>8} {'durable creates/s':>18}")
+    for threads in thread_counts:
+        print(f"{threads:>8} {create_rate(threads):>18.0f}")
+
+
+if __name__ == "__main__":
+    os.environ.pop("APPOINTMENT_DATA_DIR", None)  # legacy main.py must stay in memory
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_THREADS)
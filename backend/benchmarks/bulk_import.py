@@ -0,0 +1,82 @@
+"""
+Bulk import throughput against one create_appointment call per row
+Run from backend/: python -m benchmarks.bulk_import [rows] [workers]
+(set APPOINTMENT_STORE to benchmark another storage backend)
+"""
+
+import csv
+import gc
+import io
+import sys
+import time
+
+from appointment_service import AppointmentService
+from benchmarks.create_latency import SLOTS_PER_DAY, bench_store
+from models.appointment import AppointmentCreate
+from utils.bulk_import import import_appointments
+
+DOCTORS = 500
+DEFAULT_ROWS = 1_000_000
+PER_ROW_SAMPLE = 20_000
+COLUMNS = ["patientName", "date", "time", "duration", "doctorName", "status", "mode"]
+
+
+def history_date(day: int) -> str:
+    """Distinct dates from 2000-01-01, on 28-day months"""
+    year, remainder = divmod(day, 12 * 28)
+    month, day_of_month = divmod(remainder, 28)
+    return f"{2000 + year:04d}-{month + 1:02d}-{day_of_month + 1:02d}"
+
+
+def rows(first: int, count: int):
+    """Non-overlapping history, one row in a thousand carrying an invalid time"""
+    for i in range(first, first + count):
+        doctor = i % DOCTORS
+        day, slot = divmod(i // DOCTORS, SLOTS_PER_DAY)
+        minutes = 8 * 60 + slot * 30
+        time_ = "25:00" if i % 1000 == 999 else f"{minutes // 60:02d}:{minutes % 60:02d}"
+        yield [f"Patient {i}", history_date(day), time_, 15, f"Dr. {doctor}", "Completed", "Video"]
+
+
+def csv_file(count: int) -> io.StringIO:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    writer.writerows(rows(0, count))
+    buffer.seek(0)
+    return buffer
+
+
+def per_row(service: AppointmentService, first: int, count: int) -> float:
+    """Rows per second through create_appointment, the only way in before /import"""
+    started = time.perf_counter()
+    for patient_name, date, time_, duration, doctor_name, status, mode in rows(first, count):
+        try:
+            service.create_appointment(AppointmentCreate(
+                patient_name=patient_name, date=date, time=time_, duration=duration,
+                doctor_name=doctor_name, status=status, mode=mode
+            ))
+        except ValueError:
+            pass
+    return count / (time.perf_counter() - started)
+
+
+def main(count: int, workers: int):
+    lines = csv_file(count)
+    service = AppointmentService(bench_store())
+    # As the CLI does: the collector would only re-walk the growing store
+    gc.disable()
+    report = import_appointments(service, lines, "csv", None, workers)
+    gc.enable()
+    print(f"{report.rows} rows: {report.imported} imported, {report.rejected} rejected in {report.seconds:.1f}s")
+    print(f"bulk import, {workers} worker(s): {report.rows / report.seconds:>10.0f} rows/s")
+    # Later days, so the same store size and no conflicts with the import
+    sample = min(count, PER_ROW_SAMPLE)
+    print(f"create_appointment per row:   {per_row(service, count, sample):>10.0f} rows/s (next {sample} rows)")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    )
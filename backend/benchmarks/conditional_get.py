@@ -0,0 +1,68 @@
+"""
+Polling cost of an unchanged appointment list: full 200, gzip 200 and 304
+Run from backend/: python -m benchmarks.conditional_get
+"""
+
+import asyncio
+import time
+from statistics import median
+from urllib.parse import urlencode
+
+import main as legacy
+from benchmarks.response_cache import GET_APPOINTMENTS, seed
+
+REQUESTS = 300
+
+
+async def get(query_string: bytes, headers: list):
+    """One GET /graphql straight through the ASGI stack; returns (status, headers, body bytes)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/graphql", "raw_path": b"/graphql", "root_path": "",
+        "query_string": query_string, "headers": [(b"host", b"bench")] + headers,
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    response = {"body": 0}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = dict(message["headers"])
+        elif message["type"] == "http.response.body":
+            response["body"] += len(message.get("body", b""))
+
+    await legacy.app(scope, receive, send)
+    return response["status"], response["headers"], response["body"]
+
+
+async def measure(query_string: bytes, headers: list):
+    latencies = []
+    for _ in range(REQUESTS):
+        started = time.perf_counter()
+        status, _, size = await get(query_string, headers)
+        latencies.append(time.perf_counter() - started)
+    return status, size, median(latencies) * 1e3
+
+
+async def main():
+    seed()
+    query_string = urlencode({"query": GET_APPOINTMENTS}).encode()
+    _, headers, _ = await get(query_string, [])
+    etag = headers[b"etag"]
+
+    print(f"{len(legacy.appointments_db)} appointments, unfiltered GetAppointments over GET")
+    print(f"{'':<22} {'status':>6} {'body bytes':>11} {'median ms':>10}")
+    for label, request_headers in (
+        ("full response", []),
+        ("gzip", [(b"accept-encoding", b"gzip")]),
+        ("If-None-Match", [(b"if-none-match", etag)]),
+    ):
+        status, size, p50 = await measure(query_string, request_headers)
+        print(f"{label:<22} {status:>6} {size:>11} {p50:>10.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
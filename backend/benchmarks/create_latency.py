@@ -0,0 +1,107 @@
+"""
+Create-latency benchmark for conflict detection
+Run from backend/: python -m benchmarks.create_latency [sizes...]
+(set APPOINTMENT_STORE to benchmark another storage backend)
+"""
+
+import os
+import sys
+import tempfile
+import time
+import uuid
+from statistics import median
+
+from appointment_service import AppointmentService, create_store
+from models.appointment import Appointment, AppointmentCreate
+from storage.sqlite_store import SQLiteAppointmentStore
+from utils.conflict_detector import detect_time_conflict
+
+DOCTORS = 200
+SLOTS_PER_DAY = 24  # 30-minute slots from 08:00
+DEFAULT_SIZES = [10**3, 10**4, 10**5, 10**6]
+SAMPLES = 2000
+
+
+def slot_date(day: int) -> str:
+    year, remainder = divmod(day, 360)
+    month, day_of_month = divmod(remainder, 30)
+    return f"{2020 + year:04d}-{month + 1:02d}-{min(day_of_month + 1, 28):02d}"
+
+
+def bench_store(backend=None):
+    """Fresh store for the chosen backend; SQLite gets a throwaway database file"""
+    backend = backend or os.getenv("APPOINTMENT_STORE", "memory")
+    if backend == "sqlite":
+        return SQLiteAppointmentStore(os.path.join(tempfile.mkdtemp(), "bench.db"))
+    return create_store(backend)
+
+
+def seeded_service(size: int) -> AppointmentService:
+    """Service pre-filled with `size` non-overlapping appointments"""
+    service = AppointmentService(store=bench_store())
+    batch = []
+    for i in range(size):
+        doctor, rest = i % DOCTORS, i // DOCTORS
+        day, slot = divmod(rest, SLOTS_PER_DAY)
+        minutes = 8 * 60 + slot * 30
+        batch.append(Appointment(
+            id=str(uuid.UUID(int=i + 1)),
+            patient_name=f"Patient {i}",
+            date=slot_date(day),
+            time=f"{minutes // 60:02d}:{minutes % 60:02d}",
+            duration=15,
+            doctor_name=f"Dr. {doctor}",
+            status="Scheduled",
+            mode="In-person",
+            created_at="2020-01-01T00:00:00",
+        ))
+    service._backend.put_many(batch)
+    for apt in batch:
+        service._count(apt)
+    return service
+
+
+def requests(count: int):
+    """Creates that land next to seeded slots on the first doctor's busiest days"""
+    for i in range(count):
+        yield AppointmentCreate(
+            patient_name="Bench Patient",
+            date=slot_date(i % 28),
+            time="21:00",
+            duration=30,
+            doctor_name="Dr. 0",
+            mode="Video",
+        )
+
+
+def bench_indexed(service: AppointmentService) -> float:
+    timings = []
+    for data in requests(SAMPLES):
+        started = time.perf_counter()
+        created = service.create_appointment(data)
+        timings.append(time.perf_counter() - started)
+        service.delete_appointment(created.id)
+    return median(timings) * 1e6
+
+
+def bench_scan(service: AppointmentService) -> float:
+    timings = []
+    existing = list(service._backend)
+    for data in list(requests(SAMPLES))[:50]:
+        started = time.perf_counter()
+        detect_time_conflict(data.date, data.time, data.duration, data.doctor_name, existing)
+        timings.append(time.perf_counter() - started)
+    return median(timings) * 1e6
+
+
+def main(sizes):
+    print(f"{'stored':>10} {'indexed create (us)':>20} {'full-scan check (us)':>21}")
+    for size in sizes:
+        service = seeded_service(size)
+        indexed = bench_indexed(service)
+        scan = bench_scan(service) if size <= 10**5 else float("nan")
+        print(f"{size:>10} {indexed:>20.1f} {scan:>21.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,109 @@
+"""
+End-to-end createAppointment latency, from input validation to the stored row
+Run from backend/: python -m benchmarks.create_mutation [stored]
+(set APPOINTMENT_STORE to benchmark another storage backend)
+"""
+
+import logging
+import sys
+import time
+from statistics import median
+
+import strawberry
+
+import graphql_schema.mutations as mutations
+import graphql_schema.queries as queries
+import main as legacy
+from benchmarks.create_latency import seeded_service, slot_date
+from benchmarks.listing_allocations import seed_legacy
+from models.appointment import AppointmentCreate
+from utils.response_cache import caching_extensions
+
+DEFAULT_STORED = 10_000
+SAMPLES = 2000
+
+CREATE = """
+mutation Create($input: CreateAppointmentInput!) {
+  createAppointment(input: $input) { id date time }
+}
+"""
+
+CREATE_LEGACY = CREATE.replace("CreateAppointmentInput", "AppointmentInput")
+
+DELETE = """
+mutation Delete($id: String!) {
+  deleteAppointment(id: $id) { success }
+}
+"""
+
+
+def booking(i: int) -> dict:
+    """An evening slot next to the first doctor's seeded day"""
+    return {
+        "patient_name": "Bench Patient", "date": slot_date(i % 28), "time": "21:00",
+        "duration": 30, "doctor_name": "Dr. 0", "status": "Scheduled", "mode": "Video",
+    }
+
+
+def camel(fields: dict) -> dict:
+    return {
+        "patientName": fields["patient_name"], "date": fields["date"], "time": fields["time"],
+        "duration": fields["duration"], "doctorName": fields["doctor_name"], "status": fields["status"], "mode": fields["mode"],
+    }
+
+
+def timed(create, delete) -> float:
+    """Median microseconds of create(i); each booking is deleted untimed so the store stays put"""
+    timings = []
+    for i in range(SAMPLES):
+        started = time.perf_counter()
+        created = create(i)
+        timings.append(time.perf_counter() - started)
+        delete(created)
+    return median(timings) * 1e6
+
+
+def main(stored: int):
+    logging.getLogger("strawberry.execution").setLevel(logging.CRITICAL)
+    service = seeded_service(stored)
+    mutations.appointment_service = service
+    # Same document caches as the served schemas, so parsing is not what gets measured
+    modular = strawberry.Schema(
+        query=queries.Query,
+        mutation=mutations.Mutation,
+        extensions=caching_extensions(None, service.versions)
+    )
+    seed_legacy(stored)
+
+    def validate(i):
+        return AppointmentCreate(**booking(i))
+
+    def service_create(i):
+        return service.create_appointment(AppointmentCreate(**booking(i))).id
+
+    def modular_create(i):
+        result = modular.execute_sync(CREATE, variable_values={"input": camel(booking(i))})
+        assert not result.errors, result.errors
+        return result.data["createAppointment"]["id"]
+
+    def legacy_create(i):
+        result = legacy.schema.execute_sync(CREATE_LEGACY, variable_values={"input": camel(booking(i))})
+        assert not result.errors, result.errors
+        return result.data["createAppointment"]["id"]
+
+    def legacy_delete(appointment_id):
+        legacy.schema.execute_sync(DELETE, variable_values={"id": appointment_id})
+
+    print(f"{stored} stored appointments, median of {SAMPLES} creates")
+    print(f"{'':<36} {'us':>8}")
+    for label, create, delete in (
+        ("AppointmentCreate validation", validate, lambda _: None),
+        ("service create_appointment", service_create, service.delete_appointment),
+        ("service GraphQL createAppointment", modular_create, service.delete_appointment),
+        ("legacy GraphQL createAppointment", legacy_create, legacy_delete),
+    ):
+        print(f"{label:<36} {timed(create, delete):>8.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_STORED)
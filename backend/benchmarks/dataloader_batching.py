@@ -0,0 +1,113 @@
+"""
+Storage calls and latency of a dashboard document with aliased lookups, with and without DataLoaders
+Run from backend/: python -m benchmarks.dataloader_batching [rows] [lookups]
+(set APPOINTMENT_STORE=sqlite to see the effect on a blocking backend, or APPOINTMENT_SHARDS=2 for
+stores a round trip away: in process the saved calls cost less than async execution adds)
+"""
+
+import asyncio
+import sys
+import time
+from collections import Counter
+from statistics import median
+
+import strawberry
+
+import graphql_schema.loaders as loaders
+import graphql_schema.queries as queries
+from async_appointment_service import AsyncAppointmentService
+from benchmarks.create_latency import DOCTORS, seeded_service, slot_date
+from graphql_schema.async_queries import AsyncQuery
+from utils.response_cache import caching_extensions
+
+DEFAULT_ROWS = 100_000
+DEFAULT_LOOKUPS = 40
+DUPLICATE_EVERY = 4  # every 4th alias repeats an earlier id, as widgets showing one record do
+LISTINGS = 6
+RUNS = 200
+
+
+class CountingStore:
+    """Passes every call through to a store, counting the read methods"""
+
+    READS = ("get", "get_many", "query")
+
+    def __init__(self, store):
+        self._store = store
+        self.calls = Counter()
+
+    def __getattr__(self, name):
+        attribute = getattr(self._store, name)
+        if name not in self.READS:
+            return attribute
+
+        def counted(*args, **kwargs):
+            self.calls[name] += 1
+            return attribute(*args, **kwargs)
+        return counted
+
+    def __len__(self):
+        return len(self._store)
+
+    def __iter__(self):
+        return iter(self._store)
+
+
+def document(ids: list) -> str:
+    """Aliased appointment(id:) lookups plus a few aliased day listings, some repeated"""
+    repeated = [ids[i - 1] if i % DUPLICATE_EVERY == DUPLICATE_EVERY - 1 else ids[i] for i in range(len(ids))]
+    lookups = [
+        f'a{i}: appointment(id: "{appointment_id}") {{ id patientName time doctorName status }}'
+        for i, appointment_id in enumerate(repeated)
+    ]
+    listings = [
+        f'd{i}: appointments(date: "{slot_date(0)}", doctorName: "Dr. {i % (LISTINGS // 2)}") {{ id time }}'
+        for i in range(LISTINGS)
+    ]
+    return "{ " + " ".join(lookups + listings) + " }"
+
+
+def measure(execute, store: CountingStore):
+    store.calls.clear()
+    execute()
+    calls = dict(store.calls)
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        execute()
+        timings.append(time.perf_counter() - started)
+    return calls, median(timings) * 1e3
+
+
+def main(rows: int, lookups: int):
+    service = seeded_service(rows)
+    store = service._backend = CountingStore(service._backend)
+    ids = [apt.id for apt in service.get_appointments(date_from=slot_date(0), date_to=slot_date(30))[::7][:lookups]]
+    query = document(ids)
+    queries.appointment_service = service
+    loaders.async_appointment_service = AsyncAppointmentService(service)
+
+    # Document caches as in the served schema, so parsing 46 aliases does not drown the difference
+    unbatched = strawberry.Schema(query=queries.Query, extensions=caching_extensions(None, service.versions))
+    batched = strawberry.Schema(query=AsyncQuery, extensions=caching_extensions(None, service.versions))
+
+    def run_unbatched():
+        result = unbatched.execute_sync(query)
+        assert not result.errors, result.errors
+
+    def run_batched():
+        result = asyncio.run(batched.execute(query, context_value={}))
+        assert not result.errors, result.errors
+
+    print(f"{rows} appointments, {len(ids)} aliased lookups (1 in {DUPLICATE_EVERY} repeated), {LISTINGS} aliased listings (half repeated)")
+    print(f"{'resolvers':<12} {'storage calls':<36} {'median (ms)':>12}")
+    for label, execute in (("one by one", run_unbatched), ("dataloaders", run_batched)):
+        calls, latency = measure(execute, store)
+        print(f"{label:<12} {', '.join(f'{name} x{count}' for name, count in sorted(calls.items())):<36} {latency:>12.2f}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS,
+        int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_LOOKUPS
+    )
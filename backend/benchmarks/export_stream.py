@@ -0,0 +1,86 @@
+"""
+Streaming export memory and throughput against a whole-list GraphQL fetch
+Run from backend/: python -m benchmarks.export_stream [rows...]
+"""
+
+import asyncio
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+import main as legacy
+from benchmarks.listing_allocations import LIST_ALL, seed_legacy
+
+DEFAULT_SIZES = [20_000, 100_000, 200_000]
+
+
+async def fetch(path: str, accept_encoding: str = "gzip") -> int:
+    """Drive the whole ASGI stack (middlewares included) and count the body bytes sent"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path.split("?")[0], "raw_path": path.encode(),
+        "query_string": path.partition("?")[2].encode(), "root_path": "",
+        "headers": [(b"host", b"bench"), (b"accept-encoding", accept_encoding.encode())],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    requested = False
+    disconnected = asyncio.Event()
+    sent = 0
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal sent
+        if message["type"] == "http.response.body":
+            sent += len(message.get("body", b""))
+
+    await legacy.app(scope, receive, send)
+    disconnected.set()
+    return sent
+
+
+def measured(fn):
+    """(result, peak traced MiB, seconds)"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak / 2**20, elapsed
+
+
+def graphql_list() -> int:
+    """What the browser export used to need: every row in one GraphQL response"""
+    result = legacy.schema.execute_sync(LIST_ALL)
+    return len(json.dumps({"data": result.data}).encode())
+
+
+def main(sizes):
+    print(f"{'rows':>8} {'path':<24} {'peak MiB':>9} {'seconds':>8} {'rows/s':>10} {'bytes out':>11}")
+    seeded = 0
+    for size in sorted(sizes):
+        seed_legacy(size - seeded, offset=seeded)
+        seeded = size
+        rows = len(legacy.appointments_db)
+        for label, fn in (
+            ("GraphQL full list", graphql_list),
+            ("export csv", lambda: asyncio.run(fetch("/export/appointments?format=csv", "identity"))),
+            ("export csv, gzip", lambda: asyncio.run(fetch("/export/appointments?format=csv"))),
+            ("export ndjson, gzip", lambda: asyncio.run(fetch("/export/appointments?format=ndjson"))),
+        ):
+            sent, peak, elapsed = measured(fn)
+            print(f"{rows:>8} {label:<24} {peak:>9.1f} {elapsed:>8.2f} {rows / elapsed:>10.0f} {sent:>11}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
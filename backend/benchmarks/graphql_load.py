@@ -0,0 +1,140 @@
+"""
+GraphQL load test: p50/p99 latency of sync versus async resolvers
+Run from backend/: python -m benchmarks.graphql_load [clients] [requests per client]
+(set APPOINTMENT_STORE / APPOINTMENT_DATA_DIR to load-test another storage setup;
+each run gets fresh SQLite and WAL files in a temporary directory)
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from statistics import quantiles
+
+HOST = "127.0.0.1"
+PORT = 8765
+DEFAULT_CLIENTS = 500
+DEFAULT_REQUESTS = 20
+WRITE_EVERY = 5  # one create per five requests
+
+PAGE_QUERY = """
+query Page($doctor: String) {
+  appointmentsConnection(first: 20, doctorName: $doctor) {
+    totalCount
+    edges { cursor node { id patientName date time status } }
+  }
+}
+"""
+
+CREATE_MUTATION = """
+mutation Create($input: CreateAppointmentInput!) {
+  createAppointment(input: $input) { id }
+}
+"""
+
+
+def payload(client: int, i: int) -> bytes:
+    if i % WRITE_EVERY:
+        body = {"query": PAGE_QUERY, "variables": {"doctor": "Dr. Sarah Johnson" if i % 2 else None}}
+    else:
+        # Every create lands in its own (doctor, date) shard
+        minutes = 8 * 60 + (i // WRITE_EVERY) * 30
+        body = {"query": CREATE_MUTATION, "variables": {"input": {
+            "patientName": f"Load Patient {client}",
+            "date": "2030-01-01",
+            "time": f"{minutes // 60:02d}:{minutes % 60:02d}",
+            "duration": 15,
+            "doctorName": f"Dr. Load {client}",
+            "mode": "Video",
+        }}}
+    data = json.dumps(body).encode()
+    return (
+        f"POST /graphql HTTP/1.1\r\nHost: {HOST}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(data)}\r\n\r\n"
+    ).encode() + data
+
+
+async def client(client_id: int, requests: int, latencies: list, failures: list):
+    """One keep-alive connection issuing requests back to back"""
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    try:
+        for i in range(requests):
+            request = payload(client_id, i)
+            started = time.perf_counter()
+            writer.write(request)
+            headers = await reader.readuntil(b"\r\n\r\n")
+            length = int(headers.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+            body = await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            if not headers.startswith(b"HTTP/1.1 200") or b'"errors"' in body:
+                failures.append(body)
+    finally:
+        writer.close()
+
+
+async def drive(clients: int, requests: int):
+    latencies, failures = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(client(c, requests, latencies, failures) for c in range(clients)))
+    return latencies, failures, time.perf_counter() - started
+
+
+def wait_until_healthy(timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://{HOST}:{PORT}/health", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("API server did not start")
+
+
+def run(mode: str, clients: int, requests: int):
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(
+            os.environ,
+            GRAPHQL_RESOLVERS=mode,
+            APPOINTMENT_SQLITE_PATH=os.path.join(directory, "load.db"),
+            # Every client shares one address, and so one rate-limit bucket
+            GRAPHQL_COST_PER_SECOND="0"
+        )
+        if os.getenv("APPOINTMENT_DATA_DIR"):
+            env["APPOINTMENT_DATA_DIR"] = os.path.join(directory, "wal")
+        return serve_and_drive(env, clients, requests)
+
+
+def serve_and_drive(env: dict, clients: int, requests: int):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--host", HOST, "--port", str(PORT),
+         "--log-level", "warning", "--backlog", str(clients * 2)],
+        env=env,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_healthy()
+        latencies, failures, elapsed = asyncio.run(drive(clients, requests))
+    finally:
+        server.terminate()
+        server.wait()
+    cuts = quantiles(latencies, n=100)
+    return cuts[49] * 1e3, cuts[98] * 1e3, len(latencies) / elapsed, len(failures)
+
+
+def main(clients: int, requests: int):
+    print(f"{clients} concurrent clients x {requests} requests ({100 // WRITE_EVERY}% createAppointment)")
+    print(f"{'mode':<6} {'p50 (ms)':>9} {'p99 (ms)':>9} {'req/s':>8} {'errors':>7}")
+    for mode in ("sync", "async"):
+        p50, p99, rate, errors = run(mode, clients, requests)
+        print(f"{mode:<6} {p50:>9.1f} {p99:>9.1f} {rate:>8.0f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CLIENTS,
+        int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_REQUESTS
+    )
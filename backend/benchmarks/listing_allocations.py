@@ -0,0 +1,86 @@
+"""
+Allocations and latency of listing every appointment, measured with tracemalloc
+Run from backend/: python -m benchmarks.listing_allocations [rows]
+(set APPOINTMENT_STORE to benchmark another storage backend)
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+import strawberry
+
+import graphql_schema.queries as queries
+import main as legacy
+from benchmarks.create_latency import seeded_service, slot_date
+
+DEFAULT_ROWS = 50_000
+
+LIST_ALL = "{ appointments { id patientName date time duration doctorName status mode } }"
+
+
+def allocations(fn):
+    """(blocks, bytes) still held by fn's result, and the peak bytes while it ran"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    del result
+    return blocks, size, peak - base
+
+
+def seconds(fn, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def seed_legacy(rows: int, offset: int = 0) -> None:
+    for i in range(offset, offset + rows):
+        minutes = 8 * 60 + (i // 200 % 24) * 30
+        apt = {
+            "id": str(100_000 + i),
+            "patientName": f"Patient {i}",
+            "date": slot_date(i // 200 // 24),
+            "time": f"{minutes // 60:02d}:{minutes % 60:02d}",
+            "duration": 15,
+            "doctorName": f"Dr. {i % 200}",
+            "status": "Scheduled",
+            "mode": "In-person",
+        }
+        legacy.append_appointment(apt)
+
+
+def report(label: str, rows: int, fn) -> None:
+    blocks, size, peak = allocations(fn)
+    print(f"{label:<34} {blocks / rows:>12.2f} {size / rows:>12.0f} {peak / 2**20:>10.1f} {seconds(fn) * 1e3:>9.1f}")
+
+
+def main(rows: int):
+    queries.appointment_service = seeded_service(rows)
+    seed_legacy(rows)
+    modular_schema = strawberry.Schema(query=queries.Query)
+    legacy_schema = strawberry.Schema(query=legacy.Query, config=legacy.schema.config)
+
+    print(f"{rows} appointments")
+    print(f"{'':<34} {'blocks/row':>12} {'bytes/row':>12} {'peak MiB':>10} {'best ms':>9}")
+    report("service resolver (list only)", rows, lambda: queries.Query().appointments())
+    report("service GraphQL execute", rows, lambda: modular_schema.execute_sync(LIST_ALL).data)
+    report("legacy resolver (list only)", rows, lambda: legacy.Query().appointments())
+    report("legacy GraphQL execute", rows, lambda: legacy_schema.execute_sync(LIST_ALL).data)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS)
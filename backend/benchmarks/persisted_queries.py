@@ -0,0 +1,95 @@
+"""
+Per-request parse / validation cost of the frontend's queries, and request size with persisted queries
+Run from backend/: python -m benchmarks.persisted_queries [rows]
+(documents are the manifest built from frontend/lib/graphql/operations.ts, as Apollo sends them)
+"""
+
+import json
+import sys
+import time
+from statistics import median
+from urllib.parse import urlencode
+
+import strawberry
+from strawberry.extensions import ParserCache, ValidationCache
+
+import graphql_schema.queries as queries
+from benchmarks.create_latency import slot_date, seeded_service
+from persisted_operations import DEFAULT_SOURCES, GQL_TEMPLATE
+from utils.persisted_queries import APQ_VERSION, OperationCache, OperationCacheExtension, build_manifest
+
+DEFAULT_ROWS = 10_000
+RUNS = 2000
+
+
+def frontend_operations() -> list:
+    documents = []
+    for source in DEFAULT_SOURCES:
+        with open(source, encoding="utf-8") as f:
+            documents.extend(GQL_TEMPLATE.findall(f.read()))
+    return [entry for entry in build_manifest(documents) if entry["query"].startswith("query")]
+
+
+def variables_for(name: str, appointment_id: str) -> dict:
+    return {
+        "GetAppointments": {"date": slot_date(0), "doctorName": "Dr. 1"},
+        "GetAppointmentsPage": {"first": 20, "date": slot_date(0)},
+        "GetAppointmentStats": {"today": slot_date(0), "tomorrow": slot_date(1)},
+        "GetAppointment": {"id": appointment_id},
+    }[name]
+
+
+def persisted(entry: dict) -> dict:
+    return {"persistedQuery": {"version": APQ_VERSION, "sha256Hash": entry["sha256"]}}
+
+
+def measure(execute) -> float:
+    """Median CPU time per request in microseconds, after a warm-up"""
+    execute()
+    timings = []
+    for _ in range(RUNS):
+        started = time.process_time_ns()
+        execute()
+        timings.append(time.process_time_ns() - started)
+    return median(timings) / 1e3
+
+
+def main(rows: int):
+    service = seeded_service(rows)
+    queries.appointment_service = service
+    appointment_id = service.get_appointments(date=slot_date(0))[0].id
+    operations = frontend_operations()
+    manifest_cache = OperationCache(manifest=operations)
+
+    schemas = {
+        "no caches": strawberry.Schema(query=queries.Query),
+        "parser+validation caches": strawberry.Schema(query=queries.Query, extensions=[ParserCache(), ValidationCache()]),
+        "compiled operations": strawberry.Schema(query=queries.Query, extensions=[OperationCacheExtension(OperationCache())]),
+        "persisted hash": strawberry.Schema(query=queries.Query, extensions=[OperationCacheExtension(manifest_cache)]),
+    }
+
+    print(f"{rows} appointments, median CPU per request over {RUNS} runs (us)")
+    print(f"{'operation':<22}" + "".join(f" {label:>25}" for label in schemas) + f" {'saved':>8}")
+    for entry in operations:
+        variables = variables_for(entry["name"], appointment_id)
+        timings = []
+        for label, schema in schemas.items():
+            query, extensions = (None, persisted(entry)) if label == "persisted hash" else (entry["query"], None)
+
+            def execute():
+                result = schema.execute_sync(query, variable_values=variables, operation_extensions=extensions)
+                assert not result.errors, result.errors
+            timings.append(measure(execute))
+        print(f"{entry['name']:<22}" + "".join(f" {timing:>25.0f}" for timing in timings) + f" {timings[0] - timings[-1]:>8.0f}")
+
+    print()
+    print(f"{'operation':<22} {'GET query string (bytes)':>25} {'hashed (bytes)':>15}")
+    for entry in operations:
+        variables = json.dumps(variables_for(entry["name"], appointment_id))
+        full = urlencode({"query": entry["query"], "operationName": entry["name"], "variables": variables})
+        hashed = urlencode({"operationName": entry["name"], "variables": variables, "extensions": json.dumps(persisted(entry))})
+        print(f"{entry['name']:<22} {len(full):>25} {len(hashed):>15}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS)
@@ -0,0 +1,160 @@
+"""
+Server p99 for ordinary clients while others send abusive GraphQL queries
+Run from backend/: python -m benchmarks.query_limits [rows] [clients] [abusers] [seconds]
+(the store is loaded through POST /import; the response cache is off so every query executes)
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from statistics import quantiles
+
+from benchmarks.bulk_import import DOCTORS, csv_file, history_date
+from benchmarks.graphql_load import HOST, PORT, wait_until_healthy
+
+DEFAULT_ROWS = 100_000
+DEFAULT_CLIENTS = 20
+DEFAULT_ABUSERS = 2
+DEFAULT_SECONDS = 15
+CLIENT_HEADER = "X-Client-Id"
+
+DAY_QUERY = """
+query Day($date: String, $doctor: String) {
+  appointments(date: $date, doctorName: $doctor) { id patientName time duration status }
+}
+"""
+
+# Every row in the store, 8 fields each
+UNFILTERED_QUERY = """
+{ appointments { id patientName date time duration doctorName status mode } }
+"""
+
+# Ten full pages in one document
+ALIASED_QUERY = "{ " + " ".join(
+    f"p{i}: appointmentsConnection(first: 100, after: null) {{ edges {{ node {{ id patientName date time doctorName }} }} }}"
+    for i in range(10)
+) + " }"
+
+LIMITS_OFF = {
+    "GRAPHQL_MAX_COST": "0",
+    "GRAPHQL_MAX_DEPTH": "0",
+    "GRAPHQL_MAX_ALIASES": "0",
+    "GRAPHQL_COST_PER_SECOND": "0",
+}
+
+
+def request(client_id: str, query: str, variables: dict = None) -> bytes:
+    data = json.dumps({"query": query, "variables": variables}).encode()
+    return (
+        f"POST /graphql HTTP/1.1\r\nHost: {HOST}\r\nContent-Type: application/json\r\n"
+        f"{CLIENT_HEADER}: {client_id}\r\nContent-Length: {len(data)}\r\n\r\n"
+    ).encode() + data
+
+
+async def exchange(reader, writer, payload: bytes):
+    writer.write(payload)
+    headers = await reader.readuntil(b"\r\n\r\n")
+    length = int(headers.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+    body = await reader.readexactly(length)
+    return headers, body
+
+
+async def ordinary(client: int, rows: int, deadline: float, latencies: list, failures: list):
+    """One doctor's day after another, back to back"""
+    days = max(rows // DOCTORS // 24, 1)
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    i = 0
+    try:
+        while time.monotonic() < deadline:
+            variables = {"date": history_date(i % days), "doctor": f"Dr. {(client * 7 + i) % DOCTORS}"}
+            started = time.perf_counter()
+            headers, body = await exchange(reader, writer, request(f"client-{client}", DAY_QUERY, variables))
+            latencies.append(time.perf_counter() - started)
+            if not headers.startswith(b"HTTP/1.1 200") or b'"errors"' in body:
+                failures.append(body)
+            i += 1
+    finally:
+        writer.close()
+
+
+async def abusive(abuser: int, deadline: float, outcomes: dict):
+    """Unfiltered listings and aliased pages, retried at once whatever the answer"""
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    i = 0
+    try:
+        while time.monotonic() < deadline:
+            query = UNFILTERED_QUERY if i % 2 == 0 else ALIASED_QUERY
+            headers, body = await exchange(reader, writer, request(f"abuser-{abuser}", query))
+            if headers.startswith(b"HTTP/1.1 429"):
+                outcomes["throttled"] += 1
+            elif b'"errors"' in body:
+                outcomes["rejected"] += 1
+            else:
+                outcomes["served"] += 1
+            i += 1
+    finally:
+        writer.close()
+
+
+async def drive(rows: int, clients: int, abusers: int, seconds: float):
+    latencies, failures = [], []
+    outcomes = dict.fromkeys(("served", "rejected", "throttled"), 0)
+    deadline = time.monotonic() + seconds
+    await asyncio.gather(
+        *(ordinary(c, rows, deadline, latencies, failures) for c in range(clients)),
+        *(abusive(a, deadline, outcomes) for a in range(abusers))
+    )
+    return latencies, failures, outcomes
+
+
+def load(rows: int):
+    body = csv_file(rows).getvalue().encode()
+    post = urllib.request.Request(f"http://{HOST}:{PORT}/import?format=csv", data=body, method="POST")
+    with urllib.request.urlopen(post, timeout=600) as response:
+        return json.load(response)
+
+
+def run(limits: bool, rows: int, clients: int, abusers: int, seconds: float):
+    env = dict(
+        os.environ,
+        RESPONSE_CACHE_TTL="0",
+        IMPORT_WORKERS="1",
+        GRAPHQL_CLIENT_HEADER=CLIENT_HEADER,
+        **({} if limits else LIMITS_OFF)
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--host", HOST, "--port", str(PORT), "--log-level", "warning"],
+        env=env,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_healthy()
+        load(rows)
+        latencies, failures, outcomes = asyncio.run(drive(rows, clients, abusers, seconds))
+    finally:
+        server.terminate()
+        server.wait()
+    cuts = quantiles(latencies, n=100)
+    return cuts[49] * 1e3, cuts[98] * 1e3, len(latencies) / seconds, len(failures), outcomes
+
+
+def main(rows: int, clients: int, abusers: int, seconds: float):
+    print(f"{rows} appointments, {clients} clients listing one doctor's day, {abusers} abusive clients, {seconds:.0f}s")
+    print(f"{'limits':<7} {'p50 (ms)':>9} {'p99 (ms)':>9} {'req/s':>8} {'errors':>7}   abusive requests")
+    for limits in (False, True):
+        p50, p99, rate, errors, outcomes = run(limits, rows, clients, abusers, seconds)
+        abuse = ", ".join(f"{count} {outcome}" for outcome, count in outcomes.items())
+        print(f"{'on' if limits else 'off':<7} {p50:>9.1f} {p99:>9.1f} {rate:>8.0f} {errors:>7}   {abuse}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS,
+        int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_CLIENTS,
+        int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_ABUSERS,
+        float(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_SECONDS
+    )
@@ -0,0 +1,60 @@
+"""
+Listing benchmark: full scan versus secondary indexes
+Run from backend/: python -m benchmarks.query_planner [sizes...]
+(set APPOINTMENT_STORE to benchmark another storage backend)
+"""
+
+import sys
+import time
+
+from benchmarks.create_latency import seeded_service, slot_date
+
+DEFAULT_SIZES = [10**4, 10**5, 10**6]
+REPEATS = 20
+
+FILTERS = [
+    ("date", {"date": slot_date(3)}),
+    ("doctor", {"doctor_name": "Dr. 7"}),
+    ("status", {"status": "Cancelled"}),
+    ("date+doctor", {"date": slot_date(3), "doctor_name": "Dr. 7"}),
+    ("date+status", {"date": slot_date(3), "status": "Scheduled"}),
+    ("all three", {"date": slot_date(3), "status": "Scheduled", "doctor_name": "Dr. 7"}),
+]
+
+
+def scan(appointments, date=None, status=None, doctor_name=None):
+    """The pre-index get_appointments implementation"""
+    result = list(appointments.values())
+    if date:
+        result = [apt for apt in result if apt.date == date]
+    if status:
+        result = [apt for apt in result if apt.status == status]
+    if doctor_name:
+        result = [apt for apt in result if apt.doctor_name == doctor_name]
+    result.sort(key=lambda x: (x.date, x.time))
+    return result
+
+
+def timed(fn, **filters) -> float:
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(**filters)
+    return (time.perf_counter() - started) / REPEATS * 1e3
+
+
+def main(sizes):
+    print(f"{'rows':>9} {'filter':<12} {'scan (ms)':>10} {'index (ms)':>11} {'speedup':>8}")
+    for size in sizes:
+        service = seeded_service(size)
+        # A sprinkling of cancellations so the status filter is selective
+        for apt in list(service._backend)[::97]:
+            service.update_appointment_status(apt.id, "Cancelled")
+        appointments = {apt.id: apt for apt in service._backend}
+        for label, filters in FILTERS:
+            scan_ms = timed(lambda **f: scan(appointments, **f), **filters)
+            index_ms = timed(service.get_appointments, **filters)
+            print(f"{size:>9} {label:<12} {scan_ms:>10.3f} {index_ms:>11.3f} {scan_ms / index_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,87 @@
+"""
+Booking weekly follow-ups as one series against one createAppointment per visit
+Run from backend/: python -m benchmarks.recurring_series [rows] [patients] [weeks]
+(each patient sees their own doctor at 07:00 every week; the store is pre-filled around them)
+"""
+
+from datetime import date as Date, timedelta
+import sys
+import time
+from statistics import median
+
+from benchmarks.create_latency import seeded_service
+from benchmarks.dataloader_batching import CountingStore
+from models.appointment import AppointmentCreate
+from models.series import SeriesCreate
+
+DEFAULT_ROWS = 100_000
+DEFAULT_PATIENTS = 200
+DEFAULT_WEEKS = 26
+FIRST_DATE = Date(2020, 1, 6)
+LISTINGS = 500
+
+
+class ScheduleCountingStore(CountingStore):
+    """Counts schedule checks and index scans instead of reads by id"""
+
+    READS = ("has_conflict", "insert_if_free", "query")
+
+
+def visit(patient: int) -> dict:
+    return {
+        "patient_name": f"Follow-up {patient}",
+        "time": "07:00",
+        "duration": 30,
+        "doctor_name": f"Dr. {patient}",
+        "mode": "In-person",
+    }
+
+
+def book_one_by_one(service, patients: int, weeks: int):
+    for patient in range(patients):
+        for week in range(weeks):
+            date = (FIRST_DATE + timedelta(weeks=week)).isoformat()
+            service.create_appointment(AppointmentCreate(date=date, **visit(patient)))
+
+
+def book_series(service, patients: int, weeks: int):
+    for patient in range(patients):
+        service.create_series(SeriesCreate(date=FIRST_DATE.isoformat(), frequency="Weekly", count=weeks, **visit(patient)))
+
+
+def list_weeks(service, weeks: int) -> float:
+    """Median latency of one doctor's week, in ms"""
+    timings = []
+    for i in range(LISTINGS):
+        first = FIRST_DATE + timedelta(weeks=i % weeks)
+        started = time.perf_counter()
+        service.get_appointments(
+            doctor_name=f"Dr. {i % 7}", date_from=first.isoformat(), date_to=(first + timedelta(days=6)).isoformat()
+        )
+        timings.append(time.perf_counter() - started)
+    return median(timings) * 1e3
+
+
+def main(rows: int, patients: int, weeks: int):
+    print(f"{rows} appointments stored, {patients} patients booking {weeks} weekly visits each")
+    print(f"{'booked as':<12} {'seconds':>8} {'rows added':>11} {'series':>7}   {'storage calls':<44} {'week listing (ms)':>18}")
+    for label, book in (("appointments", book_one_by_one), ("series", book_series)):
+        service = seeded_service(rows)
+        store = service._backend = ScheduleCountingStore(service._backend)
+        stored = len(store)
+        started = time.perf_counter()
+        book(service, patients, weeks)
+        seconds = time.perf_counter() - started
+        calls = ", ".join(f"{name} x{count}" for name, count in sorted(store.calls.items()))
+        print(
+            f"{label:<12} {seconds:>8.2f} {len(store) - stored:>11} {service.storage_stats()['indexes']['series']:>7}"
+            f"   {calls:<44} {list_weeks(service, weeks):>18.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS,
+        int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PATIENTS,
+        int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_WEEKS
+    )
@@ -0,0 +1,162 @@
+"""
+Read throughput of snapshot replica workers against the writer serving reads itself
+Run from backend/: python -m benchmarks.replica_reads [rows] [clients] [seconds] [workers...]
+(reads are one doctor's day and lookups by id; a background client books an appointment every 50 ms)
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from statistics import quantiles
+
+from benchmarks.bulk_import import DOCTORS, history_date
+from benchmarks.graphql_load import HOST, PORT, wait_until_healthy
+from benchmarks.query_limits import LIMITS_OFF, exchange, load
+
+DEFAULT_ROWS = 100_000
+DEFAULT_CLIENTS = 32
+DEFAULT_SECONDS = 10
+DEFAULT_WORKERS = (1, 2, 4)
+REPLICA_PORT = PORT + 1
+WRITE_INTERVAL = 0.05
+
+DAY_QUERY = """
+query Day($date: String, $doctor: String) {
+  appointments(date: $date, doctorName: $doctor) { id patientName time duration status }
+}
+"""
+LOOKUP_QUERY = "query One($id: String!) { appointment(id: $id) { id patientName date time doctorName } }"
+BOOK_MUTATION = """
+mutation Book($date: String!) {
+  createAppointment(input: {patientName: "Load Test", date: $date, time: "07:00", duration: 15, doctorName: "Dr. Writer", mode: "Video"}) { id }
+}
+"""
+
+
+def request(port: int, query: str, variables: dict) -> bytes:
+    data = json.dumps({"query": query, "variables": variables}).encode()
+    return (
+        f"POST /graphql HTTP/1.1\r\nHost: {HOST}:{port}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(data)}\r\n\r\n"
+    ).encode() + data
+
+
+def sample_ids(count: int) -> list:
+    body = json.dumps({"query": f"{{ appointmentsConnection(first: {count}) {{ edges {{ node {{ id }} }} }} }}"}).encode()
+    post = urllib.request.Request(
+        f"http://{HOST}:{PORT}/graphql", data=body, headers={"Content-Type": "application/json"}, method="POST"
+    )
+    with urllib.request.urlopen(post) as response:
+        return [edge["node"]["id"] for edge in json.load(response)["data"]["appointmentsConnection"]["edges"]]
+
+
+async def reader(client: int, port: int, rows: int, ids: list, deadline: float, results: dict):
+    """Alternates day listings and lookups by id on one keep-alive connection"""
+    days = max(rows // DOCTORS // 24, 1)
+    connection = await asyncio.open_connection(HOST, port)
+    i = 0
+    try:
+        while time.monotonic() < deadline:
+            if i % 2:
+                payload = request(port, LOOKUP_QUERY, {"id": ids[(client * 31 + i) % len(ids)]})
+            else:
+                payload = request(port, DAY_QUERY, {"date": history_date(i % days), "doctor": f"Dr. {(client * 7 + i) % DOCTORS}"})
+            started = time.perf_counter()
+            headers, body = await exchange(*connection, payload)
+            results["latencies"].append(time.perf_counter() - started)
+            if not headers.startswith(b"HTTP/1.1 200") or b'"errors"' in body:
+                results["failures"] += 1
+            else:
+                replica = json.loads(body).get("extensions", {}).get("replica")
+                if replica:
+                    results["staleness_ms"] = max(results["staleness_ms"], replica["stalenessMs"])
+            i += 1
+    finally:
+        connection[1].close()
+
+
+async def booker(deadline: float):
+    """Keeps the writer publishing: one booking every WRITE_INTERVAL on a distinct day"""
+    connection = await asyncio.open_connection(HOST, PORT)
+    day = 0
+    try:
+        while time.monotonic() < deadline:
+            await exchange(*connection, request(PORT, BOOK_MUTATION, {"date": history_date(day)}))
+            day += 1
+            await asyncio.sleep(WRITE_INTERVAL)
+    finally:
+        connection[1].close()
+
+
+async def drive(port: int, rows: int, ids: list, clients: int, seconds: float) -> dict:
+    results = {"latencies": [], "failures": 0, "staleness_ms": 0.0}
+    deadline = time.monotonic() + seconds
+    await asyncio.gather(booker(deadline), *(reader(c, port, rows, ids, deadline, results) for c in range(clients)))
+    return results
+
+
+def wait_for_replica(timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://{HOST}:{REPLICA_PORT}/health", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Replica did not start")
+
+
+def serve(app: str, port: int, env: dict, workers: int = 1) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", HOST, "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+        stderr=subprocess.DEVNULL
+    )
+
+
+def report(label: str, results: dict, seconds: float):
+    cuts = quantiles(results["latencies"], n=100)
+    print(
+        f"{label:<16} {len(results['latencies']) / seconds:>8.0f} {cuts[49] * 1e3:>9.1f} {cuts[98] * 1e3:>9.1f}"
+        f" {results['failures']:>7} {results['staleness_ms']:>15.0f}"
+    )
+
+
+def main(rows: int, clients: int, seconds: float, workers: tuple):
+    print(f"{rows} appointments, {clients} read clients, {seconds:.0f}s per run, {os.cpu_count()} CPUs")
+    print(f"{'served by':<16} {'req/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'errors':>7} {'max stale (ms)':>15}")
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, RESPONSE_CACHE_TTL="0", IMPORT_WORKERS="1", APPOINTMENT_SNAPSHOT_DIR=directory, **LIMITS_OFF)
+        writer = serve("api.main:app", PORT, env)
+        try:
+            wait_until_healthy()
+            load(rows)
+            ids = sample_ids(100)
+            report("writer", asyncio.run(drive(PORT, rows, ids, clients, seconds)), seconds)
+            for count in workers:
+                replica = serve("api.replica:app", REPLICA_PORT, env, count)
+                try:
+                    wait_for_replica()
+                    results = asyncio.run(drive(REPLICA_PORT, rows, ids, clients, seconds))
+                finally:
+                    replica.terminate()
+                    replica.wait()
+                report(f"replica x{count}", results, seconds)
+        finally:
+            writer.terminate()
+            writer.wait()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS,
+        int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_CLIENTS,
+        float(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_SECONDS,
+        tuple(int(n) for n in sys.argv[4:]) or DEFAULT_WORKERS
+    )
@@ -0,0 +1,133 @@
+"""
+Dashboard query latency with and without the versioned response cache
+Run from backend/: python -m benchmarks.response_cache
+"""
+
+import logging
+import random
+import time
+from statistics import median
+
+import strawberry
+
+import main as legacy
+from utils.response_cache import ResponseCache, caching_extensions
+
+DOCTORS = 20
+DAYS = 10
+PER_DOCTOR_DAY = 10
+REQUESTS = 2000
+WRITE_RATIO = 0.02  # share of requests that book an appointment
+
+GET_APPOINTMENTS = """
+query GetAppointments($date: String, $status: String, $doctorName: String) {
+  appointments(date: $date, status: $status, doctorName: $doctorName) {
+    id patientName date time duration doctorName status mode
+  }
+}
+"""
+
+CREATE = """
+mutation Create($input: AppointmentInput!) {
+  createAppointment(input: $input) { id }
+}
+"""
+
+DELETE = """
+mutation Delete($id: String!) {
+  deleteAppointment(id: $id) { success }
+}
+"""
+
+
+def day(offset: int) -> str:
+    return f"2030-01-{offset + 1:02d}"
+
+
+def booking(doctor: int, offset: int, slot: int) -> dict:
+    minutes = 8 * 60 + slot * 30
+    return {
+        "patientName": "Bench Patient", "date": day(offset), "time": f"{minutes // 60:02d}:{minutes % 60:02d}",
+        "duration": 15, "doctorName": f"Dr. {doctor}", "status": "Scheduled", "mode": "Video",
+    }
+
+
+def seed():
+    for doctor in range(DOCTORS):
+        for offset in range(DAYS):
+            for slot in range(PER_DOCTOR_DAY):
+                result = legacy.schema.execute_sync(CREATE, variable_values={"input": booking(doctor, offset, slot)})
+                assert not result.errors, result.errors
+
+
+def dashboard_variables(rng: random.Random) -> dict:
+    """Clinic dashboards: a day's list, one doctor's day, or everything"""
+    shape = rng.random()
+    if shape < 0.5:
+        return {"date": day(rng.randrange(DAYS))}
+    if shape < 0.9:
+        return {"date": day(rng.randrange(DAYS)), "doctorName": f"Dr. {rng.randrange(DOCTORS)}"}
+    return {}
+
+
+def run(schema, write_ratio: float):
+    rng = random.Random(1)
+    latencies = []
+    booked = []
+    for _ in range(REQUESTS):
+        if rng.random() < write_ratio:
+            # Evening slots; a booking that conflicts is rejected and bumps nothing
+            slot = rng.randrange(PER_DOCTOR_DAY, 24)
+            result = schema.execute_sync(CREATE, variable_values={"input": booking(rng.randrange(DOCTORS), rng.randrange(DAYS), slot)})
+            if result.data:
+                booked.append(result.data["createAppointment"]["id"])
+            continue
+        variables = dashboard_variables(rng)
+        started = time.perf_counter()
+        result = schema.execute_sync(GET_APPOINTMENTS, variable_values=variables)
+        latencies.append(time.perf_counter() - started)
+        assert not result.errors, result.errors
+    # Leave the table as seeded so every run replays the same stream
+    for appointment_id in booked:
+        schema.execute_sync(DELETE, variable_values={"id": appointment_id})
+    return median(latencies) * 1e3, sum(latencies) / len(latencies) * 1e3
+
+
+def main():
+    logging.getLogger("strawberry.execution").setLevel(logging.CRITICAL)  # expected conflict errors
+    seed()
+    uncached = strawberry.Schema(query=legacy.Query, mutation=legacy.Mutation, config=legacy.schema.config)
+    documents_only = strawberry.Schema(
+        query=legacy.Query,
+        mutation=legacy.Mutation,
+        extensions=caching_extensions(None, legacy.appointments_versions),
+        config=legacy.schema.config
+    )
+    cache = ResponseCache()
+    cached = strawberry.Schema(
+        query=legacy.Query,
+        mutation=legacy.Mutation,
+        extensions=caching_extensions(cache, legacy.appointments_versions),
+        config=legacy.schema.config
+    )
+
+    print(f"{len(legacy.appointments_db)} appointments, {REQUESTS} GetAppointments requests")
+    print(f"{'':<28} {'median ms':>10} {'mean ms':>10}")
+    for label, schema, write_ratio in (
+        ("no cache, read only", uncached, 0.0),
+        ("documents only, read only", documents_only, 0.0),
+        ("responses, read only", cached, 0.0),
+        (f"no cache, {WRITE_RATIO:.0%} writes", uncached, WRITE_RATIO),
+        (f"documents only, {WRITE_RATIO:.0%} writes", documents_only, WRITE_RATIO),
+        (f"responses, {WRITE_RATIO:.0%} writes", cached, WRITE_RATIO),
+    ):
+        # Identical request streams per row: start each run from a cold cache
+        cache.clear()
+        p50, mean = run(schema, write_ratio)
+        print(f"{label:<28} {p50:>10.3f} {mean:>10.3f}")
+    stats = cache.stats()
+    print(f"cache: hits {stats['hits']} misses {stats['misses']} stale {stats['stale']} evictions {stats['evictions']}")
+
+
+if __name__ == "__main__":
+    main()
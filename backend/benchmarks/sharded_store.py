@@ -0,0 +1,40 @@
+"""
+GraphQL throughput with the store sharded across 1/2/4/8 processes
+Run from backend/: python -m benchmarks.sharded_store [clients] [requests per client]
+(same traffic as benchmarks.graphql_load; shards 0 is the in-process memory store)
+
+Scaling is unverified. The only recorded run was on a 1-CPU machine,
+where every sharded setting was slower than the unsharded store, so it
+measured routing cost alone:
+
+    shards   0    1    2    4    8
+    req/s  470  371  413  379  313
+
+Whether shards beat the in-process store needs a run with at least as
+many CPUs as shards plus the app process.
+"""
+
+import os
+import sys
+
+from benchmarks.graphql_load import WRITE_EVERY, serve_and_drive
+
+DEFAULT_CLIENTS = 100
+DEFAULT_REQUESTS = 20
+SHARD_COUNTS = (0, 1, 2, 4, 8)
+
+
+def main(clients: int, requests: int):
+    print(f"{clients} concurrent clients x {requests} requests ({100 // WRITE_EVERY}% createAppointment), {os.cpu_count()} CPU(s)")
+    print(f"{'shards':<7} {'p50 (ms)':>9} {'p99 (ms)':>9} {'req/s':>8} {'errors':>7}")
+    for shards in SHARD_COUNTS:
+        env = dict(os.environ, APPOINTMENT_SHARDS=str(shards), GRAPHQL_COST_PER_SECOND="0")
+        p50, p99, rate, errors = serve_and_drive(env, clients, requests)
+        print(f"{shards:<7} {p50:>9.1f} {p99:>9.1f} {rate:>8.0f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CLIENTS,
+        int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_REQUESTS
+    )
@@ -0,0 +1,84 @@
+"""
+Memory and throughput comparison of the storage backends
+Run from backend/: python -m benchmarks.storage_footprint [sizes...]
+"""
+
+import sys
+import time
+import tracemalloc
+import uuid
+
+from appointment_service import STORE_BACKENDS
+from benchmarks.create_latency import DOCTORS, SLOTS_PER_DAY, bench_store, slot_date
+from models.appointment import Appointment
+
+DEFAULT_SIZES = [10**4, 10**5, 10**6]
+QUERY_REPEATS = 200
+
+
+def appointments(size: int):
+    """Generate validated appointments the way the API would store them"""
+    for i in range(size):
+        doctor, rest = i % DOCTORS, i // DOCTORS
+        day, slot = divmod(rest, SLOTS_PER_DAY)
+        minutes = 8 * 60 + slot * 30
+        yield Appointment(
+            id=str(uuid.UUID(int=i + 1)),
+            patient_name=f"Patient {i % 50000}",
+            date=slot_date(day),
+            time=f"{minutes // 60:02d}:{minutes % 60:02d}",
+            duration=30,
+            doctor_name=f"Dr. {doctor}",
+            status="Completed" if i % 3 else "Scheduled",
+            mode="Video",
+            created_at="2024-06-01T10:15:30.123456",
+        )
+
+
+def footprint_mb(backend: str, size: int) -> float:
+    """Python heap retained by a loaded store (SQLite keeps rows on disk)"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    store = bench_store(backend)
+    for appointment in appointments(size):
+        store.put(appointment)
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del store
+    return retained / 2**20
+
+
+def throughput(backend: str, size: int):
+    """Insert rate, a 50-row filtered page, and an unfiltered count"""
+    rows = list(appointments(size))
+    store = bench_store(backend)
+    started = time.perf_counter()
+    for appointment in rows:
+        store.put(appointment)
+    insert_rate = size / (time.perf_counter() - started)
+    del rows
+
+    started = time.perf_counter()
+    for i in range(QUERY_REPEATS):
+        store.query(doctor_name=f"Dr. {i % DOCTORS}", status="Scheduled", limit=50)
+    page_us = (time.perf_counter() - started) / QUERY_REPEATS * 1e6
+
+    started = time.perf_counter()
+    for _ in range(QUERY_REPEATS):
+        store.count(status="Completed", date_from=slot_date(1))
+    count_us = (time.perf_counter() - started) / QUERY_REPEATS * 1e6
+    return insert_rate, page_us, count_us
+
+
+def main(sizes):
+    print(f"{'rows':>9} {'backend':<9} {'memory (MB)':>12} {'bytes/row':>10} {'inserts/s':>10} {'page (us)':>10} {'count (us)':>11}")
+    for size in sizes:
+        for backend in STORE_BACKENDS:
+            memory = footprint_mb(backend, size)
+            insert_rate, page_us, count_us = throughput(backend, size)
+            print(f"{size:>9} {backend:<9} {memory:>12.1f} {memory * 2**20 / size:>10.0f} "
+                  f"{insert_rate:>10.0f} {page_us:>10.1f} {count_us:>11.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
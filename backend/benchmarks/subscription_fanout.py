@@ -0,0 +1,77 @@
+"""
+Change-feed fan-out: thousands of dashboards watching bursts of writes
+Run from backend/: python -m benchmarks.subscription_fanout [subscribers]
+"""
+
+import asyncio
+import sys
+import time
+
+from utils.change_feed import CREATED, UPDATED, ChangeFeed
+
+DEFAULT_SUBSCRIBERS = 5000
+DOCTORS = 50
+DATE = "2030-01-01"
+BURST_APPOINTMENTS = 200
+UPDATES_PER_APPOINTMENT = 3
+PUBLISHES_IDLE = 200_000
+
+
+def idle_publish_ns() -> float:
+    """Cost a write pays for the feed when nobody is subscribed"""
+    feed = ChangeFeed()
+    started = time.perf_counter()
+    for i in range(PUBLISHES_IDLE):
+        feed.publish(CREATED, str(i), "Dr. 0", DATE)
+    return (time.perf_counter() - started) / PUBLISHES_IDLE * 1e9
+
+
+async def fanout(subscribers: int):
+    feed = ChangeFeed()
+    received = [0] * subscribers
+    delivered = asyncio.Event()
+    # One dashboard in ten watches the whole day, the rest watch one doctor
+    topics = [(None, DATE) if i % 10 == 0 else (f"Dr. {i % DOCTORS}", DATE) for i in range(subscribers)]
+    expected = sum(BURST_APPOINTMENTS if doctor is None else BURST_APPOINTMENTS // DOCTORS for doctor, _ in topics)
+    remaining = [expected]
+
+    async def dashboard(index: int, doctor_name, date):
+        async for _ in feed.subscribe(doctor_name, date):
+            received[index] += 1
+            remaining[0] -= 1
+            if not remaining[0]:
+                delivered.set()
+
+    tasks = [asyncio.create_task(dashboard(i, *topic)) for i, topic in enumerate(topics)]
+    await asyncio.sleep(0)
+
+    # Each appointment is created then updated a few times within one coalescing window
+    started = time.perf_counter()
+    for i in range(BURST_APPOINTMENTS):
+        doctor = f"Dr. {i % DOCTORS}"
+        feed.publish(CREATED, str(i), doctor, DATE, {"status": "Scheduled"})
+        for _ in range(UPDATES_PER_APPOINTMENT):
+            feed.publish(UPDATED, str(i), doctor, DATE, {"status": "Confirmed"})
+    published = time.perf_counter() - started
+    await delivered.wait()
+    elapsed = time.perf_counter() - started
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    writes = BURST_APPOINTMENTS * (1 + UPDATES_PER_APPOINTMENT)
+    return writes, published, elapsed, sum(received), feed.dropped_subscribers
+
+
+def main(subscribers: int):
+    print(f"publish with no subscribers: {idle_publish_ns():.0f} ns")
+    writes, published, elapsed, deltas, dropped = asyncio.run(fanout(subscribers))
+    print(f"{subscribers} subscribers, burst of {writes} writes to {BURST_APPOINTMENTS} appointments")
+    print(f"  publish total        {published * 1e3:8.2f} ms")
+    print(f"  all delivered after  {elapsed * 1e3:8.2f} ms (includes the coalescing window)")
+    print(f"  deltas delivered     {deltas:8d} (uncoalesced would be {deltas * (1 + UPDATES_PER_APPOINTMENT)})")
+    print(f"  dropped subscribers  {dropped:8d}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SUBSCRIBERS)
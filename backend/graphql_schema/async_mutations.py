@@ -0,0 +1,128 @@
+"""
+Async GraphQL Mutation resolvers
+Same fields as mutations.Mutation, served by AsyncAppointmentService
+"""
+
+import strawberry
+from typing import List, Optional
+from graphql_schema.types import (
+    Appointment as AppointmentType,
+    AppointmentSeries as AppointmentSeriesType,
+    BatchCreateResult,
+    BatchItemError,
+    CreateAppointmentInput,
+    CreateAppointmentSeriesInput,
+    DeleteResult,
+)
+from async_appointment_service import async_appointment_service
+from models.appointment import AppointmentCreate
+from models.series import SeriesCreate
+
+
+@strawberry.type(name="Mutation")
+class AsyncMutation:
+    """Root Mutation type with async resolvers"""
+    
+    @strawberry.mutation
+    async def create_appointment(self, input: CreateAppointmentInput) -> AppointmentType:
+        """Create new appointment"""
+        try:
+            # Convert GraphQL input to Pydantic model
+            appointment_data = AppointmentCreate(
+                patient_name=input.patient_name,
+                date=input.date,
+                time=input.time,
+                duration=input.duration,
+                doctor_name=input.doctor_name,
+                mode=input.mode,
+                status=input.status
+            )
+            
+            # Create appointment
+            return await async_appointment_service.create_appointment(appointment_data)
+        except ValueError as e:
+            raise Exception(str(e))
+    
+    @strawberry.mutation
+    async def create_appointments(self, inputs: List[CreateAppointmentInput]) -> BatchCreateResult:
+        """Create many appointments at once; nothing is saved if any item fails"""
+        created, errors = await async_appointment_service.create_many([
+            {
+                "patient_name": input.patient_name,
+                "date": input.date,
+                "time": input.time,
+                "duration": input.duration,
+                "doctor_name": input.doctor_name,
+                "mode": input.mode,
+                "status": input.status,
+            }
+            for input in inputs
+        ])
+        
+        return BatchCreateResult(
+            success=not errors,
+            created=created,
+            errors=[BatchItemError(index=index, message=message) for index, message in errors.items()]
+        )
+    
+    @strawberry.mutation
+    async def update_appointment_status(self, id: str, status: str) -> Optional[AppointmentType]:
+        """Update appointment status"""
+        try:
+            return await async_appointment_service.update_appointment_status(id, status)
+        except ValueError as e:
+            raise Exception(str(e))
+    
+    @strawberry.mutation
+    async def delete_appointment(self, id: str) -> DeleteResult:
+        """Delete appointment"""
+        success = await async_appointment_service.delete_appointment(id)
+        
+        if success:
+            return DeleteResult(
+                success=True,
+                message=f"Appointment {id} deleted successfully"
+            )
+        else:
+            return DeleteResult(
+                success=False,
+                message=f"Appointment {id} not found"
+            )
+    
+    @strawberry.mutation
+    async def create_appointment_series(self, input: CreateAppointmentSeriesInput) -> AppointmentSeriesType:
+        """Create a recurring series; its occurrences appear in listings without being stored one by one"""
+        try:
+            series_data = SeriesCreate(
+                patient_name=input.patient_name,
+                date=input.date,
+                time=input.time,
+                duration=input.duration,
+                doctor_name=input.doctor_name,
+                mode=input.mode,
+                frequency=input.frequency,
+                count=input.count,
+                until=input.until,
+                exceptions=input.exceptions or [],
+                status=input.status
+            )
+            
+            return await async_appointment_service.create_series(series_data)
+        except ValueError as e:
+            raise Exception(str(e))
+    
+    @strawberry.mutation
+    async def delete_appointment_series(self, id: str) -> DeleteResult:
+        """Delete a recurring series; occurrences whose status was changed stay booked"""
+        success = await async_appointment_service.delete_series(id)
+        
+        if success:
+            return DeleteResult(
+                success=True,
+                message=f"Appointment series {id} deleted successfully"
+            )
+        else:
+            return DeleteResult(
+                success=False,
+                message=f"Appointment series {id} not found"
+            )
@@ -0,0 +1,140 @@
+"""
+Async GraphQL Query resolvers
+Same fields as queries.Query, served by AsyncAppointmentService
+"""
+
+import strawberry
+from strawberry.types import Info
+from typing import List, Optional
+from graphql_schema.types import (
+    Appointment as AppointmentType,
+    AppointmentConnection,
+    AppointmentEdge,
+    AppointmentSeries as AppointmentSeriesType,
+    AppointmentStats,
+    AvailableSlot,
+    ModeCount,
+    PageInfo,
+    StatusCount,
+)
+from async_appointment_service import async_appointment_service
+from graphql_schema.loaders import request_loaders
+from utils.availability import minutes_to_time
+from utils.cursor import MAX_PAGE_SIZE, decode_cursor, encode_cursor
+
+
+@strawberry.type(name="Query")
+class AsyncQuery:
+    """Root Query type with async resolvers"""
+    
+    @strawberry.field
+    async def appointments(
+        self,
+        info: Info,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> List[AppointmentType]:
+        """Get all appointments with optional filters"""
+        # Aliased listings of one document share a batch; repeated filters are fetched once
+        appointments = await request_loaders(info.context).listing.load((date, status, doctor_name, date_from, date_to))
+        
+        # Storage records resolve as AppointmentType without being copied
+        return appointments
+    
+    @strawberry.field
+    async def appointments_connection(
+        self,
+        first: int = 20,
+        after: Optional[str] = None,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> AppointmentConnection:
+        """Get one page of appointments ordered by (date, time)"""
+        if first < 0:
+            raise Exception("first must be non-negative")
+        try:
+            after_key = decode_cursor(after) if after else None
+        except ValueError as e:
+            raise Exception(str(e))
+        
+        filters = dict(date=date, status=status, doctor_name=doctor_name, date_from=date_from, date_to=date_to)
+        page, has_next_page = await async_appointment_service.page_appointments(
+            first=min(first, MAX_PAGE_SIZE),
+            after=after_key,
+            **filters
+        )
+        
+        edges = [
+            AppointmentEdge(
+                cursor=encode_cursor(apt.date, apt.time, apt.id),
+                node=apt
+            )
+            for apt in page
+        ]
+        
+        return AppointmentConnection(
+            edges=edges,
+            page_info=PageInfo(
+                has_next_page=has_next_page,
+                end_cursor=edges[-1].cursor if edges else after
+            ),
+            counter=lambda: async_appointment_service.count_appointments(**filters)
+        )
+    
+    @strawberry.field
+    async def appointment_stats(
+        self,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        doctor_name: Optional[str] = None
+    ) -> AppointmentStats:
+        """Get status/mode counts over a date range from maintained counters"""
+        stats = await async_appointment_service.get_stats(date_from=date_from, date_to=date_to, doctor_name=doctor_name)
+        
+        return AppointmentStats(
+            total_count=stats["total"],
+            by_status=[StatusCount(status=status, count=count) for status, count in stats["by_status"].items()],
+            by_mode=[ModeCount(mode=mode, count=count) for mode, count in stats["by_mode"].items()]
+        )
+    
+    @strawberry.field
+    async def available_slots(
+        self,
+        date_from: str,
+        date_to: str,
+        duration: int,
+        doctor_name: Optional[str] = None,
+        buffer_minutes: int = 5
+    ) -> List[AvailableSlot]:
+        """Get free windows that fit `duration` minutes, for one doctor or all of them"""
+        try:
+            slots = await async_appointment_service.available_slots(
+                date_from=date_from,
+                date_to=date_to,
+                duration=duration,
+                doctor_name=doctor_name,
+                buffer_minutes=buffer_minutes
+            )
+        except ValueError as e:
+            raise Exception(str(e))
+        
+        return [
+            AvailableSlot(doctor_name=doctor, date=date, start_time=minutes_to_time(start), end_time=minutes_to_time(end))
+            for doctor, date, start, end in slots
+        ]
+    
+    @strawberry.field
+    async def appointment(self, info: Info, id: str) -> Optional[AppointmentType]:
+        """Get single appointment by ID, batched with the document's other lookups"""
+        return await request_loaders(info.context).by_id.load(id)
+    
+    @strawberry.field
+    async def appointment_series(self, id: str) -> Optional[AppointmentSeriesType]:
+        """Get a recurring series by ID"""
+        return await async_appointment_service.get_series(id)
@@ -0,0 +1,42 @@
+"""
+Per-request DataLoaders for the async GraphQL resolvers
+Batches and memoizes the storage reads made by the fields of one operation
+"""
+
+from typing import Any, Optional, Tuple
+
+from strawberry.dataloader import DataLoader
+
+from async_appointment_service import AsyncAppointmentService, async_appointment_service
+
+# get_appointments arguments: (date, status, doctor_name, date_from, date_to)
+ListingKey = Tuple[Optional[str], Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+class AppointmentLoaders:
+    """
+    DataLoaders scoped to one request
+
+    Fields that load in the same event loop tick, such as a dashboard's
+    aliased appointment(id:) lookups or aliased listings, are gathered
+    into one service call per loader. Repeated arguments are fetched
+    once, and later loads of them in the same request are answered from
+    the loader's cache. Nothing is shared between requests, so the next
+    request always sees the latest writes.
+    """
+
+    def __init__(self, service: Optional[AsyncAppointmentService] = None):
+        service = service or async_appointment_service
+        self.by_id: DataLoader = DataLoader(service.get_appointments_by_ids)
+        self.listing: DataLoader = DataLoader(service.get_appointment_lists)
+
+
+def request_loaders(context: Any) -> AppointmentLoaders:
+    """The request's loaders, created on first use and kept in its context"""
+    if not isinstance(context, dict):
+        # No request context to hold them: still batched within this field
+        return AppointmentLoaders()
+    loaders = context.get("loaders")
+    if loaders is None:
+        loaders = context["loaders"] = AppointmentLoaders()
+    return loaders
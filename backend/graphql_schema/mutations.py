@@ -3,10 +3,19 @@ GraphQL Mutation resolvers
 """
 
 import strawberry
-from typing import Optional
-from graphql_schema.types import Appointment as AppointmentType, CreateAppointmentInput, DeleteResult
+from typing import List, Optional
+from graphql_schema.types import (
+    Appointment as AppointmentType,
+    AppointmentSeries as AppointmentSeriesType,
+    BatchCreateResult,
+    BatchItemError,
+    CreateAppointmentInput,
+    CreateAppointmentSeriesInput,
+    DeleteResult,
+)
 from appointment_service import appointment_service
 from models.appointment import AppointmentCreate
+from models.series import SeriesCreate
 
 
 @strawberry.type
@@ -29,42 +38,40 @@ class Mutation:
             )
             
             # Create appointment
-            apt = appointment_service.create_appointment(appointment_data)
-            
-            return AppointmentType(
-                id=apt.id,
-                patient_name=apt.patient_name,
-                date=apt.date,
-                time=apt.time,
-                duration=apt.duration,
-                doctor_name=apt.doctor_name,
-                status=apt.status,
-                mode=apt.mode,
-                created_at=apt.created_at
-            )
+            return appointment_service.create_appointment(appointment_data)
         except ValueError as e:
             raise Exception(str(e))
     
     @strawberry.mutation
-    def update_appointment_status(self, id: str, status: str) -> Optional[AppointmentType]:
-        """Update appointment status"""
-        apt = appointment_service.update_appointment_status(id, status)
-        
-        if not apt:
-            return None
+    def create_appointments(self, inputs: List[CreateAppointmentInput]) -> BatchCreateResult:
+        """Create many appointments at once; nothing is saved if any item fails"""
+        created, errors = appointment_service.create_many([
+            {
+                "patient_name": input.patient_name,
+                "date": input.date,
+                "time": input.time,
+                "duration": input.duration,
+                "doctor_name": input.doctor_name,
+                "mode": input.mode,
+                "status": input.status,
+            }
+            for input in inputs
+        ])
         
-        return AppointmentType(
-            id=apt.id,
-            patient_name=apt.patient_name,
-            date=apt.date,
-            time=apt.time,
-            duration=apt.duration,
-            doctor_name=apt.doctor_name,
-            status=apt.status,
-            mode=apt.mode,
-            created_at=apt.created_at
+        return BatchCreateResult(
+            success=not errors,
+            created=created,
+            errors=[BatchItemError(index=index, message=message) for index, message in errors.items()]
         )
     
+    @strawberry.mutation
+    def update_appointment_status(self, id: str, status: str) -> Optional[AppointmentType]:
+        """Update appointment status"""
+        try:
+            return appointment_service.update_appointment_status(id, status)
+        except ValueError as e:
+            raise Exception(str(e))
+    
     @strawberry.mutation
     def delete_appointment(self, id: str) -> DeleteResult:
         """Delete appointment"""
@@ -80,3 +87,41 @@ class Mutation:
                 success=False,
                 message=f"Appointment {id} not found"
             )
+    
+    @strawberry.mutation
+    def create_appointment_series(self, input: CreateAppointmentSeriesInput) -> AppointmentSeriesType:
+        """Create a recurring series; its occurrences appear in listings without being stored one by one"""
+        try:
+            series_data = SeriesCreate(
+                patient_name=input.patient_name,
+                date=input.date,
+                time=input.time,
+                duration=input.duration,
+                doctor_name=input.doctor_name,
+                mode=input.mode,
+                frequency=input.frequency,
+                count=input.count,
+                until=input.until,
+                exceptions=input.exceptions or [],
+                status=input.status
+            )
+            
+            return appointment_service.create_series(series_data)
+        except ValueError as e:
+            raise Exception(str(e))
+    
+    @strawberry.mutation
+    def delete_appointment_series(self, id: str) -> DeleteResult:
+        """Delete a recurring series; occurrences whose status was changed stay booked"""
+        success = appointment_service.delete_series(id)
+        
+        if success:
+            return DeleteResult(
+                success=True,
+                message=f"Appointment series {id} deleted successfully"
+            )
+        else:
+            return DeleteResult(
+                success=False,
+                message=f"Appointment series {id} not found"
+            )
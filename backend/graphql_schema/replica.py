@@ -0,0 +1,181 @@
+"""
+Read-only GraphQL schema served by snapshot replica workers
+Same query fields as queries.Query for listings and lookups, answered from a mapped snapshot
+"""
+
+import os
+from typing import Iterator, List, Optional
+
+from graphql import ExecutionResult, GraphQLError
+import strawberry
+from strawberry.extensions import SchemaExtension
+from strawberry.types import Info
+from strawberry.types.graphql import OperationType
+
+from graphql_schema.types import (
+    Appointment as AppointmentType,
+    AppointmentConnection,
+    AppointmentEdge,
+    PageInfo,
+)
+from storage.snapshot import DEFAULT_MAX_STALENESS, SnapshotReader, snapshot_dir_from_env
+from utils.cursor import MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from utils.persisted_queries import OperationCacheExtension, operation_cache_from_env
+from utils.query_cost import query_limit_extensions
+from utils.request_metrics import MetricsExtension
+
+
+@strawberry.type(name="Query")
+class ReplicaQuery:
+    """Root Query type of a replica; every field reads the snapshot pinned for the request"""
+    
+    @strawberry.field
+    def appointments(
+        self,
+        info: Info,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> List[AppointmentType]:
+        """Get all appointments with optional filters"""
+        return info.context["snapshot"].query(date, status, doctor_name, date_from, date_to)
+    
+    @strawberry.field
+    def appointments_connection(
+        self,
+        info: Info,
+        first: int = 20,
+        after: Optional[str] = None,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> AppointmentConnection:
+        """Get one page of appointments ordered by (date, time)"""
+        if first < 0:
+            raise Exception("first must be non-negative")
+        try:
+            after_key = decode_cursor(after) if after else None
+        except ValueError as e:
+            raise Exception(str(e))
+        
+        snapshot = info.context["snapshot"]
+        first = min(first, MAX_PAGE_SIZE)
+        page = snapshot.query(date, status, doctor_name, date_from, date_to, after=after_key, limit=first + 1)
+        edges = [
+            AppointmentEdge(
+                cursor=encode_cursor(apt.date, apt.time, apt.id),
+                node=apt
+            )
+            for apt in page[:first]
+        ]
+        
+        return AppointmentConnection(
+            edges=edges,
+            page_info=PageInfo(
+                has_next_page=len(page) > first,
+                end_cursor=edges[-1].cursor if edges else after
+            ),
+            counter=lambda: snapshot.count(date, status, doctor_name, date_from, date_to)
+        )
+    
+    @strawberry.field
+    def appointment(self, info: Info, id: str) -> Optional[AppointmentType]:
+        """Get single appointment by ID"""
+        return info.context["snapshot"].get(id)
+
+
+class SnapshotExtension(SchemaExtension):
+    """
+    Pins one snapshot per operation and reports how stale it is
+
+    Every resolver of an operation reads the same snapshot, even if the
+    writer swaps in a newer one mid-request. Operations are refused with
+    REPLICA_STALE (HTTP 503) while the writer holds writes older than
+    max_staleness that the snapshot lacks, and with REPLICA_UNAVAILABLE
+    before the first snapshot is published. Answered operations carry
+    {"replica": {"version", "lagWrites", "stalenessMs"}} in their
+    response extensions.
+    """
+
+    def __init__(self, reader: SnapshotReader):
+        self.reader = reader
+
+    def on_execute(self) -> Iterator[None]:
+        # Shared between requests: take this request's context before yielding
+        context = self.execution_context
+        if context.operation_type != OperationType.QUERY:
+            yield
+            return
+
+        snapshot = self.reader.current()
+        if snapshot is None:
+            context.result = self._refuse(context.context, "No snapshot has been published yet", "REPLICA_UNAVAILABLE")
+            yield
+            return
+        lag = self.reader.staleness(snapshot)
+        replica = {"version": snapshot.version, "lagWrites": lag.writes, "stalenessMs": round(lag.seconds * 1e3, 1)}
+        if self.reader.max_staleness and lag.seconds > self.reader.max_staleness:
+            context.result = self._refuse(
+                context.context,
+                f"Replica is {lag.seconds:.1f}s behind the writer (limit {self.reader.max_staleness:g}s)",
+                "REPLICA_STALE",
+                replica
+            )
+            yield
+            return
+
+        context.context["snapshot"] = snapshot
+        context.extensions_results["replica"] = replica
+        yield
+
+    @staticmethod
+    def _refuse(request_context: dict, message: str, code: str, details: Optional[dict] = None) -> ExecutionResult:
+        response = request_context.get("response")
+        if response is not None:
+            response.status_code = 503
+        return ExecutionResult(data=None, errors=[GraphQLError(message, extensions={"code": code, **(details or {})})])
+
+
+def snapshot_reader_from_env() -> SnapshotReader:
+    """
+    SnapshotReader over APPOINTMENT_SNAPSHOT_DIR
+
+    APPOINTMENT_REPLICA_MAX_STALENESS caps how many seconds of writes a
+    replica may be missing before it refuses queries (0: never refuse).
+    """
+    return SnapshotReader(
+        snapshot_dir_from_env(),
+        max_staleness=float(os.getenv("APPOINTMENT_REPLICA_MAX_STALENESS", DEFAULT_MAX_STALENESS))
+    )
+
+
+snapshot_reader = snapshot_reader_from_env()
+
+
+def _snapshot_count(args: dict) -> int:
+    snapshot = snapshot_reader.current()
+    if snapshot is None:
+        return 0
+    return snapshot.count(args.get("date"), args.get("status"), args.get("doctorName"), args.get("dateFrom"), args.get("dateTo"))
+
+
+# As in schema.QUERY_LIST_SIZES, but counted exactly from the snapshot
+REPLICA_LIST_SIZES = {
+    "Query.appointments": _snapshot_count,
+    "AppointmentConnection.edges": lambda args: min(args["first"], MAX_PAGE_SIZE),
+}
+
+replica_schema = strawberry.Schema(
+    query=ReplicaQuery,
+    extensions=[
+        # Each worker registers hashes itself; a manifest pins them in all of them
+        OperationCacheExtension(operation_cache_from_env()),
+        SnapshotExtension(snapshot_reader),
+        *query_limit_extensions(REPLICA_LIST_SIZES),
+        MetricsExtension()
+    ]
+)
@@ -1,15 +1,63 @@
 """
 Strawberry GraphQL Schema
-Combines queries and mutations
+Combines queries, mutations and subscriptions
 """
 
+import os
+
 import strawberry
+from appointment_service import appointment_service
 from graphql_schema.queries import Query
 from graphql_schema.mutations import Mutation
+from graphql_schema.async_queries import AsyncQuery
+from graphql_schema.async_mutations import AsyncMutation
+from graphql_schema.subscriptions import Subscription
+from utils.cursor import MAX_PAGE_SIZE
+from utils.persisted_queries import operation_cache_from_env
+from utils.query_cost import days_between, query_limit_extensions
+from utils.request_metrics import MetricsExtension
+from utils.response_cache import caching_extensions, response_cache_from_env
+
+# GRAPHQL_RESOLVERS=sync serves the same schema from the blocking resolvers;
+# subscriptions are always async
+RESOLVER_MODES = {
+    "async": (AsyncQuery, AsyncMutation),
+    "sync": (Query, Mutation),
+}
+
+resolver_mode = os.getenv("GRAPHQL_RESOLVERS", "async")
+if resolver_mode not in RESOLVER_MODES:
+    raise ValueError(f"Unknown resolver mode: {resolver_mode}")
+
+# Repeated queries are answered from cache until a write touches their (date, doctor)
+response_cache = response_cache_from_env()
+# Parsed and validated documents, and the persisted query hashes clients send instead of them
+operation_cache = operation_cache_from_env()
 
+# Expected length of each list field, read from the indexes, so that the
+# query cost limits refuse unfiltered listings of a large store before they run
+QUERY_LIST_SIZES = {
+    "Query.appointments": lambda args: appointment_service.estimate_appointments(
+        date=args.get("date"),
+        status=args.get("status"),
+        doctor_name=args.get("doctorName"),
+        date_from=args.get("dateFrom"),
+        date_to=args.get("dateTo")
+    ),
+    "AppointmentConnection.edges": lambda args: min(args["first"], MAX_PAGE_SIZE),
+    "Query.availableSlots": lambda args: days_between(args["dateFrom"], args["dateTo"]) * (
+        1 if args.get("doctorName") else appointment_service.count_doctors()
+    ),
+}
 
 # Create the GraphQL schema
 schema = strawberry.Schema(
-    query=Query,
-    mutation=Mutation
+    query=RESOLVER_MODES[resolver_mode][0],
+    mutation=RESOLVER_MODES[resolver_mode][1],
+    subscription=Subscription,
+    extensions=[
+        *caching_extensions(response_cache, appointment_service.versions, operation_cache),
+        *query_limit_extensions(QUERY_LIST_SIZES),
+        MetricsExtension()
+    ]
 )
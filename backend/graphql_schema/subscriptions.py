@@ -0,0 +1,27 @@
+"""
+GraphQL Subscription resolvers
+"""
+
+import strawberry
+from typing import AsyncGenerator, Optional
+from graphql_schema.types import Appointment as AppointmentType, AppointmentChange
+from async_appointment_service import async_appointment_service
+from utils.change_feed import SubscriberOverflow
+
+
+@strawberry.type
+class Subscription:
+    """Root Subscription type"""
+    
+    @strawberry.subscription
+    async def appointment_changed(
+        self,
+        doctor_name: Optional[str] = None,
+        date: Optional[str] = None
+    ) -> AsyncGenerator[AppointmentChange, None]:
+        """Push created, updated and deleted appointments for a doctor and/or day"""
+        try:
+            async for change in async_appointment_service.subscribe(doctor_name, date):
+                yield AppointmentChange(kind=change.kind, id=change.appointment_id, appointment=change.row)
+        except SubscriberOverflow as e:
+            raise Exception(str(e))
@@ -3,7 +3,7 @@ Strawberry GraphQL types
 """
 
 import strawberry
-from typing import Optional
+from typing import Awaitable, Callable, List, Optional, Union
 
 
 @strawberry.type
@@ -20,6 +20,82 @@ class Appointment:
     created_at: Optional[str] = None
 
 
+@strawberry.type
+class AppointmentSeries:
+    """GraphQL recurring series; its occurrences are listed as appointments with ids "<series id>/<date>" """
+    id: str
+    patient_name: str
+    date: str  # first occurrence
+    time: str
+    duration: int
+    doctor_name: str
+    status: str
+    mode: str
+    frequency: str  # Weekly or Biweekly
+    count: Optional[int]
+    until: Optional[str]
+    exceptions: List[str]
+    created_at: Optional[str] = None
+
+
+@strawberry.type
+class PageInfo:
+    """Relay pagination metadata"""
+    has_next_page: bool
+    end_cursor: Optional[str] = None
+
+
+@strawberry.type
+class AppointmentEdge:
+    """Appointment with its opaque pagination cursor"""
+    cursor: str
+    node: Appointment
+
+
+@strawberry.type
+class AppointmentConnection:
+    """Relay-style page of appointments"""
+    edges: List[AppointmentEdge]
+    page_info: PageInfo
+    counter: strawberry.Private[Callable[[], Union[int, Awaitable[int]]]]
+
+    @strawberry.field
+    def total_count(self) -> int:
+        """Total matches across all pages, counted only when requested"""
+        return self.counter()
+
+
+@strawberry.type
+class StatusCount:
+    """Number of appointments in one status"""
+    status: str
+    count: int
+
+
+@strawberry.type
+class ModeCount:
+    """Number of appointments in one consultation mode"""
+    mode: str
+    count: int
+
+
+@strawberry.type
+class AppointmentStats:
+    """Aggregate appointment counts"""
+    total_count: int
+    by_status: List[StatusCount]
+    by_mode: List[ModeCount]
+
+
+@strawberry.type
+class AvailableSlot:
+    """Free window in a doctor's day; any booking that fits between start_time and end_time is accepted"""
+    doctor_name: str
+    date: str
+    start_time: str
+    end_time: str
+
+
 @strawberry.input
 class CreateAppointmentInput:
     """Input type for creating appointments"""
@@ -32,8 +108,47 @@ class CreateAppointmentInput:
     status: Optional[str] = "Scheduled"
 
 
+@strawberry.input
+class CreateAppointmentSeriesInput:
+    """Input type for creating a recurring series; give exactly one of count or until"""
+    patient_name: str
+    date: str
+    time: str
+    duration: int
+    doctor_name: str
+    mode: str
+    frequency: str
+    count: Optional[int] = None
+    until: Optional[str] = None
+    exceptions: Optional[List[str]] = None
+    status: Optional[str] = "Scheduled"
+
+
 @strawberry.type
 class DeleteResult:
     """Result of delete operation"""
     success: bool
     message: str
+
+
+@strawberry.type
+class BatchItemError:
+    """Why one item of a batch was rejected"""
+    index: int
+    message: str
+
+
+@strawberry.type
+class BatchCreateResult:
+    """Outcome of an all-or-nothing batch create"""
+    success: bool
+    created: List[Appointment]
+    errors: List[BatchItemError]
+
+
+@strawberry.type
+class AppointmentChange:
+    """Appointment delta pushed to subscribers"""
+    kind: str  # CREATED, UPDATED or DELETED
+    id: str
+    appointment: Optional[Appointment] = None  # None for deletes
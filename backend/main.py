@@ -1,10 +1,32 @@
-﻿from fastapi import FastAPI
+﻿from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from strawberry.fastapi import GraphQLRouter
 import strawberry
-from typing import Optional, List
-from datetime import datetime, timedelta
+from strawberry.schema.config import StrawberryConfig
+from typing import AsyncGenerator, Callable, Iterator, Literal, Optional, List, Tuple
+from datetime import datetime
+from itertools import islice
+from operator import itemgetter
+from contextlib import asynccontextmanager
 import os
+import threading
+
+from storage.persistence import PersistentTable
+from utils.availability import AvailabilitySearch, minutes_to_time
+from utils.conflict_detector import parse_time
+from utils.change_feed import CREATED, DELETED, UPDATED, ChangeFeed, SubscriberOverflow
+from utils.cursor import MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from utils.export import check_date_range, export_response
+from utils.http_middleware import ConditionalGetMiddleware, compression_middleware
+from utils.id_allocator import IdAllocator
+from utils.interval_index import DoctorDayIntervalIndex
+from utils.persisted_queries import operation_cache_from_env
+from utils.query_cost import days_between, query_limit_extensions
+from utils.query_index import AppointmentQueryIndex
+from utils.request_metrics import MetricsExtension, MetricsMiddleware, metrics_response, register_app_metrics
+from utils.response_cache import ScopeVersions, caching_extensions, response_cache_from_env
+from utils.stats_counter import AppointmentStatsCounter
+from utils.striped_lock import StripedLock
 
 
 # ==================== MOCK DATA ====================
@@ -144,6 +166,17 @@ appointments_db = [
 
 
 # ==================== GRAPHQL TYPES ====================
+def row_field(obj, name: str):
+    """
+    Default resolver that reads appointment rows in place.
+    
+    Resolvers return the stored dicts themselves rather than copying each
+    one into an Appointment instance, so listing N rows allocates nothing
+    per row beyond the response.
+    """
+    return obj[name] if type(obj) is dict else getattr(obj, name)
+
+
 @strawberry.type
 class Appointment:
     id: str
@@ -156,6 +189,57 @@ class Appointment:
     mode: str
 
 
+@strawberry.type
+class PageInfo:
+    hasNextPage: bool
+    endCursor: Optional[str] = None
+
+
+@strawberry.type
+class AppointmentEdge:
+    cursor: str
+    node: Appointment
+
+
+@strawberry.type
+class AppointmentConnection:
+    edges: List[AppointmentEdge]
+    pageInfo: PageInfo
+    counter: strawberry.Private[Callable[[], int]]
+
+    @strawberry.field
+    def totalCount(self) -> int:
+        """Counted from the index only when the client asks for it"""
+        return self.counter()
+
+
+@strawberry.type
+class StatusCount:
+    status: str
+    count: int
+
+
+@strawberry.type
+class ModeCount:
+    mode: str
+    count: int
+
+
+@strawberry.type
+class AppointmentStats:
+    totalCount: int
+    byStatus: List[StatusCount]
+    byMode: List[ModeCount]
+
+
+@strawberry.type
+class AvailableSlot:
+    doctorName: str
+    date: str
+    startTime: str
+    endTime: str
+
+
 @strawberry.input
 class AppointmentInput:
     patientName: str
@@ -173,38 +257,192 @@ class DeleteResult:
     message: str
 
 
+@strawberry.type
+class AppointmentChange:
+    kind: str  # CREATED, UPDATED or DELETED
+    id: str
+    appointment: Optional[Appointment] = None  # None for deletes
+
+
+# ==================== PERSISTENCE ====================
+# When APPOINTMENT_DATA_DIR is set, every mutation is appended to a
+# write-ahead log before it is acknowledged, and startup recovers the table
+# from the last snapshot plus the WAL tail instead of the mock data.
+DATA_DIR = os.getenv("APPOINTMENT_DATA_DIR")
+persistence = PersistentTable(
+    DATA_DIR,
+    "legacy_appointments",
+    group_commit=os.getenv("APPOINTMENT_WAL_GROUP_COMMIT", "1") != "0",
+) if DATA_DIR else None
+
+if persistence:
+    _recovered = persistence.recover()
+    if _recovered is None:
+        persistence.snapshot(appointments_db)
+    else:
+        appointments_db = _recovered
+
+
+def persist_put(apt: dict) -> None:
+    """Durably log an insert or update (no-op without a data dir)"""
+    if persistence:
+        persistence.log_put(apt)
+
+
+def persist_delete(apt_id: str) -> None:
+    """Durably log a delete (no-op without a data dir)"""
+    if persistence:
+        persistence.log_delete(apt_id)
+
+
+def maybe_snapshot() -> None:
+    """Compact the WAL once enough records have accumulated"""
+    if persistence and persistence.snapshot_due():
+        # Holding db_lock means every applied write is either in the
+        # snapshot or logged after the WAL is truncated
+        with db_lock:
+            if persistence.snapshot_due():
+                persistence.snapshot(appointments_db)
+
+
+# ==================== INDEXES ====================
+# Secondary indexes over appointments_db (in production: B-tree indexes).
+# Status and doctor name are lower-cased once at write time so filters
+# stay case-insensitive without touching every row per query.
+appointments_by_id = {}
+# Position of each row in appointments_db, so updates and deletes touch one slot
+appointments_position = {}
+appointments_index = AppointmentQueryIndex()
+appointments_stats = AppointmentStatsCounter()
+# Busy intervals per (doctorName, date) with the same rules as
+# check_time_conflict: exact doctor name, every status blocks the slot
+appointments_schedule = DoctorDayIntervalIndex()
+appointments_availability = AvailabilitySearch(
+    lambda doctor_name, date: [(start, end) for start, end, _ in appointments_schedule.intervals(doctor_name, date)]
+)
+# Per-(date, doctorName) versions; cached query responses over a bumped scope are dropped
+appointments_versions = ScopeVersions()
+
+
+def slot_minutes(time: str) -> Optional[int]:
+    """
+    Start of a row's time in minutes since midnight, or None if it does not parse.
+    
+    Well-formed HH:MM goes through the precompiled, memoized parser; anything
+    else falls back to strptime, so every time the app has always accepted
+    (e.g. "9:05") still is. Times that do not parse are stored as given and
+    never conflict, as before.
+    """
+    try:
+        return parse_time(time)
+    except ValueError:
+        pass
+    try:
+        start = datetime.strptime(time, "%H:%M")
+    except ValueError:
+        return None
+    return start.hour * 60 + start.minute
+
+
+def schedule_interval(apt: dict) -> Optional[Tuple[int, int]]:
+    """Busy (start, end) minutes of a row, or None if its time does not parse"""
+    start = slot_minutes(apt["time"])
+    if start is None:
+        return None
+    return start, start + apt["duration"]
+
+
+def index_appointment(apt: dict) -> None:
+    """Add a row to the id map, secondary indexes and stats counters"""
+    appointments_by_id[apt["id"]] = apt
+    appointments_index.add(apt["id"], apt["date"], apt["time"], apt["status"].lower(), apt["doctorName"].lower())
+    appointments_stats.add(apt["date"], apt["doctorName"], apt["status"], apt["mode"])
+    interval = schedule_interval(apt)
+    if interval:
+        appointments_schedule.add(apt["doctorName"], apt["date"], *interval, apt["id"])
+    appointments_availability.invalidate(apt["doctorName"], apt["date"])
+    appointments_versions.bump(apt["date"], apt["doctorName"])
+
+
+def unindex_appointment(apt: dict) -> None:
+    """Remove a row from the id map, secondary indexes and stats counters"""
+    appointments_by_id.pop(apt["id"], None)
+    appointments_index.remove(apt["id"], apt["date"], apt["time"], apt["status"].lower(), apt["doctorName"].lower())
+    appointments_stats.remove(apt["date"], apt["doctorName"], apt["status"], apt["mode"])
+    interval = schedule_interval(apt)
+    if interval:
+        appointments_schedule.remove(apt["doctorName"], apt["date"], *interval, apt["id"])
+    appointments_availability.invalidate(apt["doctorName"], apt["date"])
+    appointments_versions.bump(apt["date"], apt["doctorName"])
+
+
+def append_appointment(apt: dict) -> None:
+    """Append a new row to appointments_db and index it"""
+    appointments_position[apt["id"]] = len(appointments_db)
+    appointments_db.append(apt)
+    index_appointment(apt)
+
+
+def remove_appointment(apt: dict) -> None:
+    """
+    Remove a row from appointments_db and its indexes
+
+    The last row moves into the freed slot, so no other row shifts; the
+    list's order carries no meaning (listings go through the indexes).
+    """
+    position = appointments_position.pop(apt["id"])
+    last = appointments_db.pop()
+    if position < len(appointments_db):
+        appointments_db[position] = last
+        appointments_position[last["id"]] = position
+    unindex_appointment(apt)
+
+
+_seed, appointments_db = appointments_db, []
+for _apt in _seed:
+    append_appointment(_apt)
+
+
+# ==================== CONCURRENCY ====================
+# Sync resolvers run concurrently in the server's threadpool.
+# - schedule_locks: striped by (doctorName, date) and held from the conflict
+#   check until the write is logged, so two requests can never both book
+#   the same doctor's slot while unrelated bookings proceed in parallel
+# - db_lock: short lock around mutations of appointments_db and its indexes
+# - id_allocator: O(1) monotonic ids instead of max(id) + 1 per insert
+# In production: row locks / SERIALIZABLE transactions and a sequence.
+schedule_locks = StripedLock()
+db_lock = threading.Lock()
+id_allocator = IdAllocator(start=max((int(a["id"]) for a in appointments_db), default=0) + 1)
+
+
+# ==================== CHANGE FEED ====================
+# Mutations publish each acknowledged write here; appointmentChanged
+# subscribers get coalesced deltas per (doctorName, date) instead of
+# refetching whole lists. Slow subscribers are dropped, not buffered.
+# In production: AppSync subscriptions fed by the Aurora change stream.
+appointment_changes = ChangeFeed()
+
+
 # ==================== HELPER FUNCTIONS ====================
-def check_time_conflict(doctor_name: str, date: str, time: str, duration: int, exclude_id: Optional[str] = None) -> bool:
+def check_time_conflict(doctor_name: str, date: str, start: Optional[int], duration: int, exclude_id: Optional[str] = None) -> bool:
     """
     Checks if a new appointment conflicts with existing appointments for the same doctor.
     
     Time Conflict Detection Logic:
-    - Converts appointment time to datetime
+    - Takes the new appointment's start in minutes (see slot_minutes);
+      a time that does not parse never conflicts
     - Calculates end time using duration
-    - Checks overlap with all existing appointments for the same doctor on the same date
+    - Checks overlap with the doctor's indexed intervals on the same date:
+      (StartA < EndB) and (EndA > StartB)
     
     In production (Aurora PostgreSQL):
     - This would be a database query with time range overlap detection
     - Would use database-level constraints and transactions for atomicity
     """
-    try:
-        new_start = datetime.strptime(time, "%H:%M")
-        new_end = new_start + timedelta(minutes=duration)
-        
-        for apt in appointments_db:
-            if apt["doctorName"] == doctor_name and apt["date"] == date:
-                if exclude_id and apt["id"] == exclude_id:
-                    continue
-                    
-                existing_start = datetime.strptime(apt["time"], "%H:%M")
-                existing_end = existing_start + timedelta(minutes=apt["duration"])
-                
-                # Check for overlap: (StartA < EndB) and (EndA > StartB)
-                if (new_start < existing_end) and (new_end > existing_start):
-                    return True
-        return False
-    except Exception:
+    if start is None:
         return False
+    return appointments_schedule.has_conflict(doctor_name, date, start, start + duration, exclude_id, buffer_minutes=0)
 
 
 # ==================== GRAPHQL QUERIES ====================
@@ -215,7 +453,9 @@ class Query:
         self, 
         date: Optional[str] = None, 
         status: Optional[str] = None, 
-        doctorName: Optional[str] = None
+        doctorName: Optional[str] = None,
+        dateFrom: Optional[str] = None,
+        dateTo: Optional[str] = None
     ) -> List[Appointment]:
         """
         Fetches appointments with optional filtering.
@@ -224,36 +464,154 @@ class Query:
         - date: ISO format date string (YYYY-MM-DD)
         - status: Scheduled, Confirmed, Completed, Cancelled
         - doctorName: Exact match on doctor's name
+        - dateFrom / dateTo: Inclusive date range
         
         In production (Aurora + AppSync):
         - This would be a SQL query with WHERE clauses
         - AppSync would cache results at the CDN edge
         - Subscriptions would listen to appointment changes
+        
+        Results come back ordered by (date, time) straight from the index.
         """
-        filtered = appointments_db
+        ids = appointments_index.iter_ids(
+            date=date,
+            status=status.lower() if status else None,
+            doctor_name=doctorName.lower() if doctorName else None,
+            date_from=dateFrom,
+            date_to=dateTo,
+        )
+        # Reads take no lock: skip ids deleted after the index handed them out
+        rows = (appointments_by_id.get(apt_id) for apt_id in ids)
+        return [apt for apt in rows if apt is not None]
+    
+    @strawberry.field
+    def appointmentsConnection(
+        self,
+        first: int = 20,
+        after: Optional[str] = None,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctorName: Optional[str] = None,
+        dateFrom: Optional[str] = None,
+        dateTo: Optional[str] = None
+    ) -> AppointmentConnection:
+        """
+        Fetches one page of appointments (Relay cursor connection).
         
-        if date:
-            filtered = [a for a in filtered if a["date"] == date]
+        Pagination:
+        - first: Page size, capped at MAX_PAGE_SIZE
+        - after: Opaque cursor over (date, time, id) from a previous page
+        - totalCount: Answered by the index, no rows are loaded
         
-        if status:
-            filtered = [a for a in filtered if a["status"].lower() == status.lower()]
+        In production:
+        - SELECT ... WHERE (date, time, id) > (?, ?, ?) ORDER BY date, time, id LIMIT ?
+        - Keyset pagination keeps memory bounded by page size, not table size
+        """
+        if first < 0:
+            raise Exception("first must be non-negative")
+        try:
+            after_key = decode_cursor(after) if after else None
+        except ValueError as e:
+            raise Exception(str(e))
+        
+        filters = dict(
+            date=date,
+            status=status.lower() if status else None,
+            doctor_name=doctorName.lower() if doctorName else None,
+            date_from=dateFrom,
+            date_to=dateTo,
+        )
+        page_size = min(first, MAX_PAGE_SIZE)
+        # Reads take no lock: skip ids deleted after the index handed them out
+        rows = (
+            (key, appointments_by_id.get(key[2]))
+            for key in appointments_index.iter_keys(after=after_key, **filters)
+        )
+        keys = list(islice(((key, apt) for key, apt in rows if apt is not None), page_size + 1))
+        
+        edges = [
+            AppointmentEdge(cursor=encode_cursor(*key), node=apt)
+            for key, apt in keys[:page_size]
+        ]
+        return AppointmentConnection(
+            edges=edges,
+            pageInfo=PageInfo(
+                hasNextPage=len(keys) > page_size,
+                endCursor=edges[-1].cursor if edges else after,
+            ),
+            counter=lambda: appointments_index.count(**filters),
+        )
+    
+    @strawberry.field
+    def appointmentStats(
+        self,
+        dateFrom: Optional[str] = None,
+        dateTo: Optional[str] = None,
+        doctorName: Optional[str] = None
+    ) -> AppointmentStats:
+        """
+        Aggregate counts by status and mode for dashboards.
+        
+        Served from counters keyed by (date, doctor, status, mode) that
+        every mutation updates in O(1), so reads never scan appointments.
+        
+        In production:
+        - Materialized view or summary table maintained by triggers
+        """
+        stats = appointments_stats.summarize(date_from=dateFrom, date_to=dateTo, doctor_name=doctorName)
+        return AppointmentStats(
+            totalCount=stats["total"],
+            byStatus=[StatusCount(status=status, count=count) for status, count in stats["by_status"].items()],
+            byMode=[ModeCount(mode=mode, count=count) for mode, count in stats["by_mode"].items()],
+        )
+    
+    @strawberry.field
+    def availableSlots(
+        self,
+        dateFrom: str,
+        dateTo: str,
+        duration: int,
+        doctorName: Optional[str] = None,
+        bufferMinutes: int = 5
+    ) -> List[AvailableSlot]:
+        """
+        Finds free windows where a `duration`-minute appointment fits.
         
-        if doctorName:
-            filtered = [a for a in filtered if a["doctorName"].lower() == doctorName.lower()]
+        Sweeps each doctor's sorted busy intervals, padded by bufferMinutes
+        on both sides, between 08:00 and 20:00. Without doctorName every
+        doctor with appointments is searched. Gaps are cached per
+        (doctor, date) and recomputed only after that day changes, so the
+        front desk no longer probes createAppointment for conflicts.
         
-        return [Appointment(**apt) for apt in filtered]
+        In production:
+        - SELECT start, end FROM appointments WHERE doctor = ? AND date BETWEEN ? AND ?
+          ORDER BY date, start, then a gaps-and-islands window query (LAG(end))
+        """
+        doctors = [doctorName] if doctorName else appointments_stats.doctor_names()
+        try:
+            slots = appointments_availability.search(doctors, dateFrom, dateTo, duration, bufferMinutes)
+        except ValueError as e:
+            raise Exception(str(e))
+        return [
+            AvailableSlot(doctorName=doctor, date=date, startTime=minutes_to_time(start), endTime=minutes_to_time(end))
+            for doctor, date, start, end in slots
+        ]
     
     @strawberry.field
     def appointment(self, id: str) -> Optional[Appointment]:
         """
         Fetches a single appointment by ID.
         
+        Read from the appointments_by_id map, so a document with many
+        aliased lookups costs one dict probe per alias instead of a scan
+        of appointments_db each.
+        
         In production:
         - SELECT * FROM appointments WHERE id = ?
         - Uses indexed lookup for O(1) retrieval
+        - Aliased lookups batched into one WHERE id = ANY(?) by a DataLoader
         """
-        apt = next((a for a in appointments_db if a["id"] == id), None)
-        return Appointment(**apt) if apt else None
+        return appointments_by_id.get(id)
 
 
 # ==================== GRAPHQL MUTATIONS ====================
@@ -287,33 +645,34 @@ class Mutation:
         - Transaction Isolation: SERIALIZABLE level for critical operations
         - Optimistic Locking: Version column to detect concurrent updates
         """
-        # Generate unique ID
-        new_id = str(max([int(a["id"]) for a in appointments_db]) + 1)
-        
-        # Check for time conflicts
-        if check_time_conflict(input.doctorName, input.date, input.time, input.duration):
-            raise Exception(f"Time conflict: {input.doctorName} already has an appointment at {input.time} on {input.date}")
-        
-        # Create appointment
-        new_apt = {
-            "id": new_id,
-            "patientName": input.patientName,
-            "date": input.date,
-            "time": input.time,
-            "duration": input.duration,
-            "doctorName": input.doctorName,
-            "status": input.status or "Scheduled",
-            "mode": input.mode,
-        }
-        
-        appointments_db.append(new_apt)
+        start = slot_minutes(input.time)
+        with schedule_locks.holding((input.doctorName, input.date)):
+            # Check for time conflicts
+            if check_time_conflict(input.doctorName, input.date, start, input.duration):
+                raise Exception(f"Time conflict: {input.doctorName} already has an appointment at {input.time} on {input.date}")
+            
+            # Create appointment with a freshly allocated unique ID
+            new_apt = {
+                "id": str(id_allocator.allocate()),
+                "patientName": input.patientName,
+                "date": input.date,
+                "time": input.time,
+                "duration": input.duration,
+                "doctorName": input.doctorName,
+                "status": input.status or "Scheduled",
+                "mode": input.mode,
+            }
+            
+            with db_lock:
+                append_appointment(new_apt)
+            persist_put(new_apt)
+            # Real-time push to appointmentChanged subscribers
+            appointment_changes.publish(CREATED, new_apt["id"], new_apt["doctorName"], new_apt["date"], new_apt)
+        maybe_snapshot()
         
-        # In production, this would trigger:
-        # - AppSync Subscription: onCreateAppointment { id, patientName, ... }
-        # - Real-time push to all subscribed clients
-        # - Aurora transaction log for replication
+        # In production, this would also feed the Aurora transaction log for replication
         
-        return Appointment(**new_apt)
+        return new_apt
     
     @strawberry.mutation
     def updateAppointment(self, id: str, input: AppointmentInput) -> Optional[Appointment]:
@@ -328,24 +687,48 @@ class Mutation:
         - Trigger AppSync Subscription: onUpdateAppointment
         - Invalidate CDN cache for this appointment
         """
-        for i, apt in enumerate(appointments_db):
-            if apt["id"] == id:
+        current = appointments_by_id.get(id)
+        if not current:
+            return None
+        
+        start = slot_minutes(input.time)
+        updated = {
+            "id": id,
+            "patientName": input.patientName,
+            "date": input.date,
+            "time": input.time,
+            "duration": input.duration,
+            "doctorName": input.doctorName,
+            "status": input.status,
+            "mode": input.mode,
+        }
+        while True:
+            # Hold both the old and the new slot in case the appointment moves
+            with schedule_locks.holding((current["doctorName"], current["date"]), (input.doctorName, input.date)):
+                # Every write to this row holds its slot's stripe, so once the
+                # re-read row is still in the slot we hold it cannot change
+                apt = appointments_by_id.get(id)
+                if apt is None:
+                    return None  # deleted while we waited
+                if (apt["doctorName"], apt["date"]) != (current["doctorName"], current["date"]):
+                    current = apt  # moved while we waited: retry holding its new slot
+                    continue
+                
                 # Check time conflicts (excluding current appointment)
-                if check_time_conflict(input.doctorName, input.date, input.time, input.duration, exclude_id=id):
+                if check_time_conflict(input.doctorName, input.date, start, input.duration, exclude_id=id):
                     raise Exception(f"Time conflict: {input.doctorName} already has an appointment at {input.time}")
                 
-                appointments_db[i] = {
-                    "id": id,
-                    "patientName": input.patientName,
-                    "date": input.date,
-                    "time": input.time,
-                    "duration": input.duration,
-                    "doctorName": input.doctorName,
-                    "status": input.status,
-                    "mode": input.mode,
-                }
-                return Appointment(**appointments_db[i])
-        return None
+                with db_lock:
+                    appointments_db[appointments_position[id]] = updated
+                    unindex_appointment(apt)
+                    index_appointment(updated)
+                persist_put(updated)
+                appointment_changes.publish(
+                    UPDATED, id, updated["doctorName"], updated["date"], updated,
+                    previous=(apt["doctorName"], apt["date"])
+                )
+            maybe_snapshot()
+            return updated
     
     @strawberry.mutation
     def deleteAppointment(self, id: str) -> DeleteResult:
@@ -359,27 +742,148 @@ class Mutation:
         - Trigger AppSync Subscription: onDeleteAppointment
         - Archive to separate table for audit trail
         """
-        global appointments_db
-        original_len = len(appointments_db)
-        appointments_db = [a for a in appointments_db if a["id"] != id]
+        current = appointments_by_id.get(id)
+        if not current:
+            return DeleteResult(success=False, message="Appointment not found")
         
-        if len(appointments_db) < original_len:
+        while True:
+            with schedule_locks.holding((current["doctorName"], current["date"])):
+                apt = appointments_by_id.get(id)
+                if not apt:
+                    return DeleteResult(success=False, message="Appointment not found")
+                if (apt["doctorName"], apt["date"]) != (current["doctorName"], current["date"]):
+                    current = apt  # moved while we waited: retry holding its new slot
+                    continue
+                with db_lock:
+                    remove_appointment(apt)
+                persist_delete(id)
+                appointment_changes.publish(DELETED, id, apt["doctorName"], apt["date"])
+            maybe_snapshot()
             return DeleteResult(success=True, message="Appointment deleted successfully")
-        return DeleteResult(success=False, message="Appointment not found")
+
+
+# ==================== GRAPHQL SUBSCRIPTIONS ====================
+@strawberry.type
+class Subscription:
+    @strawberry.subscription
+    async def appointmentChanged(
+        self,
+        doctorName: Optional[str] = None,
+        date: Optional[str] = None
+    ) -> AsyncGenerator[AppointmentChange, None]:
+        """
+        Streams created, updated and deleted appointments for a doctor and/or day.
+        
+        Served over the graphql-transport-ws / graphql-ws WebSocket protocols
+        on /graphql. Bursts are coalesced into one delta per appointment;
+        clients treat CREATED and UPDATED as upserts. A client that falls
+        too far behind receives an error and should refetch and resubscribe.
+        
+        In production (AppSync):
+        - subscription onAppointmentChanged(doctorName, date) with server-side filters
+        - Fan-out through AppSync's managed WebSocket fleet
+        """
+        try:
+            async for change in appointment_changes.subscribe(doctorName, date):
+                yield AppointmentChange(
+                    kind=change.kind,
+                    id=change.appointment_id,
+                    appointment=change.row
+                )
+        except SubscriberOverflow as e:
+            raise Exception(str(e))
 
 
 # ==================== FASTAPI SETUP ====================
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+def estimate_listing(args: dict) -> int:
+    """Upper bound on the rows an appointments listing returns, from the index"""
+    status, doctor = args.get("status"), args.get("doctorName")
+    return appointments_index.estimate(
+        date=args.get("date"),
+        status=status.lower() if status else None,
+        doctor_name=doctor.lower() if doctor else None,
+        date_from=args.get("dateFrom"),
+        date_to=args.get("dateTo"),
+    )
+
+
+# Expected length of each list field, so that the query cost limits can
+# refuse an unfiltered listing of the whole table (or many aliased copies
+# of one) before it runs. In production: AppSync has no cost analysis, so
+# a WAF rate-based rule plus depth limits in a Lambda authorizer.
+QUERY_LIST_SIZES = {
+    "Query.appointments": estimate_listing,
+    "AppointmentConnection.edges": lambda args: min(args["first"], MAX_PAGE_SIZE),
+    "Query.availableSlots": lambda args: days_between(args["dateFrom"], args["dateTo"]) * (
+        1 if args.get("doctorName") else len(appointments_stats.doctor_names())
+    ),
+}
+
+# Read-through cache of whole query responses (in production: AppSync
+# server-side caching), invalidated through appointments_versions
+response_cache = response_cache_from_env()
+# Parsed and validated documents, and the automatic persisted query hashes
+# clients send instead of them (in production: AppSync has neither, so
+# persisted queries are served by an edge function in front of it)
+operation_cache = operation_cache_from_env()
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    subscription=Subscription,
+    extensions=[
+        *caching_extensions(response_cache, appointments_versions, operation_cache),
+        *query_limit_extensions(QUERY_LIST_SIZES),
+        MetricsExtension(),
+    ],
+    config=StrawberryConfig(default_resolver=row_field)
+)
 graphql_app = GraphQLRouter(schema)
 
+
+def storage_stats() -> dict:
+    """Row count and index sizes (in production: CloudWatch RDS metrics)"""
+    return {
+        "appointments": len(appointments_db),
+        "indexes": {
+            "by_id": len(appointments_by_id),
+            "listing": len(appointments_index),
+            "schedule": len(appointments_schedule),
+        },
+    }
+
+
+# Gauges read when /metrics is scraped (in production: a Prometheus sidecar or CloudWatch EMF)
+register_app_metrics(storage_stats, schema.extensions, response_cache)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Flush any group-commit batch still waiting on fsync
+    if persistence:
+        persistence.close()
+
+
 app = FastAPI(
     title="SwasthiQ EMR API",
     description="Healthcare Appointment Management System - Production Ready",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
+# Polling clients: GraphQL GET queries (persisted hashes included) and the
+# stats at / carry a version ETag and get a 304 when nothing changed; large
+# bodies are compressed.
+# Added before CORS so that 304s still pass through it.
+# In production: CloudFront conditional requests and edge compression.
+app.add_middleware(
+    ConditionalGetMiddleware, versions=appointments_versions, version_paths=("/",), operations=operation_cache
+)
+_compression, _compression_options = compression_middleware()
+app.add_middleware(_compression, **_compression_options)
+
 # Environment-based CORS configuration
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "").split(",") if os.getenv("ALLOWED_ORIGINS") else []
@@ -397,6 +901,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so latency covers every other middleware; requests sending
+# X-Trace-Timing get a Server-Timing breakdown of where the time went
+app.add_middleware(MetricsMiddleware)
+
 
 # Include GraphQL router
 app.include_router(graphql_app, prefix="/graphql")
@@ -408,6 +916,7 @@ def root():
     """
     Root endpoint - API health and info
     """
+    by_status = appointments_stats.summarize()["by_status"]
     return {
         "status": "healthy",
         "message": "SwasthiQ EMR Backend API",
@@ -416,32 +925,107 @@ def root():
         "endpoints": {
             "graphql": "/graphql",
             "health": "/health",
+            "metrics": "/metrics",
+            "export": "/export/appointments",
             "docs": "/docs",
             "redoc": "/redoc"
         },
         "stats": {
             "total_appointments": len(appointments_db),
-            "scheduled": len([a for a in appointments_db if a["status"] == "Scheduled"]),
-            "confirmed": len([a for a in appointments_db if a["status"] == "Confirmed"]),
-            "completed": len([a for a in appointments_db if a["status"] == "Completed"]),
-            "cancelled": len([a for a in appointments_db if a["status"] == "Cancelled"]),
+            "scheduled": by_status.get("Scheduled", 0),
+            "confirmed": by_status.get("Confirmed", 0),
+            "completed": by_status.get("Completed", 0),
+            "cancelled": by_status.get("Cancelled", 0),
         }
     }
 
 
 @app.get("/health")
-def health_check():
+def health_check(response: Response):
     """
     Health check endpoint for monitoring and load balancers
     """
+    # Every row must be reachable through the id map and listing index;
+    # a mismatch means a write died half-applied, so leave the pool
+    with db_lock:
+        stats = storage_stats()
+    consistent = all(size == stats["appointments"] for name, size in stats["indexes"].items() if name != "schedule")
+    if not consistent:
+        response.status_code = 503
     return {
-        "status": "ok",
+        "status": "ok" if consistent else "degraded",
         "service": "swasthiq-emr-api",
         "timestamp": datetime.now().isoformat(),
-        "database": "connected",  # In production: actual DB health check
+        "storage": {
+            **stats,
+            "persistence": persistence.status() if persistence else "disabled",
+        },
     }
 
 
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus text exposition of latency histograms, store and cache gauges
+    """
+    return metrics_response()
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    Response cache hit/miss/eviction counters for monitoring
+    """
+    if not response_cache:
+        return {"enabled": False}
+    return response_cache.stats()
+
+
+# Export columns, in the order of the Appointment GraphQL type
+EXPORT_COLUMNS = ("id", "patientName", "date", "time", "duration", "doctorName", "status", "mode")
+_export_values = itemgetter(*EXPORT_COLUMNS)
+
+
+def iter_export_rows(status: Optional[str], doctor: Optional[str], date_from: Optional[str], date_to: Optional[str]) -> Iterator[tuple]:
+    """Matching rows in (date, time, id) order, read lazily from the listing index"""
+    keys = appointments_index.iter_keys(
+        status=status.lower() if status else None,
+        doctor_name=doctor.lower() if doctor else None,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    for key in keys:
+        apt = appointments_by_id.get(key[2])
+        if apt is not None:  # deleted while the export was running
+            yield _export_values(apt)
+
+
+@app.get("/export/appointments")
+def export_appointments(
+    format: Literal["csv", "ndjson"] = "csv",
+    dateFrom: Optional[str] = None,
+    dateTo: Optional[str] = None,
+    doctor: Optional[str] = None,
+    status: Optional[str] = None
+):
+    """
+    Streams appointments as CSV or NDJSON for year-long or clinic-wide exports.
+    
+    Rows are walked from the listing index in order and written in
+    fixed-size batches, so server memory stays flat whatever the size of
+    the export; clients that accept gzip get it compressed on the fly.
+    
+    In production:
+    - Server-side cursor (SELECT ... ORDER BY date, time, id) streamed to the client
+    - Large exports written to S3 and served as a pre-signed URL
+    """
+    try:
+        check_date_range(dateFrom, dateTo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return export_response(iter_export_rows(status, doctor, dateFrom, dateTo), EXPORT_COLUMNS, format)
+
+
 # ==================== LOCAL DEVELOPMENT ====================
 if __name__ == "__main__":
     import uvicorn
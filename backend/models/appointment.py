@@ -1,53 +1,108 @@
 """
-Pydantic models for appointment data validation
+Pydantic models for appointment data validation, and the stored appointment record
 Mimics production data structures for Aurora PostgreSQL
 """
 
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, Literal
-from datetime import datetime
-import uuid
+from typing import Any, Dict, Optional, Literal, Tuple, get_args
+
+from utils.conflict_detector import parse_date, parse_time
+
+AppointmentStatus = Literal["Scheduled", "Confirmed", "Upcoming", "Completed", "Cancelled"]
+# Every status an appointment may have, in storage code order
+STATUSES: Tuple[str, ...] = get_args(AppointmentStatus)
 
 
 class AppointmentBase(BaseModel):
     """Base appointment model with common fields"""
     patient_name: str = Field(..., min_length=2, max_length=100)
-    date: str = Field(..., pattern=r'^\d{4}-\d{2}-\d{2}$')
-    time: str = Field(..., pattern=r'^\d{2}:\d{2}$')
+    date: str
+    time: str
     duration: int = Field(..., ge=15, le=180)
     doctor_name: str = Field(..., min_length=2, max_length=100)
     mode: Literal["In-person", "Video", "Phone"]
 
+    # The parsers are memoized, so building the Appointment record from this
+    # input reuses the conversion instead of parsing again
     @field_validator('date')
     @classmethod
     def validate_date(cls, v: str) -> str:
-        """Validate date format"""
-        try:
-            datetime.strptime(v, '%Y-%m-%d')
-            return v
-        except ValueError as e:
-            raise ValueError(f'Invalid date format: {str(e)}')
+        """Validate date format (YYYY-MM-DD, a real calendar day)"""
+        parse_date(v)
+        return v
 
     @field_validator('time')
     @classmethod
     def validate_time(cls, v: str) -> str:
-        """Validate time format"""
-        try:
-            hour, minute = map(int, v.split(':'))
-            if not (0 <= hour <= 23 and 0 <= minute <= 59):
-                raise ValueError('Invalid time range')
-            return v
-        except ValueError:
-            raise ValueError('Invalid time format. Use HH:MM (24-hour format)')
+        """Validate time format (HH:MM, 24-hour)"""
+        parse_time(v)
+        return v
 
 
 class AppointmentCreate(AppointmentBase):
     """Model for creating new appointments"""
-    status: Optional[Literal["Scheduled", "Confirmed", "Upcoming", "Completed", "Cancelled"]] = "Scheduled"
+    status: Optional[AppointmentStatus] = "Scheduled"
+
+
+class Appointment:
+    """
+    Stored appointment with system-generated fields
+
+    A plain __slots__ record rather than a Pydantic model: its fields were
+    validated as AppointmentCreate before it was built. Storage keeps it,
+    the service returns it and Strawberry resolves GraphQL fields straight
+    off its attributes, so listing rows allocates nothing per row. Records
+    are never mutated once stored; replace() returns a changed copy.
+
+    The date and time are converted once, when the record is built, into
+    `day` (date ordinal) and `start` / `end` (minutes since midnight);
+    conflict checks, schedule indexes and storage read those integers.
+    """
+
+    # Stored fields, in WAL / snapshot / SQLite column order
+    FIELDS = ("id", "patient_name", "date", "time", "duration", "doctor_name", "status", "mode", "created_at")
+
+    __slots__ = FIELDS + ("day", "start", "end")
+
+    def __init__(
+        self,
+        id: str,
+        patient_name: str,
+        date: str,
+        time: str,
+        duration: int,
+        doctor_name: str,
+        status: str,
+        mode: str,
+        created_at: str
+    ):
+        self.id = id
+        self.patient_name = patient_name
+        self.date = date
+        self.time = time
+        self.duration = duration
+        self.doctor_name = doctor_name
+        self.status = status
+        self.mode = mode
+        self.created_at = created_at
+        self.day = parse_date(date)
+        self.start = parse_time(time)
+        self.end = self.start + duration
+
+    def replace(self, **changes: Any) -> "Appointment":
+        """Copy with some fields changed"""
+        fields = self.to_dict()
+        fields.update(changes)
+        return Appointment(**fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Field dict, as written to the WAL and snapshots"""
+        return {name: getattr(self, name) for name in self.FIELDS}
 
+    def __reduce__(self):
+        # Pickled (e.g. to shard processes) as the stored fields alone;
+        # day / start / end come back from the memoized parsers
+        return Appointment, tuple(getattr(self, name) for name in self.FIELDS)
 
-class Appointment(AppointmentBase):
-    """Complete appointment model with system-generated fields"""
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    status: Literal["Scheduled", "Confirmed", "Upcoming", "Completed", "Cancelled"] = "Scheduled"
-    created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
+    def __repr__(self) -> str:
+        return f"Appointment({', '.join(f'{name}={getattr(self, name)!r}' for name in self.FIELDS)})"
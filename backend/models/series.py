@@ -0,0 +1,209 @@
+"""
+Recurring appointment series: the create model and the stored series record
+One record stands for every occurrence; occurrences are expanded on demand, inside a date window
+"""
+
+from datetime import date as Date
+from pydantic import Field, field_validator, model_validator
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple
+
+from models.appointment import Appointment, AppointmentBase
+from utils.conflict_detector import parse_date, parse_time
+
+# Days between occurrences
+FREQUENCY_DAYS = {"Weekly": 7, "Biweekly": 14}
+# Five years of weekly visits; also bounds a series' locks and cache invalidation
+MAX_OCCURRENCES = 260
+# Occurrence ids are "<series id>/<date>"
+OCCURRENCE_SEPARATOR = "/"
+
+
+def last_occurrence_day(first_day: int, interval: int, count: Optional[int], until: Optional[str]) -> int:
+    """Ordinal of the last occurrence: the count-th one, or the last on or before until"""
+    if count is not None:
+        return first_day + (count - 1) * interval
+    return first_day + (parse_date(until) - first_day) // interval * interval
+
+
+def occurrence_id(series_id: str, date: str) -> str:
+    return f"{series_id}{OCCURRENCE_SEPARATOR}{date}"
+
+
+def split_occurrence_id(appointment_id: str) -> Optional[Tuple[str, str]]:
+    """(series id, date) of an occurrence id, None for any other id"""
+    series_id, separator, date = appointment_id.rpartition(OCCURRENCE_SEPARATOR)
+    return (series_id, date) if separator and series_id else None
+
+
+class SeriesCreate(AppointmentBase):
+    """
+    Model for creating a recurring series (an RRULE subset)
+
+    Occurrences fall every week or every other week from `date`, at
+    `time`, ending after `count` occurrences or on the last one before
+    `until`. Dates in `exceptions` are skipped (like EXDATE).
+    """
+    frequency: Literal["Weekly", "Biweekly"]
+    count: Optional[int] = Field(None, ge=1, le=MAX_OCCURRENCES)
+    until: Optional[str] = None
+    exceptions: List[str] = Field(default_factory=list, max_length=MAX_OCCURRENCES)
+    status: Optional[Literal["Scheduled", "Confirmed", "Upcoming"]] = "Scheduled"
+
+    @field_validator('until')
+    @classmethod
+    def validate_until(cls, v: Optional[str]) -> Optional[str]:
+        """Validate the end date format"""
+        if v is not None:
+            parse_date(v)
+        return v
+
+    @field_validator('exceptions')
+    @classmethod
+    def validate_exceptions(cls, v: List[str]) -> List[str]:
+        """Validate each skipped date; duplicates are dropped"""
+        for date in v:
+            parse_date(date)
+        return sorted(set(v))
+
+    @model_validator(mode='after')
+    def validate_recurrence(self) -> "SeriesCreate":
+        """Exactly one end rule, at most MAX_OCCURRENCES occurrences, exceptions on occurrence dates"""
+        if (self.count is None) == (self.until is None):
+            raise ValueError("Give exactly one of count or until")
+        first_day = parse_date(self.date)
+        interval = FREQUENCY_DAYS[self.frequency]
+        if self.until is not None:
+            if parse_date(self.until) < first_day:
+                raise ValueError("until must not be before the first date")
+            if (parse_date(self.until) - first_day) // interval >= MAX_OCCURRENCES:
+                raise ValueError(f"A series has at most {MAX_OCCURRENCES} occurrences")
+        last_day = last_occurrence_day(first_day, interval, self.count, self.until)
+        for date in self.exceptions:
+            day = parse_date(date)
+            if not first_day <= day <= last_day or (day - first_day) % interval:
+                raise ValueError(f"Exception {date} is not an occurrence date")
+        return self
+
+    def occurrence_dates(self) -> List[str]:
+        """Every date the series covers, exceptions included"""
+        first_day = parse_date(self.date)
+        interval = FREQUENCY_DAYS[self.frequency]
+        last_day = last_occurrence_day(first_day, interval, self.count, self.until)
+        return [Date.fromordinal(day).isoformat() for day in range(first_day, last_day + 1, interval)]
+
+
+class AppointmentSeries:
+    """
+    Stored recurring series
+
+    A plain __slots__ record like Appointment, never mutated once stored.
+    Occurrences are Appointment records built on demand by occurrences()
+    with the id "<series id>/<date>"; nothing per occurrence is stored,
+    so a year of weekly visits costs one row, and counts over a window
+    are arithmetic. `day` / `last_day` are the first and last occurrence
+    ordinals and `skipped` the ordinals of the exceptions.
+    """
+
+    # Stored fields, in WAL / snapshot order
+    FIELDS = (
+        "id", "patient_name", "date", "time", "duration", "doctor_name", "status", "mode",
+        "frequency", "count", "until", "exceptions", "created_at"
+    )
+
+    __slots__ = FIELDS + ("day", "last_day", "interval", "start", "end", "skipped")
+
+    def __init__(
+        self,
+        id: str,
+        patient_name: str,
+        date: str,
+        time: str,
+        duration: int,
+        doctor_name: str,
+        status: str,
+        mode: str,
+        frequency: str,
+        count: Optional[int],
+        until: Optional[str],
+        exceptions: Tuple[str, ...],
+        created_at: str
+    ):
+        self.id = id
+        self.patient_name = patient_name
+        self.date = date
+        self.time = time
+        self.duration = duration
+        self.doctor_name = doctor_name
+        self.status = status
+        self.mode = mode
+        self.frequency = frequency
+        self.count = count
+        self.until = until
+        self.exceptions = tuple(exceptions)
+        self.created_at = created_at
+        self.day = parse_date(date)
+        self.interval = FREQUENCY_DAYS[frequency]
+        self.last_day = last_occurrence_day(self.day, self.interval, count, until)
+        self.start = parse_time(time)
+        self.end = self.start + duration
+        self.skipped = frozenset(parse_date(exception) for exception in self.exceptions)
+
+    def is_occurrence(self, day: int) -> bool:
+        """Whether the series has an occurrence on a date ordinal"""
+        return (
+            self.day <= day <= self.last_day
+            and (day - self.day) % self.interval == 0
+            and day not in self.skipped
+        )
+
+    def days(self, first_day: Optional[int] = None, last_day: Optional[int] = None) -> range:
+        """Occurrence ordinals within an inclusive window, exceptions included"""
+        first_day = self.day if first_day is None else max(first_day, self.day)
+        last_day = self.last_day if last_day is None else min(last_day, self.last_day)
+        # First step on or after first_day
+        first_day += -(first_day - self.day) % self.interval
+        return range(first_day, last_day + 1, self.interval)
+
+    def count_between(self, first_day: Optional[int] = None, last_day: Optional[int] = None) -> int:
+        """Occurrences within an inclusive window, counted without expanding them"""
+        days = self.days(first_day, last_day)
+        return len(days) - sum(1 for day in self.skipped if day in days)
+
+    def occurrence(self, day: int) -> Appointment:
+        """The occurrence on a date ordinal, as a stored-looking appointment record"""
+        date = Date.fromordinal(day).isoformat()
+        return Appointment(
+            id=occurrence_id(self.id, date),
+            patient_name=self.patient_name,
+            date=date,
+            time=self.time,
+            duration=self.duration,
+            doctor_name=self.doctor_name,
+            status=self.status,
+            mode=self.mode,
+            created_at=self.created_at
+        )
+
+    def occurrences(self, first_day: Optional[int] = None, last_day: Optional[int] = None) -> Iterator[Appointment]:
+        """Occurrences within an inclusive window in date order, built one at a time"""
+        for day in self.days(first_day, last_day):
+            if day not in self.skipped:
+                yield self.occurrence(day)
+
+    def replace(self, **changes: Any) -> "AppointmentSeries":
+        """Copy with some fields changed"""
+        fields = self.to_dict()
+        fields.update(changes)
+        return AppointmentSeries(**fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Field dict, as written to the WAL and snapshots"""
+        fields = {name: getattr(self, name) for name in self.FIELDS}
+        fields["exceptions"] = list(self.exceptions)
+        return fields
+
+    def __reduce__(self):
+        return AppointmentSeries, tuple(getattr(self, name) for name in self.FIELDS)
+
+    def __repr__(self) -> str:
+        return f"AppointmentSeries({', '.join(f'{name}={getattr(self, name)!r}' for name in self.FIELDS)})"
@@ -0,0 +1,56 @@
+"""
+Command-line build of the persisted operations manifest
+Run from backend/: python -m persisted_operations [SOURCE ...] [--output PATH]
+Serve it with GRAPHQL_PERSISTED_OPERATIONS=PATH (and GRAPHQL_ALLOWLIST=1 to refuse any other operation)
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+from graphql import GraphQLError
+
+from utils.persisted_queries import build_manifest
+
+DEFAULT_SOURCES = (os.path.join(os.path.dirname(__file__), "..", "frontend", "lib", "graphql", "operations.ts"),)
+DEFAULT_OUTPUT = "persisted-operations.json"
+
+# gql`...` template literals; operations.ts interpolates no fragments into them
+GQL_TEMPLATE = re.compile(r"\bgql\s*`([^`]*)`")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Hash the frontend's GraphQL operations into a persisted operations manifest")
+    parser.add_argument("sources", nargs="*", help="TypeScript files with gql`` documents (default: frontend/lib/graphql/operations.ts)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help=f"manifest path (default: {DEFAULT_OUTPUT})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    documents = []
+    for source in args.sources or DEFAULT_SOURCES:
+        with open(source, encoding="utf-8") as f:
+            text = f.read()
+        if "${" in text:
+            print(f"{source} interpolates into gql templates, which this extractor does not follow", file=sys.stderr)
+            return 2
+        documents.extend(GQL_TEMPLATE.findall(text))
+
+    try:
+        operations = build_manifest(documents)
+    except GraphQLError as error:
+        print(f"Invalid GraphQL document: {error.message}", file=sys.stderr)
+        return 2
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "operations": operations}, f, indent=2)
+        f.write("\n")
+    print(f"{len(operations)} operations written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Repository interface shared by every appointment storage backend
+AppointmentService only talks to storage through these methods
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models.appointment import Appointment
+
+
+class AppointmentRepository(ABC):
+    """Storage contract: keyed rows, conflict checks and ordered listings"""
+
+    # True when the backend keeps its own rows across restarts
+    durable = False
+    # True when calls wait on disk or another process, so async callers use threads
+    blocking = False
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored appointments"""
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[Appointment]:
+        """Every stored appointment"""
+
+    @abstractmethod
+    def get(self, appointment_id: str) -> Optional[Appointment]:
+        """Fetch one appointment by id"""
+
+    @abstractmethod
+    def put(self, appointment: Appointment) -> None:
+        """Insert an appointment (the id must not already exist)"""
+
+    @abstractmethod
+    def remove(self, appointment_id: str) -> Optional[Appointment]:
+        """Delete an appointment, returning its last state"""
+
+    @abstractmethod
+    def has_conflict(
+        self,
+        doctor_name: str,
+        date: str,
+        start: int,
+        end: int,
+        exclude_id: Optional[str] = None,
+        buffer_minutes: int = 5
+    ) -> bool:
+        """Whether [start, end) minutes clashes with the doctor's active appointments"""
+
+    @abstractmethod
+    def schedule(self, doctor_name: str, date: str) -> List[Tuple[int, int]]:
+        """The doctor's active (start, end) minutes that day, sorted by start"""
+
+    @abstractmethod
+    def query(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        after: Optional[Tuple[str, str, str]] = None,
+        limit: Optional[int] = None
+    ) -> List[Appointment]:
+        """Matching appointments in (date, time) order, optionally after a cursor"""
+
+    @abstractmethod
+    def count(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """Number of matching appointments"""
+
+    def estimate_count(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """Cheap upper bound on count(), for sizing queries before running them"""
+        return self.count(date, status, doctor_name, date_from, date_to)
+
+    def get_many(self, appointment_ids: List[str]) -> List[Optional[Appointment]]:
+        """Fetch appointments by id, None where missing; backends may override with a bulk path"""
+        return [self.get(appointment_id) for appointment_id in appointment_ids]
+
+    def put_many(self, appointments: Iterable[Appointment]) -> None:
+        """Insert many appointments; backends may override with a bulk path"""
+        for appointment in appointments:
+            self.put(appointment)
+
+    def put_many_if_free(self, appointments: List[Appointment], buffer_minutes: int = 5) -> List[bool]:
+        """
+        Insert the appointments that do not clash with the stored schedule
+
+        Each is checked against the store as it was before the call, so
+        the caller must already have dropped overlaps among them. Returns
+        one flag per appointment, True where it was inserted.
+        """
+        free = [
+            appointment.status == "Cancelled" or not self.has_conflict(
+                appointment.doctor_name, appointment.date, appointment.start, appointment.end, None, buffer_minutes
+            )
+            for appointment in appointments
+        ]
+        self.put_many([appointment for appointment, inserted in zip(appointments, free) if inserted])
+        return free
+
+    def replace(self, appointment: Appointment) -> Optional[Appointment]:
+        """
+        Overwrite an existing appointment, returning its previous state
+
+        Remove-then-put by default; if the new row cannot be stored the
+        previous one is put back before the error propagates, so a failed
+        replace never loses the row. Backends with transactions override it.
+        """
+        previous = self.remove(appointment.id)
+        if previous is not None:
+            try:
+                self.put(appointment)
+            except Exception:
+                self.put(previous)
+                raise
+        return previous
+
+    def insert_if_free(self, appointment: Appointment, buffer_minutes: int = 5) -> bool:
+        """
+        Insert unless the appointment clashes with the doctor's schedule
+
+        Backends with their own transactions override this so the check
+        and the insert are atomic.
+        """
+        if appointment.status != "Cancelled":
+            if self.has_conflict(appointment.doctor_name, appointment.date, appointment.start,
+                                 appointment.end, None, buffer_minutes):
+                return False
+        self.put(appointment)
+        return True
+
+    def index_sizes(self) -> Dict[str, int]:
+        """Entries per in-process index, for monitoring; empty when the backend keeps none"""
+        return {}
+
+    def close(self) -> None:
+        """Release backend resources"""
@@ -0,0 +1,414 @@
+"""
+Compact columnar appointment store
+Array-backed columns with interned names; Appointment records are built only when a row is read
+"""
+
+from array import array
+from bisect import bisect_left
+from datetime import date as Date, datetime, timedelta
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import uuid
+
+from models.appointment import STATUSES, Appointment
+from storage.base import AppointmentRepository
+from utils.conflict_detector import parse_timestamp, time_to_minutes
+from utils.metrics import observe_conflict_check
+
+MODES = ("In-person", "Video", "Phone")
+CANCELLED = STATUSES.index("Cancelled")
+
+# Sort keys pack (day, start minute, row) into one int64 so every ordered
+# index is a flat array('q') that bisect can search directly.
+_DAY_SHIFT = 40
+_START_SHIFT = 24
+_ROW_MASK = (1 << _START_SHIFT) - 1
+_MAX_DURATION = 255  # uint8 column bound
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _pack(day: int, start: int, row: int) -> int:
+    return (day << _DAY_SHIFT) | (start << _START_SHIFT) | row
+
+
+def _id_key(appointment_id: str) -> Union[bytes, str]:
+    """16 UUID bytes, or the id itself when it is not a UUID (e.g. a detached series occurrence)"""
+    try:
+        return uuid.UUID(appointment_id).bytes
+    except ValueError:
+        return appointment_id
+
+
+class _Interned:
+    """Append-only string table mapping values to small integer codes"""
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ColumnarAppointmentStore(AppointmentRepository):
+    """
+    Stores appointments as parallel typed arrays
+
+    Columns: int32 day ordinal, int16 start minute, uint8 duration, status
+    and mode codes, uint32 doctor/patient codes into interned name tables,
+    int64 created_at microseconds (offsets converted to UTC) and 16-byte
+    UUIDs (other ids, such as detached series occurrences, are kept as
+    strings). Deleted rows are recycled through a free list. Listing and conflict indexes are sorted
+    arrays of packed (day, start, row) keys; extra filters are checked
+    against the columns rather than per-index id sets.
+    """
+
+    def __init__(self):
+        self._day = array("i")
+        self._start = array("h")
+        self._duration = array("B")
+        self._status = array("B")
+        self._mode = array("B")
+        self._doctor = array("I")
+        self._patient = array("I")
+        self._created = array("q")
+        self._ids: List[Union[bytes, str, None]] = []
+        self._rows: Dict[Union[bytes, str], int] = {}
+        self._free: List[int] = []
+
+        self._doctors = _Interned()
+        self._patients = _Interned()
+
+        self._ordered = array("q")
+        self._by_status: List[array] = [array("q") for _ in STATUSES]
+        self._by_doctor: Dict[int, array] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[Appointment]:
+        return iter([self._materialize(key & _ROW_MASK) for key in self._ordered])
+
+    def index_sizes(self) -> Dict[str, int]:
+        """Packed keys in the ordered, per-status and per-doctor arrays"""
+        return {
+            "ordered": len(self._ordered),
+            "status": sum(len(keys) for keys in self._by_status),
+            "doctor": sum(len(keys) for keys in self._by_doctor.values()),
+        }
+
+    def _id(self, row: int) -> str:
+        key = self._ids[row]
+        if isinstance(key, str):
+            return key
+        # str(uuid.UUID(bytes=key)) without building the UUID object
+        h = key.hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+    def _materialize(self, row: int) -> Appointment:
+        """Build the API-edge record for one row"""
+        start = self._start[row]
+        return Appointment(
+            id=self._id(row),
+            patient_name=self._patients.values[self._patient[row]],
+            date=Date.fromordinal(self._day[row]).isoformat(),
+            time=f"{start // 60:02d}:{start % 60:02d}",
+            duration=self._duration[row],
+            doctor_name=self._doctors.values[self._doctor[row]],
+            status=STATUSES[self._status[row]],
+            mode=MODES[self._mode[row]],
+            created_at=(_EPOCH + self._created[row] * _MICROSECOND).isoformat(),
+        )
+
+    def _key(self, row: int) -> int:
+        return _pack(self._day[row], self._start[row], row)
+
+    def _row(self, appointment_id: str) -> Optional[int]:
+        return self._rows.get(_id_key(appointment_id))
+
+    def get(self, appointment_id: str) -> Optional[Appointment]:
+        """Fetch one appointment by id, materializing it on demand"""
+        row = self._row(appointment_id)
+        return None if row is None else self._materialize(row)
+
+    def put(self, appointment: Appointment) -> None:
+        """Encode an appointment into the columns and index it"""
+        id_key = _id_key(appointment.id)
+        values = (
+            appointment.day,
+            appointment.start,
+            appointment.duration,
+            STATUSES.index(appointment.status),
+            MODES.index(appointment.mode),
+            self._doctors.code(appointment.doctor_name),
+            self._patients.code(appointment.patient_name),
+            (parse_timestamp(appointment.created_at) - _EPOCH) // _MICROSECOND,
+        )
+        columns = (self._day, self._start, self._duration, self._status, self._mode,
+                   self._doctor, self._patient, self._created)
+
+        if self._free:
+            row = self._free.pop()
+            for column, value in zip(columns, values):
+                column[row] = value
+            self._ids[row] = id_key
+        else:
+            row = len(self._ids)
+            if row > _ROW_MASK:
+                raise ValueError("Columnar store is full")
+            for column, value in zip(columns, values):
+                column.append(value)
+            self._ids.append(id_key)
+        self._rows[id_key] = row
+
+        key = self._key(row)
+        for index in self._indexes(row):
+            index.insert(bisect_left(index, key), key)
+
+    def put_many(self, appointments: Iterable[Appointment]) -> None:
+        """Insert every appointment or none: rows stored before a failing one are removed again"""
+        stored = []
+        try:
+            for appointment in appointments:
+                self.put(appointment)
+                stored.append(appointment.id)
+        except Exception:
+            for appointment_id in stored:
+                self.remove(appointment_id)
+            raise
+
+    def remove(self, appointment_id: str) -> Optional[Appointment]:
+        """Delete a row, returning its last state"""
+        row = self._row(appointment_id)
+        if row is None:
+            return None
+        appointment = self._materialize(row)
+
+        key = self._key(row)
+        for index in self._indexes(row):
+            position = bisect_left(index, key)
+            if position < len(index) and index[position] == key:
+                del index[position]
+
+        del self._rows[self._ids[row]]
+        self._ids[row] = None
+        self._free.append(row)
+        return appointment
+
+    def _indexes(self, row: int) -> Tuple[array, array, array]:
+        doctor = self._doctor[row]
+        by_doctor = self._by_doctor.get(doctor)
+        if by_doctor is None:
+            by_doctor = self._by_doctor[doctor] = array("q")
+        return self._ordered, self._by_status[self._status[row]], by_doctor
+
+    def has_conflict(
+        self,
+        doctor_name: str,
+        date: str,
+        start: int,
+        end: int,
+        exclude_id: Optional[str] = None,
+        buffer_minutes: int = 5
+    ) -> bool:
+        """Scan only the doctor's keys that could overlap the padded interval"""
+        started = time.perf_counter()
+        doctor = self._doctors.codes.get(doctor_name)
+        keys = self._by_doctor.get(doctor) if doctor is not None else None
+        if not keys:
+            observe_conflict_check(time.perf_counter() - started, 0)
+            return False
+
+        day = Date.fromisoformat(date).toordinal()
+        gap = 2 * buffer_minutes
+        exclude_row = self._row(exclude_id) if exclude_id else None
+        lo = bisect_left(keys, _pack(day, max(start - gap - _MAX_DURATION, 0), 0))
+        hi = bisect_left(keys, _pack(day, end + gap, 0))
+        for position in range(lo, hi):
+            row = keys[position] & _ROW_MASK
+            if (self._status[row] != CANCELLED and row != exclude_row
+                    and self._start[row] + self._duration[row] > start - gap):
+                observe_conflict_check(time.perf_counter() - started, position - lo + 1)
+                return True
+        observe_conflict_check(time.perf_counter() - started, hi - lo)
+        return False
+
+    def schedule(self, doctor_name: str, date: str) -> List[Tuple[int, int]]:
+        """Busy intervals from the doctor's keys for that day"""
+        doctor = self._doctors.codes.get(doctor_name)
+        keys = self._by_doctor.get(doctor) if doctor is not None else None
+        if not keys:
+            return []
+        day = Date.fromisoformat(date).toordinal()
+        lo = bisect_left(keys, day << _DAY_SHIFT)
+        hi = bisect_left(keys, (day + 1) << _DAY_SHIFT)
+        intervals = []
+        for position in range(lo, hi):
+            row = keys[position] & _ROW_MASK
+            if self._status[row] != CANCELLED:
+                intervals.append((self._start[row], self._start[row] + self._duration[row]))
+        return intervals
+
+    def _plan(
+        self,
+        date: Optional[str],
+        status: Optional[str],
+        doctor_name: Optional[str],
+        date_from: Optional[str],
+        date_to: Optional[str]
+    ) -> Optional[Tuple[array, int, int, Optional[int], Optional[int]]]:
+        """
+        Pick the narrowest sorted index window for the filters
+
+        Returns (keys, lo, hi, status code, doctor code), or None when a
+        filter value has never been stored.
+        """
+        status_code = doctor_code = None
+        if status:
+            if status not in STATUSES:
+                return None
+            status_code = STATUSES.index(status)
+        if doctor_name:
+            doctor_code = self._doctors.codes.get(doctor_name)
+            if doctor_code is None:
+                return None
+
+        first_day = Date.fromisoformat(date_from).toordinal() if date_from else None
+        last_day = Date.fromisoformat(date_to).toordinal() if date_to else None
+        if date:
+            day = Date.fromisoformat(date).toordinal()
+            first_day = day if first_day is None else max(first_day, day)
+            last_day = day if last_day is None else min(last_day, day)
+
+        candidates = [self._ordered]
+        if status_code is not None:
+            candidates.append(self._by_status[status_code])
+        if doctor_code is not None:
+            candidates.append(self._by_doctor.get(doctor_code, array("q")))
+
+        best = None
+        for keys in candidates:
+            lo = bisect_left(keys, first_day << _DAY_SHIFT) if first_day is not None else 0
+            hi = bisect_left(keys, (last_day + 1) << _DAY_SHIFT) if last_day is not None else len(keys)
+            if best is None or hi - lo < best[2] - best[1]:
+                best = (keys, lo, hi)
+        return (*best, status_code, doctor_code)
+
+    def _iter_rows(
+        self,
+        plan,
+        after: Optional[Tuple[str, str, str]] = None,
+        ordered: bool = True
+    ) -> Iterator[int]:
+        """
+        Rows of the plan's window that pass its filters
+
+        Keys order rows sharing a (date, time) by row number; when ordered,
+        matching rows of such a run are re-sorted by id so listings follow
+        (date, time, id) like cursors and merged listings do.
+        """
+        keys, lo, hi, status_code, doctor_code = plan
+        after_slot = after_id = None
+        if after is not None:
+            after_date, after_time, after_id = after
+            after_slot = _pack(Date.fromisoformat(after_date).toordinal(), time_to_minutes(after_time), 0) >> _START_SHIFT
+            lo = max(lo, bisect_left(keys, after_slot << _START_SHIFT))
+        status, doctor = self._status, self._doctor
+        if not ordered and after_slot is None:
+            for position in range(lo, min(hi, len(keys))):
+                row = keys[position] & _ROW_MASK
+                if status_code is not None and status[row] != status_code:
+                    continue
+                if doctor_code is not None and doctor[row] != doctor_code:
+                    continue
+                yield row
+            return
+        run: List[int] = []  # matching rows of the current (date, time)
+        run_slot = None
+        for position in range(lo, min(hi, len(keys))):
+            key = keys[position]
+            row = key & _ROW_MASK
+            if status_code is not None and status[row] != status_code:
+                continue
+            if doctor_code is not None and doctor[row] != doctor_code:
+                continue
+            slot = key >> _START_SHIFT
+            if slot == run_slot:
+                run.append(row)
+                continue
+            if run:
+                yield from self._run_in_order(run, after_id if run_slot == after_slot else None)
+            run = [row]
+            run_slot = slot
+        if run:
+            yield from self._run_in_order(run, after_id if run_slot == after_slot else None)
+
+    def _run_in_order(self, rows: List[int], after_id: Optional[str]) -> List[int]:
+        """Rows of one (date, time) sorted by id, keeping only ids past after_id when given"""
+        if len(rows) == 1 and after_id is None:
+            return rows
+        ids = {row: self._id(row) for row in rows}
+        rows.sort(key=ids.__getitem__)
+        if after_id is not None:
+            rows = [row for row in rows if ids[row] > after_id]
+        return rows
+
+    def query(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        after: Optional[Tuple[str, str, str]] = None,
+        limit: Optional[int] = None
+    ) -> List[Appointment]:
+        """Matching appointments in (date, time, id) order; only returned rows are materialized"""
+        plan = self._plan(date, status, doctor_name, date_from, date_to)
+        if plan is None:
+            return []
+        result = []
+        for row in self._iter_rows(plan, after):
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(self._materialize(row))
+        return result
+
+    def count(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """Count matches; a bisection when one index covers every filter"""
+        plan = self._plan(date, status, doctor_name, date_from, date_to)
+        if plan is None:
+            return 0
+        keys, lo, hi, status_code, doctor_code = plan
+        covered = (status_code is None or keys is self._by_status[status_code]) and \
+            (doctor_code is None or keys is self._by_doctor.get(doctor_code))
+        if covered:
+            return max(hi - lo, 0)
+        return sum(1 for _ in self._iter_rows(plan, ordered=False))
+
+    def estimate_count(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """Size of the narrowest index window covering the filters"""
+        plan = self._plan(date, status, doctor_name, date_from, date_to)
+        return max(plan[2] - plan[1], 0) if plan else 0
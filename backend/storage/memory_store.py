@@ -0,0 +1,119 @@
+"""
+Default in-memory appointment store
+Dict of Appointment records plus the schedule and listing indexes
+"""
+
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models.appointment import Appointment
+from storage.base import AppointmentRepository
+from utils.interval_index import DoctorDayIntervalIndex
+from utils.query_index import AppointmentQueryIndex
+
+
+class MemoryAppointmentStore(AppointmentRepository):
+    """Stores each Appointment record keyed by id, as the service built it"""
+
+    def __init__(self):
+        self._appointments: Dict[str, Appointment] = {}
+        self._schedule = DoctorDayIntervalIndex()
+        self._index = AppointmentQueryIndex()
+
+    def __len__(self) -> int:
+        return len(self._appointments)
+
+    def __iter__(self) -> Iterator[Appointment]:
+        return iter(list(self._appointments.values()))
+
+    def index_sizes(self) -> Dict[str, int]:
+        """Keys in the listing index and intervals in the schedule index"""
+        return {"listing": len(self._index), "schedule": len(self._schedule)}
+
+    def get(self, appointment_id: str) -> Optional[Appointment]:
+        """Fetch one appointment by id"""
+        return self._appointments.get(appointment_id)
+
+    def put(self, appointment: Appointment) -> None:
+        """Insert an appointment and index it"""
+        self._appointments[appointment.id] = appointment
+        self._index.add(appointment.id, appointment.date, appointment.time, appointment.status, appointment.doctor_name)
+        if appointment.status != "Cancelled":
+            self._schedule.add(appointment.doctor_name, appointment.date, appointment.start, appointment.end, appointment.id)
+
+    def put_many(self, appointments: Iterable[Appointment]) -> None:
+        """Insert a batch, merging it into the listing indexes in one pass"""
+        appointments = list(appointments)
+        for appointment in appointments:
+            self._appointments[appointment.id] = appointment
+            if appointment.status != "Cancelled":
+                self._schedule.add(appointment.doctor_name, appointment.date, appointment.start, appointment.end, appointment.id)
+        self._index.add_many(
+            (appointment.id, appointment.date, appointment.time, appointment.status, appointment.doctor_name)
+            for appointment in appointments
+        )
+
+    def remove(self, appointment_id: str) -> Optional[Appointment]:
+        """Delete an appointment and its index entries, returning it"""
+        appointment = self._appointments.pop(appointment_id, None)
+        if appointment is None:
+            return None
+        self._index.remove(appointment.id, appointment.date, appointment.time, appointment.status, appointment.doctor_name)
+        if appointment.status != "Cancelled":
+            self._schedule.remove(appointment.doctor_name, appointment.date, appointment.start, appointment.end, appointment.id)
+        return appointment
+
+    def has_conflict(
+        self,
+        doctor_name: str,
+        date: str,
+        start: int,
+        end: int,
+        exclude_id: Optional[str] = None,
+        buffer_minutes: int = 5
+    ) -> bool:
+        """Check a proposed interval against the doctor's active appointments"""
+        return self._schedule.has_conflict(doctor_name, date, start, end, exclude_id, buffer_minutes)
+
+    def schedule(self, doctor_name: str, date: str) -> List[Tuple[int, int]]:
+        """Busy intervals straight from the doctor's day index"""
+        return [(start, end) for start, end, _ in self._schedule.intervals(doctor_name, date)]
+
+    def query(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        after: Optional[Tuple[str, str, str]] = None,
+        limit: Optional[int] = None
+    ) -> List[Appointment]:
+        """Matching appointments in (date, time) order, optionally after a cursor"""
+        keys = self._index.iter_keys(date, status, doctor_name, date_from, date_to, after)
+        appointments = self._appointments
+        # Reads take no lock: skip ids deleted after the index handed them out
+        rows = (appointments.get(key[2]) for key in keys)
+        return list(islice((appointment for appointment in rows if appointment is not None), limit))
+
+    def count(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """Count matches from the index without touching rows"""
+        return self._index.count(date, status, doctor_name, date_from, date_to)
+
+    def estimate_count(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """Size of the narrowest index window covering the filters"""
+        return self._index.estimate(date, status, doctor_name, date_from, date_to)
@@ -0,0 +1,192 @@
+"""
+In-memory store of recurring appointment series
+Series by id plus each doctor's series by weekday; occurrences are only expanded inside a queried window
+"""
+
+from collections import Counter
+from heapq import merge
+from itertools import dropwhile, islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from models.appointment import Appointment
+from models.series import AppointmentSeries
+from utils.conflict_detector import parse_date
+
+Window = Tuple[Optional[int], Optional[int]]  # inclusive date ordinals, None for unbounded
+
+
+def _sort_key(appointment: Appointment) -> Tuple[str, str, str]:
+    return appointment.date, appointment.time, appointment.id
+
+
+def _window(date: Optional[str], date_from: Optional[str], date_to: Optional[str]) -> Optional[Window]:
+    """Ordinal bounds of the date filters, None when a filter is not a real date (nothing matches)"""
+    try:
+        bounds_from = [parse_date(bound) for bound in (date, date_from) if bound]
+        bounds_to = [parse_date(bound) for bound in (date, date_to) if bound]
+    except ValueError:
+        return None
+    return max(bounds_from, default=None), min(bounds_to, default=None)
+
+
+class SeriesStore:
+    """
+    Recurring series, indexed for conflict checks and windowed listings
+
+    Every occurrence of a series falls on the same weekday (intervals are
+    whole weeks), so each doctor's series are bucketed by weekday: a
+    conflict check for one day only looks at that bucket, and a new
+    series is compared with the doctor's series on its weekday only.
+    """
+
+    def __init__(self):
+        self._series: Dict[str, AppointmentSeries] = {}
+        self._by_doctor: Dict[str, List[List[AppointmentSeries]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def __iter__(self) -> Iterator[AppointmentSeries]:
+        return iter(list(self._series.values()))
+
+    def get(self, series_id: str) -> Optional[AppointmentSeries]:
+        """Fetch one series by id"""
+        return self._series.get(series_id)
+
+    def put(self, series: AppointmentSeries) -> None:
+        """Insert a series, or replace the stored one with the same id"""
+        self.remove(series.id)
+        self._series[series.id] = series
+        weekdays = self._by_doctor.get(series.doctor_name)
+        if weekdays is None:
+            weekdays = self._by_doctor[series.doctor_name] = [[] for _ in range(7)]
+        weekdays[series.day % 7].append(series)
+
+    def remove(self, series_id: str) -> Optional[AppointmentSeries]:
+        """Delete a series, returning its last state"""
+        series = self._series.pop(series_id, None)
+        if series is None:
+            return None
+        weekdays = self._by_doctor[series.doctor_name]
+        weekdays[series.day % 7].remove(series)
+        if not any(weekdays):
+            del self._by_doctor[series.doctor_name]
+        return series
+
+    def doctor_names(self) -> List[str]:
+        """Doctors with at least one series"""
+        return list(self._by_doctor)
+
+    def _on_day(self, doctor_name: str, day: int) -> List[AppointmentSeries]:
+        weekdays = self._by_doctor.get(doctor_name)
+        if weekdays is None:
+            return []
+        return [series for series in weekdays[day % 7] if series.is_occurrence(day)]
+
+    def has_conflict(self, doctor_name: str, date: str, start: int, end: int, buffer_minutes: int = 5) -> bool:
+        """Whether [start, end) minutes clashes with an occurrence that day; both sides padded as elsewhere"""
+        gap = 2 * buffer_minutes
+        return any(
+            series.start < end + gap and series.end > start - gap
+            for series in self._on_day(doctor_name, parse_date(date))
+        )
+
+    def schedule(self, doctor_name: str, date: str) -> List[Tuple[int, int]]:
+        """The doctor's (start, end) occurrence minutes that day, sorted by start"""
+        return sorted((series.start, series.end) for series in self._on_day(doctor_name, parse_date(date)))
+
+    def conflicting_series(
+        self,
+        series: AppointmentSeries,
+        buffer_minutes: int = 5
+    ) -> Optional[Tuple[int, AppointmentSeries]]:
+        """
+        First (day, other series) where another of the doctor's series clashes with this one
+
+        Only series on the same weekday whose times overlap are walked,
+        and only over the days both are running.
+        """
+        weekdays = self._by_doctor.get(series.doctor_name)
+        if weekdays is None:
+            return None
+        gap = 2 * buffer_minutes
+        for other in weekdays[series.day % 7]:
+            if other.id == series.id or not (other.start < series.end + gap and other.end > series.start - gap):
+                continue
+            for day in series.days(other.day, other.last_day):
+                if day not in series.skipped and other.is_occurrence(day):
+                    return day, other
+        return None
+
+    def _matching(self, status: Optional[str], doctor_name: Optional[str]) -> List[AppointmentSeries]:
+        if doctor_name:
+            candidates = [series for weekday in self._by_doctor.get(doctor_name, ()) for series in weekday]
+        else:
+            candidates = list(self._series.values())
+        return [series for series in candidates if not status or series.status == status]
+
+    def query(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        after: Optional[Tuple[str, str, str]] = None,
+        limit: Optional[int] = None
+    ) -> List[Appointment]:
+        """
+        Matching occurrences in (date, time, id) order, optionally after a cursor
+
+        Each series yields its occurrences lazily from the start of the
+        window (or the cursor's date); the streams are merged and cut at
+        limit, so a page only builds about limit occurrences.
+        """
+        if not self._series:
+            return []
+        window = _window(date, date_from, date_to)
+        if window is None:
+            return []
+        first_day, last_day = window
+        if after is not None:
+            first_day = max(first_day or 0, parse_date(after[0]))
+        occurrences = merge(
+            *(series.occurrences(first_day, last_day) for series in self._matching(status, doctor_name)),
+            key=_sort_key
+        )
+        if after is not None:
+            occurrences = dropwhile(lambda appointment: _sort_key(appointment) <= after, occurrences)
+        return list(islice(occurrences, limit))
+
+    def count(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """Number of matching occurrences, counted per series without expanding them"""
+        if not self._series:
+            return 0
+        window = _window(date, date_from, date_to)
+        if window is None:
+            return 0
+        return sum(series.count_between(*window) for series in self._matching(status, doctor_name))
+
+    def tally(
+        self,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        doctor_name: Optional[str] = None
+    ) -> Counter:
+        """Occurrences per (status, mode) over an inclusive date range, as the stats counters key them"""
+        counts: Counter = Counter()
+        window = _window(None, date_from, date_to) if self._series else None
+        if window is None:
+            return counts
+        for series in self._matching(None, doctor_name):
+            occurrences = series.count_between(*window)
+            if occurrences:
+                counts[(series.status, series.mode)] += occurrences
+        return counts
@@ -0,0 +1,290 @@
+"""
+Doctor-sharded appointment store
+Partitions appointments by doctor across worker processes, each holding its own in-memory store
+"""
+
+from heapq import merge
+from itertools import islice
+from multiprocessing.connection import Connection
+from operator import attrgetter
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import zlib
+
+from models.appointment import Appointment
+from storage.base import AppointmentRepository
+from storage.memory_store import MemoryAppointmentStore
+
+# Listing order, as every shard's index keeps it
+_listing_key = attrgetter("date", "time", "id")
+# Shards run `python -m storage.sharded_store` from here
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _serve(connection: Connection) -> None:
+    """Shard process: apply (method, args) requests to a local store until the router hangs up"""
+    # Ctrl-C reaches the whole process group; shards exit when the router closes its end
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    store = MemoryAppointmentStore()
+    while True:
+        try:
+            method, args = connection.recv()
+        except EOFError:
+            return
+        try:
+            reply = None, getattr(store, method)(*args)
+        except Exception as e:
+            reply = e, None
+        connection.send(reply)
+
+
+class ShardedAppointmentStore(AppointmentRepository):
+    """
+    Routes each appointment to the shard process owning its doctor
+
+    A doctor's appointments all live in one shard (crc32 of the name, so
+    placement is stable across restarts), which keeps conflict checks,
+    insert_if_free and schedules shard-local: one round trip, atomic
+    inside the shard. Listings without a doctor filter go to every shard
+    at once and their pages, each already in (date, time, id) order, are
+    k-way merged. The router keeps only id -> shard, for lookups by id.
+
+    Shards are started as fresh interpreters, not multiprocessing
+    children, so they never re-import the caller's __main__ (and with it
+    the service singleton). Each serves one request at a time over a Unix
+    socket pair, guarded by a lock; scatter calls take the locks in shard
+    order, send to every shard and only then collect the replies, so
+    shards work in parallel.
+
+    Only storage is spread out. The app process stays the single router
+    and keeps the WAL, stats, caches and subscriptions, so uvicorn must
+    still run with one worker; several would each start their own shards.
+    """
+
+    blocking = True
+
+    def __init__(self, shards: int):
+        if shards < 1:
+            raise ValueError("A sharded store needs at least one shard")
+        self._connections: List[Connection] = []
+        self._processes: List[subprocess.Popen] = []
+        for _ in range(shards):
+            router_end, shard_end = socket.socketpair()
+            with shard_end:
+                self._processes.append(subprocess.Popen(
+                    [sys.executable, "-m", "storage.sharded_store", str(shard_end.fileno())],
+                    pass_fds=(shard_end.fileno(),),
+                    cwd=_BACKEND_DIR
+                ))
+            self._connections.append(Connection(router_end.detach()))
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._shard_by_id: Dict[str, int] = {}
+
+    @property
+    def shards(self) -> int:
+        return len(self._connections)
+
+    def _shard_of(self, doctor_name: str) -> int:
+        return zlib.crc32(doctor_name.encode()) % len(self._connections)
+
+    @staticmethod
+    def _reply(connection) -> Any:
+        error, result = connection.recv()
+        if error is not None:
+            raise error
+        return result
+
+    def _call(self, shard: int, method: str, *args) -> Any:
+        with self._locks[shard]:
+            connection = self._connections[shard]
+            connection.send((method, args))
+            return self._reply(connection)
+
+    def _scatter(self, requests: Dict[int, Tuple[str, tuple]]) -> Dict[int, Any]:
+        """Send {shard: (method, args)} to every shard, then gather {shard: result}"""
+        shards = sorted(requests)
+        for shard in shards:
+            self._locks[shard].acquire()
+        try:
+            for shard in shards:
+                self._connections[shard].send(requests[shard])
+            # Drain every reply before raising, so no pipe is left out of step
+            replies = {shard: self._connections[shard].recv() for shard in shards}
+        finally:
+            for shard in shards:
+                self._locks[shard].release()
+        for error, _ in replies.values():
+            if error is not None:
+                raise error
+        return {shard: result for shard, (_, result) in replies.items()}
+
+    def _broadcast(self, method: str, *args) -> List[Any]:
+        results = self._scatter({shard: (method, args) for shard in range(len(self._connections))})
+        return [results[shard] for shard in range(len(self._connections))]
+
+    def __len__(self) -> int:
+        return len(self._shard_by_id)
+
+    def __iter__(self) -> Iterator[Appointment]:
+        return iter(self.query())
+
+    def index_sizes(self) -> Dict[str, int]:
+        """Index entries summed over the shards"""
+        sizes: Dict[str, int] = {}
+        for shard_sizes in self._broadcast("index_sizes"):
+            for name, size in shard_sizes.items():
+                sizes[name] = sizes.get(name, 0) + size
+        return sizes
+
+    def get(self, appointment_id: str) -> Optional[Appointment]:
+        """Fetch one appointment from the shard that stored it"""
+        shard = self._shard_by_id.get(appointment_id)
+        return None if shard is None else self._call(shard, "get", appointment_id)
+
+    def get_many(self, appointment_ids: List[str]) -> List[Optional[Appointment]]:
+        """One get_many per shard holding any of the ids, all shards at once"""
+        groups: Dict[int, List[Tuple[int, str]]] = {}
+        for position, appointment_id in enumerate(appointment_ids):
+            shard = self._shard_by_id.get(appointment_id)
+            if shard is not None:
+                groups.setdefault(shard, []).append((position, appointment_id))
+        results = self._scatter({shard: ("get_many", ([i for _, i in group],)) for shard, group in groups.items()})
+        found: List[Optional[Appointment]] = [None] * len(appointment_ids)
+        for shard, group in groups.items():
+            for (position, _), appointment in zip(group, results[shard]):
+                found[position] = appointment
+        return found
+
+    def put(self, appointment: Appointment) -> None:
+        """Insert into the doctor's shard"""
+        shard = self._shard_of(appointment.doctor_name)
+        self._call(shard, "put", appointment)
+        self._shard_by_id[appointment.id] = shard
+
+    def _partition(self, appointments: Iterable[Appointment]) -> Dict[int, List[Tuple[int, Appointment]]]:
+        groups: Dict[int, List[Tuple[int, Appointment]]] = {}
+        for position, appointment in enumerate(appointments):
+            groups.setdefault(self._shard_of(appointment.doctor_name), []).append((position, appointment))
+        return groups
+
+    def put_many(self, appointments: Iterable[Appointment]) -> None:
+        """One bulk insert per shard, all shards at once"""
+        groups = self._partition(appointments)
+        self._scatter({shard: ("put_many", ([apt for _, apt in group],)) for shard, group in groups.items()})
+        for shard, group in groups.items():
+            for _, appointment in group:
+                self._shard_by_id[appointment.id] = shard
+
+    def put_many_if_free(self, appointments: List[Appointment], buffer_minutes: int = 5) -> List[bool]:
+        """Each shard checks and inserts its own doctors' rows, all shards at once"""
+        groups = self._partition(appointments)
+        results = self._scatter({
+            shard: ("put_many_if_free", ([apt for _, apt in group], buffer_minutes))
+            for shard, group in groups.items()
+        })
+        inserted = [False] * len(appointments)
+        for shard, group in groups.items():
+            for (position, appointment), free in zip(group, results[shard]):
+                if free:
+                    inserted[position] = True
+                    self._shard_by_id[appointment.id] = shard
+        return inserted
+
+    def insert_if_free(self, appointment: Appointment, buffer_minutes: int = 5) -> bool:
+        """Check and insert in one round trip to the doctor's shard"""
+        shard = self._shard_of(appointment.doctor_name)
+        inserted = self._call(shard, "insert_if_free", appointment, buffer_minutes)
+        if inserted:
+            self._shard_by_id[appointment.id] = shard
+        return inserted
+
+    def remove(self, appointment_id: str) -> Optional[Appointment]:
+        """Delete from the shard that stored it"""
+        shard = self._shard_by_id.get(appointment_id)
+        if shard is None:
+            return None
+        removed = self._call(shard, "remove", appointment_id)
+        # Forgotten only once the shard dropped it: if the call fails the
+        # row is still there and must stay reachable
+        del self._shard_by_id[appointment_id]
+        return removed
+
+    def has_conflict(
+        self,
+        doctor_name: str,
+        date: str,
+        start: int,
+        end: int,
+        exclude_id: Optional[str] = None,
+        buffer_minutes: int = 5
+    ) -> bool:
+        """Checked by the doctor's shard alone"""
+        return self._call(self._shard_of(doctor_name), "has_conflict", doctor_name, date, start, end, exclude_id, buffer_minutes)
+
+    def schedule(self, doctor_name: str, date: str) -> List[Tuple[int, int]]:
+        """Busy intervals from the doctor's shard"""
+        return self._call(self._shard_of(doctor_name), "schedule", doctor_name, date)
+
+    def query(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        after: Optional[Tuple[str, str, str]] = None,
+        limit: Optional[int] = None
+    ) -> List[Appointment]:
+        """One doctor's shard, or up to `limit` rows from every shard merged in (date, time, id) order"""
+        args = (date, status, doctor_name, date_from, date_to, after, limit)
+        if doctor_name:
+            return self._call(self._shard_of(doctor_name), "query", *args)
+        pages = self._broadcast("query", *args)
+        return list(islice(merge(*pages, key=_listing_key), limit))
+
+    def count(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """Counted by the doctor's shard, or summed over all of them"""
+        return self._sum("count", (date, status, doctor_name, date_from, date_to))
+
+    def estimate_count(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """Estimated by the doctor's shard, or summed over all of them"""
+        return self._sum("estimate_count", (date, status, doctor_name, date_from, date_to))
+
+    def _sum(self, method: str, args: tuple) -> int:
+        doctor_name = args[2]
+        if doctor_name:
+            return self._call(self._shard_of(doctor_name), method, *args)
+        return sum(self._broadcast(method, *args))
+
+    def close(self) -> None:
+        """Hang up on every shard and wait for it to exit"""
+        for connection in self._connections:
+            connection.close()
+        for process in self._processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+if __name__ == "__main__":
+    _serve(Connection(int(sys.argv[1])))
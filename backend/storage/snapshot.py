@@ -0,0 +1,431 @@
+"""
+Shared-memory read snapshots of the appointment store
+The writer publishes immutable columnar files that reader processes mmap and query without IPC
+"""
+
+from array import array
+from bisect import bisect_left
+from datetime import date as Date
+from functools import lru_cache
+from itertools import accumulate
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from models.appointment import Appointment
+from storage.columnar_store import MODES, STATUSES
+from utils.availability import minutes_to_time
+
+SNAPSHOT_FILE = "appointments.snapshot"
+HEAD_FILE = "appointments.head"
+# tmpfs, so "files" are shared memory pages; elsewhere the page cache serves the same role
+DEFAULT_SNAPSHOT_DIR = "/dev/shm/appointments" if os.path.isdir("/dev/shm") else "appointment-snapshots"
+# Writes wait at most this long (plus one rebuild) before readers see them
+DEFAULT_PUBLISH_INTERVAL = 0.5
+# Readers refuse to answer from a snapshot further behind the writer than this
+DEFAULT_MAX_STALENESS = 5.0
+_POLL_SECONDS = 0.01
+
+_MAGIC = b"APTSNAP1"
+_MINUTE_BITS = 11  # a key is day << 11 | start minute, and start < 1440 < 2**11
+
+# Sections in file order; rows are sorted by (date, time, id), so row
+# numbers are listing positions and the *_rows indexes list them ascending
+_SECTIONS = (
+    ("keys", "q"),
+    ("duration", "H"),
+    ("status", "B"),
+    ("mode", "B"),
+    ("doctor", "I"),
+    ("id_offsets", "I"), ("id_blob", "B"),
+    ("patient_offsets", "I"), ("patient_blob", "B"),
+    ("created_offsets", "I"), ("created_blob", "B"),
+    ("doctor_name_offsets", "I"), ("doctor_name_blob", "B"),
+    ("doctor_starts", "I"), ("doctor_rows", "I"),  # rows of doctor d: doctor_rows[starts[d]:starts[d + 1]]
+    ("status_starts", "I"), ("status_rows", "I"),
+    ("id_order", "I"),  # rows sorted by id
+)
+# magic, write version, published at (unix time), rows, then (offset, length) per section
+_HEADER = struct.Struct("<8sQdQ" + "QQ" * len(_SECTIONS))
+# seqlock counter, latest write version, unix time of the oldest unpublished write (0 when none)
+_HEAD = struct.Struct("<QQd")
+
+
+class Staleness(NamedTuple):
+    writes: int  # writes the writer has applied that the snapshot lacks
+    seconds: float  # how long the oldest of them has been waiting
+
+
+@lru_cache(maxsize=4096)
+def _iso_date(day: int) -> str:
+    return Date.fromordinal(day).isoformat()
+
+
+def _strings(values: List[str]) -> Tuple[array, bytes]:
+    """Offsets and UTF-8 blob for a string column"""
+    encoded = [value.encode() for value in values]
+    offsets = array("I", [0])
+    offsets.extend(accumulate(map(len, encoded)))
+    return offsets, b"".join(encoded)
+
+
+def _grouped(codes: array, groups: int) -> Tuple[array, array]:
+    """CSR index: for each code, the ascending rows holding it"""
+    members: List[List[int]] = [[] for _ in range(groups)]
+    for row, code in enumerate(codes):
+        members[code].append(row)
+    starts = array("I", [0])
+    rows = array("I")
+    for group in members:
+        rows.extend(group)
+        starts.append(len(rows))
+    return starts, rows
+
+
+def write_snapshot(path: str, version: int, appointments: List[Appointment]) -> None:
+    """
+    Encode appointments as a columnar snapshot and swap it in atomically
+
+    The file is written beside `path` and renamed over it, so readers
+    opening `path` see either the previous snapshot or this one, whole.
+    Readers still mapping the previous file keep it until they let go.
+    """
+    rows = sorted(appointments, key=lambda apt: (apt.date, apt.time, apt.id))
+    doctor_codes: Dict[str, int] = {}
+    for apt in rows:
+        doctor_codes.setdefault(apt.doctor_name, len(doctor_codes))
+
+    columns = {
+        "keys": array("q", [apt.day << _MINUTE_BITS | apt.start for apt in rows]),
+        "duration": array("H", [apt.duration for apt in rows]),
+        "status": array("B", [STATUSES.index(apt.status) for apt in rows]),
+        "mode": array("B", [MODES.index(apt.mode) for apt in rows]),
+        "doctor": array("I", [doctor_codes[apt.doctor_name] for apt in rows]),
+    }
+    ids = [apt.id for apt in rows]
+    columns["id_offsets"], columns["id_blob"] = _strings(ids)
+    columns["patient_offsets"], columns["patient_blob"] = _strings([apt.patient_name for apt in rows])
+    columns["created_offsets"], columns["created_blob"] = _strings([apt.created_at for apt in rows])
+    columns["doctor_name_offsets"], columns["doctor_name_blob"] = _strings(list(doctor_codes))
+    columns["doctor_starts"], columns["doctor_rows"] = _grouped(columns["doctor"], len(doctor_codes))
+    columns["status_starts"], columns["status_rows"] = _grouped(columns["status"], len(STATUSES))
+    columns["id_order"] = array("I", sorted(range(len(ids)), key=ids.__getitem__))
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(bytes(_HEADER.size))
+        layout = []
+        for name, _ in _SECTIONS:
+            data = columns[name]
+            data = data.tobytes() if isinstance(data, array) else data
+            f.write(bytes(-f.tell() % 8))  # keep every section 8-byte aligned
+            layout.extend((f.tell(), len(data)))
+            f.write(data)
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, version, time.time(), len(rows), *layout))
+    os.replace(temporary, path)
+
+
+class Snapshot:
+    """
+    One published snapshot, mapped read-only
+
+    Columns are memoryviews straight over the mapping; nothing is copied
+    until a row is returned, which builds its Appointment record.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.inode = os.fstat(f.fileno()).st_ino
+        view = memoryview(self._map)
+        magic, self.version, self.published_at, self.rows, *layout = _HEADER.unpack_from(view)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not an appointment snapshot")
+        for (name, typecode), offset, length in zip(_SECTIONS, layout[::2], layout[1::2]):
+            setattr(self, f"_{name}", view[offset:offset + length].cast(typecode))
+        doctor_names = self._column_strings(self._doctor_name_offsets, self._doctor_name_blob)
+        self._doctor_names = doctor_names
+        self._doctor_codes = {name: code for code, name in enumerate(doctor_names)}
+
+    @staticmethod
+    def _column_strings(offsets, blob) -> List[str]:
+        return [str(blob[offsets[i]:offsets[i + 1]], "utf-8") for i in range(len(offsets) - 1)]
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _id(self, row: int) -> str:
+        return str(self._id_blob[self._id_offsets[row]:self._id_offsets[row + 1]], "utf-8")
+
+    def _appointment(self, row: int) -> Appointment:
+        key = self._keys[row]
+        return Appointment(
+            self._id(row),
+            str(self._patient_blob[self._patient_offsets[row]:self._patient_offsets[row + 1]], "utf-8"),
+            _iso_date(key >> _MINUTE_BITS),
+            minutes_to_time(key & ((1 << _MINUTE_BITS) - 1)),
+            self._duration[row],
+            self._doctor_names[self._doctor[row]],
+            STATUSES[self._status[row]],
+            MODES[self._mode[row]],
+            str(self._created_blob[self._created_offsets[row]:self._created_offsets[row + 1]], "utf-8"),
+        )
+
+    def get(self, appointment_id: str) -> Optional[Appointment]:
+        """Binary search of the id index"""
+        order = self._id_order
+        lo, hi = 0, len(order)
+        while lo < hi:
+            middle = (lo + hi) // 2
+            if self._id(order[middle]) < appointment_id:
+                lo = middle + 1
+            else:
+                hi = middle
+        if lo < len(order) and self._id(order[lo]) == appointment_id:
+            return self._appointment(order[lo])
+        return None
+
+    def _plan(
+        self,
+        date: Optional[str],
+        status: Optional[str],
+        doctor_name: Optional[str],
+        date_from: Optional[str],
+        date_to: Optional[str],
+        after: Optional[Tuple[str, str, str]]
+    ):
+        """
+        Narrowest row list for the filters, as in ColumnarAppointmentStore
+
+        Returns (rows, lo, hi, status code, doctor code) where rows is the
+        whole table (None) or one index's ascending row list, and [lo, hi)
+        the slice of it inside the date window; None when nothing matches.
+        """
+        status_code = doctor_code = None
+        if status:
+            if status not in STATUSES:
+                return None
+            status_code = STATUSES.index(status)
+        if doctor_name:
+            doctor_code = self._doctor_codes.get(doctor_name)
+            if doctor_code is None:
+                return None
+
+        first_day = Date.fromisoformat(date_from).toordinal() if date_from else None
+        last_day = Date.fromisoformat(date_to).toordinal() if date_to else None
+        if date:
+            day = Date.fromisoformat(date).toordinal()
+            first_day = day if first_day is None else max(first_day, day)
+            last_day = day if last_day is None else min(last_day, day)
+        keys = self._keys
+        first = bisect_left(keys, first_day << _MINUTE_BITS) if first_day is not None else 0
+        last = bisect_left(keys, (last_day + 1) << _MINUTE_BITS) if last_day is not None else len(keys)
+        if after is not None:
+            after_date, after_time, after_id = after
+            after_key = Date.fromisoformat(after_date).toordinal() << _MINUTE_BITS | _minutes(after_time)
+            position = bisect_left(keys, after_key)
+            while position < len(keys) and keys[position] == after_key and self._id(position) <= after_id:
+                position += 1
+            first = max(first, position)
+        last = max(last, first)
+
+        best = (None, first, last)
+        for starts, members, code in ((self._status_starts, self._status_rows, status_code),
+                                      (self._doctor_starts, self._doctor_rows, doctor_code)):
+            if code is None:
+                continue
+            rows = members[starts[code]:starts[code + 1]]
+            lo, hi = bisect_left(rows, first), bisect_left(rows, last)
+            if hi - lo < best[2] - best[1]:
+                best = (rows, lo, hi)
+        return (*best, status_code, doctor_code)
+
+    def _iter_rows(self, plan) -> Iterator[int]:
+        rows, lo, hi, status_code, doctor_code = plan
+        for position in range(lo, hi):
+            row = position if rows is None else rows[position]
+            if status_code is not None and self._status[row] != status_code:
+                continue
+            if doctor_code is not None and self._doctor[row] != doctor_code:
+                continue
+            yield row
+
+    def query(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        after: Optional[Tuple[str, str, str]] = None,
+        limit: Optional[int] = None
+    ) -> List[Appointment]:
+        """Matching appointments in (date, time, id) order"""
+        plan = self._plan(date, status, doctor_name, date_from, date_to, after)
+        if plan is None:
+            return []
+        result = []
+        for row in self._iter_rows(plan):
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(self._appointment(row))
+        return result
+
+    def count(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """Count matches; a bisection when one index covers every filter"""
+        plan = self._plan(date, status, doctor_name, date_from, date_to, None)
+        if plan is None:
+            return 0
+        rows, lo, hi, status_code, doctor_code = plan
+        if rows is None and status_code is None and doctor_code is None:
+            return hi - lo
+        if rows is not None and (status_code is None or doctor_code is None):
+            return hi - lo  # the one filter is the index driving the plan
+        return sum(1 for _ in self._iter_rows(plan))
+
+
+def _minutes(time_: str) -> int:
+    hours, minutes = time_.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class _Head:
+    """
+    The writer's latest write version, in a small file both sides map
+
+    Updated in place under a seqlock: the counter is odd while a write is
+    in progress, and readers retry until they see the same even value on
+    both sides of their read.
+    """
+
+    def __init__(self, path: str, writable: bool):
+        if writable and not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(bytes(_HEAD.size))
+        with open(path, "r+b" if writable else "rb") as f:
+            self._map = mmap.mmap(f.fileno(), _HEAD.size, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+
+    def write(self, version: int, dirty_since: float) -> None:
+        sequence = _HEAD.unpack_from(self._map)[0]
+        self._map[:8] = struct.pack("<Q", sequence + 1)
+        self._map[8:] = _HEAD.pack(sequence + 1, version, dirty_since)[8:]
+        self._map[:8] = struct.pack("<Q", sequence + 2)
+
+    def read(self) -> Tuple[int, float]:
+        while True:
+            before, version, dirty_since = _HEAD.unpack_from(self._map)
+            if before % 2 == 0 and _HEAD.unpack_from(self._map)[0] == before:
+                return version, dirty_since
+
+
+class SnapshotPublisher:
+    """
+    Writer side: republishes the service's rows whenever they change
+
+    A background thread polls the service's write version. The first
+    change since the last publish is stamped into the head file, so
+    readers can tell how long they have been missing writes; a new
+    snapshot follows once `interval` seconds have passed since the last
+    one. Staleness is therefore bounded by the interval plus the time to
+    encode the store.
+    """
+
+    def __init__(self, service, directory: str = DEFAULT_SNAPSHOT_DIR, interval: float = DEFAULT_PUBLISH_INTERVAL):
+        os.makedirs(directory, exist_ok=True)
+        self.service = service
+        self.path = os.path.join(directory, SNAPSHOT_FILE)
+        self.interval = interval
+        self._head = _Head(os.path.join(directory, HEAD_FILE), writable=True)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="snapshot-publisher", daemon=True)
+        self.published_version: Optional[int] = None
+        self.publish_seconds = 0.0
+
+    def start(self) -> "SnapshotPublisher":
+        self.publish()
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def publish(self) -> None:
+        """Encode the current rows and swap them in"""
+        started = time.perf_counter()
+        version, rows = self.service.snapshot_rows()
+        write_snapshot(self.path, version, rows)
+        self.published_version = version
+        self.publish_seconds = time.perf_counter() - started
+        latest = self.service.write_version
+        # Writes that landed while encoding are still unpublished
+        self._head.write(latest, 0.0 if latest == version else time.time() - self.publish_seconds)
+
+    def _run(self) -> None:
+        last_publish = time.monotonic()
+        while not self._stopped.wait(_POLL_SECONDS):
+            latest = self.service.write_version
+            if latest == self.published_version:
+                continue
+            seen, dirty_since = self._head.read()
+            if seen != latest:
+                self._head.write(latest, dirty_since or time.time())
+            if time.monotonic() - last_publish >= self.interval:
+                self.publish()
+                last_publish = time.monotonic()
+
+
+class SnapshotReader:
+    """
+    Reader side: the newest published snapshot and how far behind it is
+
+    current() re-maps the snapshot file when its inode changes (the
+    writer renames a new one over it), so a swap costs readers one stat
+    per call and a mapping per publish.
+    """
+
+    def __init__(self, directory: str = DEFAULT_SNAPSHOT_DIR, max_staleness: float = DEFAULT_MAX_STALENESS):
+        self.path = os.path.join(directory, SNAPSHOT_FILE)
+        self.head_path = os.path.join(directory, HEAD_FILE)
+        self.max_staleness = max_staleness
+        self._snapshot: Optional[Snapshot] = None
+        self._head: Optional[_Head] = None
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[Snapshot]:
+        """Latest snapshot, or None before the writer's first publish"""
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return self._snapshot
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.inode != inode:
+            with self._lock:
+                if self._snapshot is None or self._snapshot.inode != inode:
+                    self._snapshot = Snapshot(self.path)
+                snapshot = self._snapshot
+        return snapshot
+
+    def staleness(self, snapshot: Snapshot) -> Staleness:
+        """Writes applied by the writer but missing from snapshot, and their age"""
+        if self._head is None:
+            self._head = _Head(self.head_path, writable=False)
+        latest, dirty_since = self._head.read()
+        if latest <= snapshot.version:
+            return Staleness(0, 0.0)
+        return Staleness(latest - snapshot.version, max(time.time() - dirty_since, 0.0) if dirty_since else 0.0)
+
+
+def snapshot_dir_from_env() -> str:
+    return os.getenv("APPOINTMENT_SNAPSHOT_DIR") or DEFAULT_SNAPSHOT_DIR
@@ -0,0 +1,283 @@
+"""
+SQLite appointment store
+Durable local database with indexed conflict checks and keyset pagination
+"""
+
+from contextlib import contextmanager
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from models.appointment import Appointment
+from storage.base import AppointmentRepository
+from utils.metrics import observe_conflict_check
+
+# anyio's default worker thread count, which uvicorn uses for sync handlers
+DEFAULT_POOL_SIZE = 40
+_MAX_DURATION = 180  # AppointmentBase.duration upper bound
+_MAX_PARAMETERS = 999  # SQLITE_MAX_VARIABLE_NUMBER before SQLite 3.32
+
+_COLUMNS = "id, patient_name, date, time, duration, doctor_name, status, mode, created_at"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS appointments (
+    id TEXT PRIMARY KEY,
+    patient_name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    doctor_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    start_minute INTEGER NOT NULL,
+    end_minute INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_appointments_schedule ON appointments (doctor_name, date, start_minute);
+CREATE INDEX IF NOT EXISTS idx_appointments_date_status ON appointments (date, status);
+CREATE INDEX IF NOT EXISTS idx_appointments_listing ON appointments (date, time, id);
+"""
+
+_INSERT = f"INSERT INTO appointments ({_COLUMNS}, start_minute, end_minute) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+# Existing [s, e) clashes when s < end + gap and e > start - gap. The lower
+# bound on start_minute keeps the scan to one short range of the schedule index.
+_CONFLICT = """
+SELECT 1 FROM appointments
+WHERE doctor_name = ? AND date = ? AND start_minute > ? AND start_minute < ?
+  AND end_minute > ? AND status != 'Cancelled' AND id IS NOT ?
+LIMIT 1
+"""
+
+
+def _row(appointment: Appointment) -> Tuple:
+    return (
+        appointment.id, appointment.patient_name, appointment.date, appointment.time,
+        appointment.duration, appointment.doctor_name, appointment.status, appointment.mode,
+        appointment.created_at, appointment.start, appointment.end
+    )
+
+
+def _appointment(row: Tuple) -> Appointment:
+    # _COLUMNS is in Appointment.FIELDS order
+    return Appointment(*row)
+
+
+def _where(
+    date: Optional[str],
+    status: Optional[str],
+    doctor_name: Optional[str],
+    date_from: Optional[str],
+    date_to: Optional[str]
+) -> Tuple[str, List]:
+    """WHERE clause and parameters for the listing filters"""
+    clauses, params = [], []
+    for clause, value in (
+        ("date = ?", date),
+        ("status = ?", status),
+        ("doctor_name = ?", doctor_name),
+        ("date >= ?", date_from),
+        ("date <= ?", date_to),
+    ):
+        if value:
+            clauses.append(clause)
+            params.append(value)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+class SQLiteAppointmentStore(AppointmentRepository):
+    """
+    Stores appointments in a SQLite database file
+
+    Each worker thread keeps its own connection (sqlite3 connections are
+    not shared across threads) with a per-connection prepared statement
+    cache, and a semaphore caps concurrent connections at pool_size. The
+    database runs in WAL mode so readers never block the single writer.
+    """
+
+    durable = True
+    blocking = True
+
+    def __init__(self, path: Optional[str] = None, pool_size: Optional[int] = None):
+        self.path = path or os.getenv("APPOINTMENT_SQLITE_PATH", "appointments.db")
+        pool_size = pool_size or int(os.getenv("APPOINTMENT_SQLITE_POOL_SIZE", DEFAULT_POOL_SIZE))
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=30,
+            isolation_level=None,  # explicit BEGIN/COMMIT only
+            check_same_thread=False,  # closed from the shutdown thread
+            cached_statements=256
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """This thread's connection, holding one pool slot while in use"""
+        with self._slots:
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = self._local.conn = self._connect()
+            yield conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """BEGIN IMMEDIATE takes the write lock up front so check-then-write is atomic"""
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def __len__(self) -> int:
+        with self._connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM appointments").fetchone()[0]
+
+    def __iter__(self) -> Iterator[Appointment]:
+        return iter(self.query())
+
+    def get(self, appointment_id: str) -> Optional[Appointment]:
+        """Fetch one appointment by primary key"""
+        with self._connection() as conn:
+            row = conn.execute(f"SELECT {_COLUMNS} FROM appointments WHERE id = ?", (appointment_id,)).fetchone()
+        return _appointment(row) if row else None
+
+    def get_many(self, appointment_ids: List[str]) -> List[Optional[Appointment]]:
+        """One primary-key IN (...) lookup per chunk, on one connection"""
+        found = {}
+        with self._connection() as conn:
+            for first in range(0, len(appointment_ids), _MAX_PARAMETERS):
+                chunk = appointment_ids[first:first + _MAX_PARAMETERS]
+                sql = f"SELECT {_COLUMNS} FROM appointments WHERE id IN ({', '.join('?' * len(chunk))})"
+                for row in conn.execute(sql, chunk):
+                    found[row[0]] = _appointment(row)
+        return [found.get(appointment_id) for appointment_id in appointment_ids]
+
+    def put(self, appointment: Appointment) -> None:
+        """Insert an appointment"""
+        with self._connection() as conn:
+            conn.execute(_INSERT, _row(appointment))
+
+    def put_many(self, appointments) -> None:
+        """Insert many appointments in one transaction"""
+        with self._transaction() as conn:
+            conn.executemany(_INSERT, (_row(appointment) for appointment in appointments))
+
+    def insert_if_free(self, appointment: Appointment, buffer_minutes: int = 5) -> bool:
+        """Run the conflict range query and the insert under one write lock"""
+        row = _row(appointment)
+        with self._transaction() as conn:
+            if appointment.status != "Cancelled" and self._conflicts(
+                    conn, appointment.doctor_name, appointment.date, appointment.start, appointment.end, None, buffer_minutes):
+                return False
+            conn.execute(_INSERT, row)
+        return True
+
+    def replace(self, appointment: Appointment) -> Optional[Appointment]:
+        """Overwrite an appointment in one transaction, returning its previous state"""
+        row = _row(appointment)
+        with self._transaction() as conn:
+            previous = conn.execute(f"SELECT {_COLUMNS} FROM appointments WHERE id = ?", (appointment.id,)).fetchone()
+            if previous is None:
+                return None
+            conn.execute(
+                "UPDATE appointments SET patient_name = ?, date = ?, time = ?, duration = ?, doctor_name = ?, "
+                "status = ?, mode = ?, created_at = ?, start_minute = ?, end_minute = ? WHERE id = ?",
+                row[1:] + row[:1]
+            )
+        return _appointment(previous)
+
+    def remove(self, appointment_id: str) -> Optional[Appointment]:
+        """Delete an appointment, returning the deleted row"""
+        with self._connection() as conn:
+            row = conn.execute(f"DELETE FROM appointments WHERE id = ? RETURNING {_COLUMNS}", (appointment_id,)).fetchone()
+        return _appointment(row) if row else None
+
+    def has_conflict(
+        self,
+        doctor_name: str,
+        date: str,
+        start: int,
+        end: int,
+        exclude_id: Optional[str] = None,
+        buffer_minutes: int = 5
+    ) -> bool:
+        """Single range probe on the (doctor_name, date, start_minute) index"""
+        with self._connection() as conn:
+            return self._conflicts(conn, doctor_name, date, start, end, exclude_id, buffer_minutes)
+
+    @staticmethod
+    def _conflicts(conn, doctor_name, date, start, end, exclude_id, buffer_minutes) -> bool:
+        started = time.perf_counter()
+        gap = 2 * buffer_minutes
+        params = (doctor_name, date, start - gap - _MAX_DURATION, end + gap, start - gap, exclude_id)
+        conflict = conn.execute(_CONFLICT, params).fetchone() is not None
+        # SQLite does not report how many index entries the probe visited
+        observe_conflict_check(time.perf_counter() - started)
+        return conflict
+
+    def schedule(self, doctor_name: str, date: str) -> List[Tuple[int, int]]:
+        """Busy intervals read from the schedule index"""
+        with self._connection() as conn:
+            return conn.execute(
+                "SELECT start_minute, end_minute FROM appointments "
+                "WHERE doctor_name = ? AND date = ? AND status != 'Cancelled' ORDER BY start_minute",
+                (doctor_name, date)
+            ).fetchall()
+
+    def query(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        after: Optional[Tuple[str, str, str]] = None,
+        limit: Optional[int] = None
+    ) -> List[Appointment]:
+        """Keyset pagination: (date, time, id) > cursor, ordered by the listing index"""
+        where, params = _where(date, status, doctor_name, date_from, date_to)
+        if after is not None:
+            where += (" AND " if where else " WHERE ") + "(date, time, id) > (?, ?, ?)"
+            params.extend(after)
+        params.append(-1 if limit is None else limit)
+        sql = f"SELECT {_COLUMNS} FROM appointments{where} ORDER BY date, time, id LIMIT ?"
+        with self._connection() as conn:
+            return [_appointment(row) for row in conn.execute(sql, params)]
+
+    def count(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """COUNT(*) over the narrowest covering index"""
+        where, params = _where(date, status, doctor_name, date_from, date_to)
+        with self._connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM appointments{where}", params).fetchone()[0]
+
+    def close(self) -> None:
+        """Close every pooled connection"""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
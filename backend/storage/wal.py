@@ -0,0 +1,137 @@
+"""
+Append-only write-ahead log
+JSON-lines records made durable with group-commit fsync batching
+"""
+
+import json
+import mmap
+import os
+import threading
+from typing import Dict, Iterator
+
+# fdatasync skips the metadata flush where the platform offers it
+datasync = getattr(os, "fdatasync", os.fsync)
+
+
+def read_records(path: str, chunk_lines: int = 4096) -> Iterator[Dict]:
+    """
+    Yield every complete record in a log or snapshot file via mmap
+
+    Lines are decoded a chunk at a time as one JSON array, which is
+    several times faster than calling json.loads per line.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        chunk = []
+        for line in iter(mm.readline, b""):
+            if not line.endswith(b"\n"):
+                break  # torn tail from a crash mid-append
+            chunk.append(line)
+            if len(chunk) == chunk_lines:
+                yield from json.loads(b"[" + b",".join(chunk) + b"]")
+                chunk = []
+        if chunk:
+            yield from json.loads(b"[" + b",".join(chunk) + b"]")
+
+
+class WriteAheadLog:
+    """
+    Durable append-only log of JSON records
+
+    With group_commit enabled, appenders hand their encoded record to a
+    single flusher thread and block until it has written and fsynced the
+    batch containing it, so concurrent writers share one fsync. With it
+    disabled every append writes and fsyncs on its own.
+    """
+
+    def __init__(self, path: str, next_lsn: int = 1, group_commit: bool = True, max_batch: int = 1024):
+        self.path = path
+        self._file = open(path, "ab")
+        self._group_commit = group_commit
+        self._max_batch = max_batch
+        self._next_lsn = next_lsn
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._durable = threading.Condition(self._lock)
+        self._pending = []
+        self._durable_lsn = next_lsn - 1
+        self._closed = False
+        self.records_written = 0
+
+        if group_commit:
+            self._flusher = threading.Thread(target=self._flush_loop, name="wal-flusher", daemon=True)
+            self._flusher.start()
+
+    @property
+    def last_lsn(self) -> int:
+        """LSN of the most recently appended record"""
+        return self._next_lsn - 1
+
+    def append(self, record: Dict) -> int:
+        """Append one record, returning its LSN once it is durable"""
+        return self.append_many([record])
+
+    def append_many(self, records) -> int:
+        """Append records atomically as one batch, returning the last LSN"""
+        with self._lock:
+            if self._closed:
+                raise ValueError("Write-ahead log is closed")
+            lines = []
+            for record in records:
+                record["lsn"] = self._next_lsn
+                self._next_lsn += 1
+                lines.append(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+            lsn = self._next_lsn - 1
+
+            if not self._group_commit:
+                self._file.write(b"".join(lines))
+                self._file.flush()
+                datasync(self._file.fileno())
+                self._durable_lsn = lsn
+                self.records_written += len(lines)
+                return lsn
+
+            self._pending.extend(lines)
+            self._wakeup.notify()
+            while self._durable_lsn < lsn:
+                self._durable.wait()
+            return lsn
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._wakeup.wait()
+                if not self._pending and self._closed:
+                    return
+                batch = self._pending[:self._max_batch]
+                del self._pending[:self._max_batch]
+                lsn = self._next_lsn - 1 - len(self._pending)
+            # Write and fsync outside the lock so appenders keep queueing
+            self._file.write(b"".join(batch))
+            self._file.flush()
+            datasync(self._file.fileno())
+            with self._lock:
+                self._durable_lsn = lsn
+                self.records_written += len(batch)
+                self._durable.notify_all()
+
+    def truncate(self) -> None:
+        """Discard every record, e.g. once a snapshot covers them"""
+        with self._lock:
+            while self._durable_lsn < self._next_lsn - 1:
+                self._durable.wait()
+            self._file.truncate(0)
+            self._file.seek(0)
+            datasync(self._file.fileno())
+            self.records_written = 0
+
+    def close(self) -> None:
+        """Flush outstanding records and close the file"""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify_all()
+        if self._group_commit:
+            self._flusher.join()
+        self._file.close()
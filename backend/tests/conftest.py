@@ -0,0 +1,61 @@
+"""
+Shared fixtures
+Tests taking `store` or `service` run once per storage backend
+"""
+
+from datetime import datetime
+import uuid
+
+import pytest
+
+from appointment_service import AppointmentService
+from models.appointment import Appointment
+from storage.columnar_store import ColumnarAppointmentStore
+from storage.memory_store import MemoryAppointmentStore
+from storage.sqlite_store import SQLiteAppointmentStore
+
+BACKENDS = ("memory", "columnar", "sqlite")
+
+
+def make_store(backend: str, tmp_path):
+    if backend == "sqlite":
+        return SQLiteAppointmentStore(str(tmp_path / "appointments.db"))
+    return {"memory": MemoryAppointmentStore, "columnar": ColumnarAppointmentStore}[backend]()
+
+
+def make_appointment(**fields) -> Appointment:
+    """A stored-looking appointment; any field can be overridden"""
+    values = {
+        "id": str(uuid.uuid4()),
+        "patient_name": "Test Patient",
+        "date": "2030-01-07",
+        "time": "09:00",
+        "duration": 30,
+        "doctor_name": "Dr. Test",
+        "status": "Scheduled",
+        "mode": "In-person",
+        "created_at": datetime(2030, 1, 1).isoformat(),
+    }
+    values.update(fields)
+    return Appointment(**values)
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request) -> str:
+    return request.param
+
+
+@pytest.fixture
+def store(backend, tmp_path):
+    store = make_store(backend, tmp_path)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def service(store, monkeypatch):
+    # No data directory: rows live in the backend alone
+    monkeypatch.delenv("APPOINTMENT_DATA_DIR", raising=False)
+    service = AppointmentService(store)
+    yield service
+    service.close()
@@ -0,0 +1,96 @@
+"""
+AppointmentService over every storage backend: create, update, delete, conflicts and pagination
+"""
+
+import pytest
+
+from models.appointment import AppointmentCreate
+
+# The service seeds 15 mock appointments into an empty store
+MOCK_ROWS = 15
+
+
+def booking(**fields) -> AppointmentCreate:
+    values = {
+        "patient_name": "Test Patient",
+        "date": "2030-01-07",
+        "time": "09:00",
+        "duration": 30,
+        "doctor_name": "Dr. Test",
+        "mode": "Video",
+    }
+    values.update(fields)
+    return AppointmentCreate(**values)
+
+
+def test_create_update_delete(service):
+    assert service.count_appointments() == MOCK_ROWS
+
+    created = service.create_appointment(booking())
+    assert service.get_appointment(created.id).to_dict() == created.to_dict()
+    assert service.count_appointments(doctor_name="Dr. Test") == 1
+    assert service.get_stats(doctor_name="Dr. Test")["by_status"] == {"Scheduled": 1}
+
+    updated = service.update_appointment_status(created.id, "Confirmed")
+    assert updated.status == "Confirmed"
+    assert service.get_appointment(created.id).status == "Confirmed"
+    assert service.count_appointments(status="Confirmed", doctor_name="Dr. Test") == 1
+
+    assert service.delete_appointment(created.id)
+    assert service.get_appointment(created.id) is None
+    assert not service.delete_appointment(created.id)
+    assert service.update_appointment_status(created.id, "Completed") is None
+    assert service.count_appointments() == MOCK_ROWS
+
+
+def test_unknown_status_is_rejected_without_losing_the_row(service):
+    created = service.create_appointment(booking())
+
+    with pytest.raises(ValueError, match="Invalid status"):
+        service.update_appointment_status(created.id, "Rescheduled")
+
+    assert service.get_appointment(created.id).status == "Scheduled"
+    assert service.count_appointments() == MOCK_ROWS + 1
+
+
+def test_conflicting_booking_is_rejected(service):
+    service.create_appointment(booking(time="09:00"))
+
+    with pytest.raises(ValueError, match="Time conflict"):
+        service.create_appointment(booking(time="09:20"))
+    # Another doctor may take the slot, and a cancellation frees it
+    other = service.create_appointment(booking(time="09:20", doctor_name="Dr. Other"))
+    service.update_appointment_status(other.id, "Cancelled")
+    service.create_appointment(booking(time="09:20", doctor_name="Dr. Other"))
+
+    assert service.count_appointments(date="2030-01-07") == 3
+
+
+def test_create_many_is_all_or_nothing(service):
+    items = [booking(time=time).model_dump() for time in ("09:00", "09:10", "11:00")]
+
+    created, errors = service.create_many(items)
+    assert created == []
+    assert list(errors) == [1]
+    assert service.count_appointments(doctor_name="Dr. Test") == 0
+
+    created, errors = service.create_many([items[0], items[2]])
+    assert errors == {}
+    assert [apt.time for apt in service.get_appointments(doctor_name="Dr. Test")] == ["09:00", "11:00"]
+
+
+def test_pages_cover_every_appointment_once(service):
+    for doctor in range(5):
+        for time in ("09:00", "10:00", "11:00"):
+            service.create_appointment(booking(time=time, doctor_name=f"Dr. {doctor}"))
+    expected = [apt.id for apt in service.get_appointments()]
+
+    seen, after, more = [], None, True
+    while more:
+        page, more = service.page_appointments(4, after)
+        seen.extend(apt.id for apt in page)
+        after = (page[-1].date, page[-1].time, page[-1].id)
+
+    assert seen == expected
+    assert len(seen) == MOCK_ROWS + 15
+    assert [apt.id for apt in service.iter_appointments(batch_size=3)] == expected
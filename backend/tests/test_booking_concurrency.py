@@ -0,0 +1,85 @@
+"""
+Concurrent bookings of contested slots never double-book a doctor
+Threads are released together and switched as often as possible, so an unguarded check-then-insert would race
+"""
+
+from collections import defaultdict
+import random
+import sys
+import threading
+
+import pytest
+
+from models.appointment import AppointmentCreate
+
+THREADS = 8
+ATTEMPTS = 150  # per thread
+DOCTORS = 2
+DATES = ("2030-01-07", "2030-01-08")
+GAP = 10  # both sides' 5-minute buffers
+
+
+@pytest.fixture
+def fast_switching():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def contested_booking(rng: random.Random) -> AppointmentCreate:
+    minutes = 9 * 60 + rng.randrange(0, 120, 5)
+    return AppointmentCreate(
+        patient_name="Race Patient",
+        date=rng.choice(DATES),
+        time=f"{minutes // 60:02d}:{minutes % 60:02d}",
+        duration=30,
+        doctor_name=f"Dr. Race {rng.randrange(DOCTORS)}",
+        mode="Video",
+    )
+
+
+def overlapping_pairs(appointments):
+    by_day = defaultdict(list)
+    for apt in appointments:
+        by_day[(apt.doctor_name, apt.date)].append(apt)
+    pairs = []
+    for day in by_day.values():
+        day.sort(key=lambda apt: apt.start)
+        busy_until = None
+        for previous, apt in zip(day, day[1:]):
+            busy_until = previous.end if busy_until is None else max(busy_until, previous.end)
+            if apt.start < busy_until + GAP:
+                pairs.append((previous.id, apt.id))
+    return pairs
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_no_double_bookings_under_contention(service, fast_switching):
+    start = threading.Barrier(THREADS)
+    accepted = []
+    failures = []
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        start.wait()
+        for _ in range(ATTEMPTS):
+            try:
+                accepted.append(service.create_appointment(contested_booking(rng)))
+            except ValueError:
+                pass  # conflict rejected
+            except Exception as e:  # pragma: no cover - reported below
+                failures.append(e)
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    assert not failures
+    # Enough contention that most attempts were turned away
+    assert 0 < len(accepted) < THREADS * ATTEMPTS // 2
+    assert overlapping_pairs(accepted) == []
+    stored = [apt for apt in service.get_appointments() if apt.doctor_name.startswith("Dr. Race")]
+    assert sorted(apt.id for apt in stored) == sorted(apt.id for apt in accepted)
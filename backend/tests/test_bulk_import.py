@@ -0,0 +1,63 @@
+"""
+Bulk import over every storage backend: created_at normalisation and failed batches
+"""
+
+import io
+import json
+
+import pytest
+
+from utils.bulk_import import import_appointments
+
+# The service seeds 15 mock appointments into an empty store
+MOCK_ROWS = 15
+
+
+def ndjson(*rows) -> list:
+    base = {
+        "patientName": "Import Patient",
+        "date": "2030-01-07",
+        "duration": 30,
+        "doctorName": "Dr. Import",
+        "mode": "Video",
+    }
+    return [json.dumps({**base, **row}) + "\n" for row in rows]
+
+
+def test_created_at_is_normalised_or_rejected_per_row(service):
+    lines = ndjson(
+        {"time": "09:00", "createdAt": "2024-01-01T10:00:00+02:00"},
+        {"time": "10:00", "createdAt": "yesterday"},
+        {"time": "11:00", "createdAt": "2024-01-01T10:00:00"},
+    )
+    rejects = io.StringIO()
+
+    report = import_appointments(service, lines, "ndjson", rejects, workers=1)
+
+    assert (report.rows, report.imported, report.rejected) == (3, 2, 1)
+    [reject] = [json.loads(line) for line in rejects.getvalue().splitlines()]
+    assert reject["line"] == 2 and reject["error"].startswith("created_at:")
+    stored = service.get_appointments(doctor_name="Dr. Import")
+    assert [(apt.time, apt.created_at) for apt in stored] == [
+        ("09:00", "2024-01-01T08:00:00"),
+        ("11:00", "2024-01-01T10:00:00"),
+    ]
+
+
+def test_failed_batch_leaves_nothing_stored(service, monkeypatch):
+    backend = service._backend
+
+    def store_one_then_fail(appointments, buffer_minutes=5):
+        backend.put(appointments[0])
+        raise OSError("disk full")
+
+    monkeypatch.setattr(backend, "put_many_if_free", store_one_then_fail)
+    with pytest.raises(OSError):
+        import_appointments(service, ndjson({"time": "09:00"}, {"time": "11:00"}), "ndjson", workers=1)
+    monkeypatch.undo()
+
+    assert service.count_appointments() == MOCK_ROWS
+    assert service.get_appointments(doctor_name="Dr. Import") == []
+    assert service.get_stats(doctor_name="Dr. Import")["total"] == 0
+    report = import_appointments(service, ndjson({"time": "09:00"}, {"time": "11:00"}), "ndjson", workers=1)
+    assert report.imported == 2
@@ -0,0 +1,49 @@
+"""
+Async resolvers batch a document's appointment lookups into one storage call per request
+"""
+
+import asyncio
+
+import strawberry
+
+import graphql_schema.loaders as loaders
+from async_appointment_service import AsyncAppointmentService
+from benchmarks.dataloader_batching import CountingStore
+from graphql_schema.async_queries import AsyncQuery
+
+
+def test_aliased_lookups_are_batched_and_memoized_per_request(service, monkeypatch):
+    store = service._backend = CountingStore(service._backend)
+    monkeypatch.setattr(loaders, "async_appointment_service", AsyncAppointmentService(service))
+    schema = strawberry.Schema(query=AsyncQuery)
+
+    ids = [apt.id for apt in service.get_appointments()][:6]
+    lookups = [
+        f'a{i}: appointment(id: "{appointment_id}") {{ id patientName }}'
+        for i, appointment_id in enumerate(ids + ids[:2] + ["missing"])
+    ]
+    listings = [
+        'd0: appointments(doctorName: "Dr. Sarah Johnson") { id }',
+        'd1: appointments(doctorName: "Dr. Sarah Johnson") { id time }',
+        'd2: appointments(date: "2025-12-28") { id }',
+    ]
+    document = "{ " + " ".join(lookups + listings) + " }"
+
+    def execute():
+        result = asyncio.run(schema.execute(document, context_value={}))
+        assert result.errors is None
+        return result.data
+
+    store.calls.clear()
+    data = execute()
+
+    assert [data[f"a{i}"]["id"] for i in range(6)] == ids
+    assert data["a6"] == data["a0"] and data["a7"] == data["a1"]
+    assert data["a8"] is None
+    assert [row["id"] for row in data["d0"]] == [row["id"] for row in data["d1"]]
+    # Nine lookups, one get_many; three listings over two distinct filters, two queries
+    assert dict(store.calls) == {"get_many": 1, "query": 2}
+
+    # Loaders live in the request context: the next request reads storage again
+    execute()
+    assert dict(store.calls) == {"get_many": 2, "query": 4}
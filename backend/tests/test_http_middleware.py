@@ -0,0 +1,72 @@
+"""
+ConditionalGetMiddleware: weak version ETags, 304s, and no tags on error bodies
+"""
+
+import asyncio
+import json
+from urllib.parse import urlencode
+
+from utils.http_middleware import ConditionalGetMiddleware
+from utils.response_cache import ScopeVersions
+
+
+def json_app(payload: dict, chunks: int = 1):
+    """ASGI app answering every request with payload as JSON, sent in `chunks` pieces"""
+    body = json.dumps(payload).encode()
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        size = -(-len(body) // chunks)
+        for offset in range(0, len(body), size):
+            await send({"type": "http.response.body", "body": body[offset:offset + size], "more_body": offset + size < len(body)})
+
+    return app
+
+
+def get(app, path: str = "/", query_string: bytes = b"", headers: list = ()):
+    """(status, headers, body) of one GET through the ASGI app"""
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": query_string, "headers": list(headers)}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start, *bodies = messages
+    return start["status"], dict(start["headers"]), b"".join(body.get("body", b"") for body in bodies)
+
+
+def test_successful_body_gets_weak_etag_and_304():
+    versions = ScopeVersions()
+    app = ConditionalGetMiddleware(json_app({"data": {"errors": "a field named errors"}}, chunks=3), versions, version_paths=("/",))
+
+    status, headers, body = get(app)
+    etag = headers[b"etag"]
+    assert status == 200
+    assert etag.startswith(b'W/"')
+    assert json.loads(body) == {"data": {"errors": "a field named errors"}}
+
+    # Weak comparison: the strong form of the same tag matches too
+    assert get(app, headers=[(b"if-none-match", etag)])[0] == 304
+    assert get(app, headers=[(b"if-none-match", etag[2:])])[0] == 304
+
+    versions.bump("2030-01-07", "Dr. Test")
+    assert get(app, headers=[(b"if-none-match", etag)])[0] == 200
+
+
+def test_error_body_is_not_tagged():
+    versions = ScopeVersions()
+    app = ConditionalGetMiddleware(
+        json_app({"data": None, "errors": [{"message": "Query is too complex", "extensions": {"code": "QUERY_TOO_COMPLEX"}}]}),
+        versions,
+    )
+    query_string = urlencode({"query": "{ appointments { id } }"}).encode()
+
+    status, headers, body = get(app, "/graphql", query_string)
+
+    assert status == 200
+    assert b"etag" not in headers
+    assert json.loads(body)["errors"][0]["extensions"]["code"] == "QUERY_TOO_COMPLEX"
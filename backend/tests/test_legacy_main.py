@@ -0,0 +1,115 @@
+"""
+Legacy main.py mutations
+createAppointment keeps its original time handling: times strptime accepts are
+conflict-checked, anything else is stored as given and never conflicts.
+Updates and deletes hold the slot the row is actually in.
+"""
+
+import logging
+
+import pytest
+
+import main as legacy
+
+CREATE = """
+mutation Create($input: AppointmentInput!) {
+  createAppointment(input: $input) { id time }
+}
+"""
+
+UPDATE = """
+mutation Update($id: String!, $input: AppointmentInput!) {
+  updateAppointment(id: $id, input: $input) { id doctorName }
+}
+"""
+DELETE = """
+mutation Delete($id: String!) {
+  deleteAppointment(id: $id) { success }
+}
+"""
+
+
+@pytest.fixture(autouse=True)
+def quiet_errors():
+    # Rejected creates are logged by strawberry; they are expected here
+    logger = logging.getLogger("strawberry.execution")
+    level = logger.level
+    logger.setLevel(logging.CRITICAL)
+    yield
+    logger.setLevel(level)
+
+
+def fields(doctor: str, time: str, date: str) -> dict:
+    return {
+        "patientName": "Legacy Patient", "date": date, "time": time, "duration": 30,
+        "doctorName": doctor, "status": "Scheduled", "mode": "Video",
+    }
+
+
+def create(doctor: str, time: str, date: str = "2030-01-07"):
+    return legacy.schema.execute_sync(CREATE, variable_values={"input": fields(doctor, time, date)})
+
+
+def update(apt_id: str, doctor: str, time: str = "09:00", date: str = "2030-01-07"):
+    return legacy.schema.execute_sync(UPDATE, variable_values={"id": apt_id, "input": fields(doctor, time, date)})
+
+
+def assert_positions_consistent():
+    assert len(legacy.appointments_position) == len(legacy.appointments_db)
+    for position, apt in enumerate(legacy.appointments_db):
+        assert legacy.appointments_position[apt["id"]] == position
+        assert legacy.appointments_by_id[apt["id"]] is apt
+
+
+def test_single_digit_hours_are_conflict_checked():
+    assert create("Dr. Legacy A", "9:30").errors is None
+
+    result = create("Dr. Legacy A", "09:45")
+
+    assert "Time conflict" in result.errors[0].message
+    assert create("Dr. Legacy A", "10:00").errors is None
+
+
+def test_unparseable_times_and_dates_are_stored_without_conflicts():
+    first = create("Dr. Legacy B", "soon", date="someday")
+    second = create("Dr. Legacy B", "soon", date="someday")
+
+    assert first.errors is None and second.errors is None
+    assert first.data["createAppointment"]["time"] == "soon"
+    assert first.data["createAppointment"]["id"] != second.data["createAppointment"]["id"]
+
+
+def test_update_retries_when_a_concurrent_update_moved_the_row(monkeypatch):
+    apt_id = create("Dr. Legacy C", "09:00").data["createAppointment"]["id"]
+    holding = legacy.schedule_locks.holding
+    held = []
+
+    def holding_after_a_move(*keys):
+        if not held:
+            held.append(keys)
+            # Another request moves the row after this one chose its stripes
+            assert update(apt_id, "Dr. Legacy D").errors is None
+        held.append(keys)
+        return holding(*keys)
+
+    monkeypatch.setattr(legacy.schedule_locks, "holding", holding_after_a_move)
+    result = update(apt_id, "Dr. Legacy E")
+    monkeypatch.undo()
+
+    assert result.errors is None
+    assert ("Dr. Legacy D", "2030-01-07") in held[-1]
+    assert legacy.appointments_by_id[apt_id]["doctorName"] == "Dr. Legacy E"
+    assert legacy.appointments_schedule.intervals("Dr. Legacy D", "2030-01-07") == []
+    assert_positions_consistent()
+
+
+def test_delete_keeps_rows_reachable():
+    ids = [create("Dr. Legacy F", time).data["createAppointment"]["id"] for time in ("09:00", "10:00", "11:00")]
+
+    deleted = legacy.schema.execute_sync(DELETE, variable_values={"id": ids[1]})
+
+    assert deleted.data["deleteAppointment"]["success"]
+    assert ids[1] not in legacy.appointments_by_id
+    assert_positions_consistent()
+    assert update(ids[2], "Dr. Legacy F", "10:00").errors is None
+    assert legacy.appointments_db[legacy.appointments_position[ids[2]]]["time"] == "10:00"
@@ -0,0 +1,103 @@
+"""
+Recurring series on every backend: occurrences in listings, detaching, skipping and conflicts
+"""
+
+import pytest
+
+from models.appointment import AppointmentCreate
+from models.series import SeriesCreate, occurrence_id
+
+DATES = ["2030-01-07", "2030-01-14", "2030-01-21", "2030-01-28"]
+
+
+def weekly(**fields) -> SeriesCreate:
+    values = {
+        "patient_name": "Series Patient",
+        "date": DATES[0],
+        "time": "09:00",
+        "duration": 30,
+        "doctor_name": "Dr. Series",
+        "mode": "In-person",
+        "frequency": "Weekly",
+        "count": len(DATES),
+    }
+    values.update(fields)
+    return SeriesCreate(**values)
+
+
+def booking(date: str, time: str = "09:00") -> AppointmentCreate:
+    return AppointmentCreate(
+        patient_name="Walk-in", date=date, time=time, duration=30, doctor_name="Dr. Series", mode="Video"
+    )
+
+
+def listing(service):
+    return service.get_appointments(doctor_name="Dr. Series")
+
+
+def test_occurrences_are_listed_counted_and_block_their_slots(service):
+    series = service.create_series(weekly())
+
+    assert [apt.id for apt in listing(service)] == [occurrence_id(series.id, date) for date in DATES]
+    assert service.count_appointments(doctor_name="Dr. Series") == 4
+    assert service.get_stats(doctor_name="Dr. Series")["total"] == 4
+    with pytest.raises(ValueError, match="Time conflict"):
+        service.create_appointment(booking(DATES[1], "09:15"))
+    with pytest.raises(ValueError):
+        service.create_series(weekly(date=DATES[2], count=1))
+
+    walk_in = service.create_appointment(booking(DATES[1], "11:00"))
+    page, more = service.page_appointments(3, doctor_name="Dr. Series")
+    assert more and [apt.date for apt in page] == DATES[:2] + [DATES[1]]
+    assert page[2].id == walk_in.id
+
+
+def test_status_change_detaches_the_occurrence_on_every_backend(service):
+    series = service.create_series(weekly())
+    detached_id = occurrence_id(series.id, DATES[1])
+
+    updated = service.update_appointment_status(detached_id, "Confirmed")
+
+    assert updated.id == detached_id and updated.status == "Confirmed"
+    assert service.get_appointment(detached_id).status == "Confirmed"
+    assert [apt.id for apt in listing(service)] == [occurrence_id(series.id, date) for date in DATES]
+    assert [apt.status for apt in listing(service)] == ["Scheduled", "Confirmed", "Scheduled", "Scheduled"]
+    assert DATES[1] in service.get_series(series.id).exceptions
+    # The detached row still holds its slot, and is edited and deleted as a stored row
+    with pytest.raises(ValueError, match="Time conflict"):
+        service.create_appointment(booking(DATES[1]))
+    assert service.update_appointment_status(detached_id, "Completed").status == "Completed"
+    assert service.delete_appointment(detached_id)
+    assert len(listing(service)) == 3
+    service.create_appointment(booking(DATES[1]))
+
+
+def test_failed_detach_leaves_the_series_untouched(service, monkeypatch):
+    series = service.create_series(weekly())
+    detached_id = occurrence_id(series.id, DATES[1])
+
+    def refuse(appointment):
+        raise ValueError("backend refused the row")
+
+    monkeypatch.setattr(service._backend, "put", refuse)
+    with pytest.raises(ValueError, match="refused"):
+        service.update_appointment_status(detached_id, "Confirmed")
+    monkeypatch.undo()
+
+    assert service.get_series(series.id).exceptions == ()
+    assert len(listing(service)) == 4
+    assert service.get_appointment(detached_id).status == "Scheduled"
+    with pytest.raises(ValueError, match="Time conflict"):
+        service.create_appointment(booking(DATES[1]))
+
+
+def test_deleting_an_occurrence_frees_its_slot(service):
+    series = service.create_series(weekly())
+
+    assert service.delete_appointment(occurrence_id(series.id, DATES[2]))
+    assert not service.delete_appointment(occurrence_id(series.id, DATES[2]))
+
+    assert [apt.date for apt in listing(service)] == [DATES[0], DATES[1], DATES[3]]
+    service.create_appointment(booking(DATES[2]))
+    assert service.delete_series(series.id)
+    assert [apt.patient_name for apt in listing(service)] == ["Walk-in"]
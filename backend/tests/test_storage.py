@@ -0,0 +1,188 @@
+"""
+AppointmentRepository contract, run against every backend
+"""
+
+import pytest
+
+from conftest import make_appointment
+from storage.columnar_store import ColumnarAppointmentStore
+from storage.sharded_store import ShardedAppointmentStore
+
+
+def _key(appointment):
+    return appointment.date, appointment.time, appointment.id
+
+
+def test_put_get_remove(store):
+    appointment = make_appointment()
+    store.put(appointment)
+
+    assert len(store) == 1
+    assert store.get(appointment.id).to_dict() == appointment.to_dict()
+    assert store.remove(appointment.id).id == appointment.id
+    assert store.get(appointment.id) is None
+    assert store.remove(appointment.id) is None
+    assert len(store) == 0
+
+
+def test_replace_returns_previous_and_reindexes(store):
+    appointment = make_appointment(status="Scheduled")
+    store.put(appointment)
+
+    previous = store.replace(appointment.replace(status="Cancelled"))
+
+    assert previous.status == "Scheduled"
+    assert store.get(appointment.id).status == "Cancelled"
+    assert store.count(status="Scheduled") == 0
+    assert store.count(status="Cancelled") == 1
+    # A cancelled appointment no longer holds its slot
+    assert not store.has_conflict("Dr. Test", "2030-01-07", appointment.start, appointment.end)
+
+
+def test_replace_of_missing_id_stores_nothing(store):
+    assert store.replace(make_appointment()) is None
+    assert len(store) == 0
+
+
+def test_failed_replace_keeps_previous_row():
+    # The columnar store cannot encode an unknown mode; the default
+    # remove-then-put replace must put the old row back
+    store = ColumnarAppointmentStore()
+    appointment = make_appointment()
+    store.put(appointment)
+
+    with pytest.raises(ValueError):
+        store.replace(appointment.replace(mode="Carrier pigeon"))
+
+    assert store.get(appointment.id).to_dict() == appointment.to_dict()
+    assert [row.id for row in store.query(doctor_name="Dr. Test")] == [appointment.id]
+    assert store.has_conflict("Dr. Test", "2030-01-07", appointment.start, appointment.end)
+
+
+def test_columnar_store_converts_offset_created_at_to_utc():
+    store = ColumnarAppointmentStore()
+    appointment = make_appointment(created_at="2024-01-01T10:00:00+02:00")
+
+    store.put_many([appointment])
+
+    assert store.get(appointment.id).created_at == "2024-01-01T08:00:00"
+
+
+def test_failed_columnar_put_many_stores_nothing():
+    store = ColumnarAppointmentStore()
+    first, second = make_appointment(time="09:00"), make_appointment(time="11:00")
+
+    with pytest.raises(ValueError):
+        store.put_many([first, second, make_appointment(time="13:00", mode="Carrier pigeon")])
+
+    assert len(store) == 0
+    assert store.get(first.id) is None and store.query() == []
+    assert not store.has_conflict("Dr. Test", "2030-01-07", second.start, second.end)
+    store.put_many([first, second])
+    assert [row.id for row in store.query()] == [first.id, second.id]
+
+
+def test_failed_sharded_remove_keeps_the_row_reachable(monkeypatch):
+    store = ShardedAppointmentStore(2)
+    try:
+        appointment = make_appointment()
+        store.put(appointment)
+        call = store._call
+
+        def shard_down(shard, method, *args):
+            if method == "remove":
+                raise OSError("shard went away")
+            return call(shard, method, *args)
+
+        monkeypatch.setattr(store, "_call", shard_down)
+        with pytest.raises(OSError):
+            store.remove(appointment.id)
+        monkeypatch.undo()
+
+        assert len(store) == 1
+        assert store.get(appointment.id).to_dict() == appointment.to_dict()
+        assert store.remove(appointment.id).id == appointment.id
+        assert store.get(appointment.id) is None and len(store) == 0
+    finally:
+        store.close()
+
+
+def test_conflicts_respect_buffer_cancellation_and_exclusion(store):
+    booked = make_appointment(time="09:00", duration=30)
+    assert store.insert_if_free(booked)
+
+    # Overlapping, or inside the 5 + 5 minute buffer
+    assert not store.insert_if_free(make_appointment(time="09:15"))
+    assert not store.insert_if_free(make_appointment(time="09:35"))
+    # Clear of the buffer, another doctor, or cancelled
+    assert store.insert_if_free(make_appointment(time="09:40"))
+    assert store.insert_if_free(make_appointment(time="09:00", doctor_name="Dr. Other"))
+    assert store.insert_if_free(make_appointment(time="09:00", status="Cancelled"))
+
+    assert store.has_conflict("Dr. Test", "2030-01-07", booked.start, booked.end)
+    assert not store.has_conflict("Dr. Test", "2030-01-07", booked.start, booked.end, exclude_id=booked.id)
+    assert store.schedule("Dr. Test", "2030-01-07") == [(540, 570), (580, 610)]
+
+
+def test_put_many_if_free_reports_each_row(store):
+    store.put(make_appointment(time="10:00"))
+
+    inserted = store.put_many_if_free([
+        make_appointment(time="10:10"),
+        make_appointment(time="11:00"),
+        make_appointment(time="10:00", doctor_name="Dr. Other"),
+    ])
+
+    assert inserted == [False, True, True]
+    assert len(store) == 3
+
+
+def test_query_filters_and_counts(store):
+    rows = [
+        make_appointment(date="2030-01-07", time="09:00", doctor_name="Dr. A", status="Confirmed"),
+        make_appointment(date="2030-01-07", time="11:00", doctor_name="Dr. B", status="Scheduled"),
+        make_appointment(date="2030-01-08", time="09:00", doctor_name="Dr. A", status="Scheduled"),
+        make_appointment(date="2030-01-10", time="08:00", doctor_name="Dr. B", status="Completed"),
+    ]
+    store.put_many(rows)
+
+    assert [row.id for row in store.query()] == [row.id for row in sorted(rows, key=_key)]
+    assert [row.id for row in store.query(date="2030-01-07")] == [rows[0].id, rows[1].id]
+    assert [row.id for row in store.query(doctor_name="Dr. A", status="Scheduled")] == [rows[2].id]
+    assert [row.id for row in store.query(date_from="2030-01-08", date_to="2030-01-09")] == [rows[2].id]
+    assert store.count(status="Scheduled") == 2
+    assert store.count(doctor_name="Dr. B", date_from="2030-01-08") == 1
+    assert store.count(status="Rescheduled") == 0
+    assert store.count(doctor_name="Dr. Nobody") == 0
+    assert store.estimate_count(doctor_name="Dr. A") >= 2
+    assert [row and row.id for row in store.get_many([rows[3].id, "missing"])] == [rows[3].id, None]
+
+
+def test_pagination_visits_every_row_once_across_tied_slots(store):
+    # Many doctors share each slot start, so pages split runs of equal (date, time)
+    rows = [
+        make_appointment(date=f"2030-01-0{7 + day}", time=time, doctor_name=f"Dr. {doctor}")
+        for day in range(3)
+        for time in ("09:00", "09:30", "14:00")
+        for doctor in range(7)
+    ]
+    store.put_many(rows)
+    expected = [row.id for row in sorted(rows, key=_key)]
+
+    assert [row.id for row in store.query()] == expected
+    for page_size in (1, 4, 7, 10):
+        seen, after = [], None
+        while True:
+            page = store.query(after=after, limit=page_size)
+            if not page:
+                break
+            assert len(page) <= page_size
+            seen.extend(row.id for row in page)
+            after = _key(page[-1])
+        assert seen == expected
+
+    # A cursor combined with filters
+    after = _key(store.query(doctor_name="Dr. 3", limit=2)[-1])
+    assert [row.id for row in store.query(doctor_name="Dr. 3", after=after)] == [
+        row.id for row in sorted(rows, key=_key) if row.doctor_name == "Dr. 3"
+    ][2:]
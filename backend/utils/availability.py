@@ -0,0 +1,127 @@
+"""
+Free-slot search over doctor schedules
+Sweeps each day's merged busy intervals and caches the gaps per (doctor, date)
+"""
+
+from collections import OrderedDict
+from datetime import date as Date, timedelta
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Bookable hours, in minutes since midnight
+WORKDAY_START = 8 * 60
+WORKDAY_END = 20 * 60
+MAX_SEARCH_DAYS = 62
+
+Interval = Tuple[int, int]
+
+
+def minutes_to_time(minutes: int) -> str:
+    """Convert minutes since midnight to an HH:MM string"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def free_gaps(
+    busy: Iterable[Interval],
+    duration: int,
+    buffer_minutes: int = 5,
+    day_start: int = WORKDAY_START,
+    day_end: int = WORKDAY_END
+) -> List[Interval]:
+    """
+    Windows of the day where an appointment of `duration` minutes fits
+
+    `busy` must be sorted by start. Each busy interval is widened by
+    2 * buffer_minutes on both sides, matching how detect_time_conflict
+    pads both appointments, and overlapping padded intervals are merged
+    in one sweep. A returned (start, end) window accepts any appointment
+    starting between start and end - duration.
+    """
+    gap = 2 * buffer_minutes
+    gaps = []
+    cursor = day_start
+    for start, end in busy:
+        if min(start - gap, day_end) - cursor >= duration:
+            gaps.append((cursor, min(start - gap, day_end)))
+        cursor = max(cursor, end + gap)
+        if cursor >= day_end:
+            return gaps
+    if day_end - cursor >= duration:
+        gaps.append((cursor, day_end))
+    return gaps
+
+
+def date_range(date_from: str, date_to: str) -> List[str]:
+    """Inclusive list of ISO dates, bounded by MAX_SEARCH_DAYS"""
+    try:
+        first, last = Date.fromisoformat(date_from), Date.fromisoformat(date_to)
+    except ValueError as e:
+        raise ValueError(f"Invalid date: {e}")
+    days = (last - first).days + 1
+    if days < 1:
+        raise ValueError("dateFrom must not be after dateTo")
+    if days > MAX_SEARCH_DAYS:
+        raise ValueError(f"Search at most {MAX_SEARCH_DAYS} days at a time")
+    return [(first + timedelta(days=offset)).isoformat() for offset in range(days)]
+
+
+class AvailabilitySearch:
+    """
+    Cached free-slot search over a busy-interval source
+
+    `busy_intervals(doctor_name, date)` returns that day's sorted busy
+    (start, end) minutes. Computed gaps are cached per (doctor, date)
+    and dropped by invalidate() on every write to that day. A write
+    epoch keeps a search that raced a write from caching stale gaps.
+    """
+
+    def __init__(self, busy_intervals: Callable[[str, str], Iterable[Interval]], max_days_cached: int = 100_000):
+        self._busy_intervals = busy_intervals
+        self._max_days_cached = max_days_cached
+        self._cache: "OrderedDict[Tuple[str, str], Dict[Tuple[int, int], List[Interval]]]" = OrderedDict()
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self, doctor_name: str, date: str) -> None:
+        """Forget cached gaps for a day whose appointments changed"""
+        with self._lock:
+            self._epoch += 1
+            self._cache.pop((doctor_name, date), None)
+
+    def _gaps(self, doctor_name: str, date: str, duration: int, buffer_minutes: int) -> List[Interval]:
+        key, variant = (doctor_name, date), (duration, buffer_minutes)
+        day = self._cache.get(key)
+        if day is not None and variant in day:
+            return day[variant]
+
+        epoch = self._epoch
+        gaps = free_gaps(self._busy_intervals(doctor_name, date), duration, buffer_minutes)
+        with self._lock:
+            if epoch == self._epoch:
+                self._cache.setdefault(key, {})[variant] = gaps
+                self._cache.move_to_end(key)
+                if len(self._cache) > self._max_days_cached:
+                    self._cache.popitem(last=False)
+        return gaps
+
+    def search(
+        self,
+        doctor_names: Iterable[str],
+        date_from: str,
+        date_to: str,
+        duration: int,
+        buffer_minutes: int = 5
+    ) -> List[Tuple[str, str, int, int]]:
+        """Free (doctor_name, date, start, end) windows, ordered by date then doctor"""
+        if duration <= 0:
+            raise ValueError("duration must be positive")
+        if buffer_minutes < 0:
+            raise ValueError("bufferMinutes must not be negative")
+        dates = date_range(date_from, date_to)
+        doctors = sorted(set(doctor_names))
+        return [
+            (doctor_name, date, start, end)
+            for date in dates
+            for doctor_name in doctors
+            for start, end in self._gaps(doctor_name, date, duration, buffer_minutes)
+        ]
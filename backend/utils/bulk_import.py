@@ -0,0 +1,208 @@
+"""
+Bulk import of appointment files
+Stream-parses CSV / NDJSON, validates chunks in a process pool and loads the valid rows through AppointmentService
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import csv
+from datetime import datetime
+import json
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, IO, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from pydantic import ValidationError
+
+from models.appointment import Appointment, AppointmentCreate
+from utils.conflict_detector import parse_timestamp
+
+IMPORT_FORMATS = ("csv", "ndjson")
+# Rows per validation task sent to a worker process
+IMPORT_CHUNK_ROWS = 5000
+
+# Export / GraphQL column names accepted alongside the model's own
+_FIELD_NAMES = {
+    "patientName": "patient_name",
+    "doctorName": "doctor_name",
+    "createdAt": "created_at",
+}
+_MODEL_FIELDS = set(AppointmentCreate.model_fields)
+# RFC 4122 variant digit for any random hex digit
+_UUID_VARIANT = {digit: "89ab"[int(digit, 16) & 3] for digit in "0123456789abcdef"}
+
+# (line number, parsed row or a parse error message)
+RawRow = Tuple[int, Any]
+# patient_name, date, time, duration, doctor_name, status, mode, created_at
+ValidRow = Tuple[str, str, str, int, str, str, str, Optional[str]]
+
+
+class ImportReport(NamedTuple):
+    rows: int
+    imported: int
+    rejected: int
+    seconds: float
+
+
+def read_rows(lines: Iterable[str], format: str) -> Iterator[RawRow]:
+    """Lazily parse a CSV (with header row) or NDJSON file into (line number, dict) pairs"""
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            if None in row:
+                yield reader.line_num, "Too many columns"
+            else:
+                yield reader.line_num, row
+    elif format == "ndjson":
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, f"Invalid JSON: {e}"
+    else:
+        raise ValueError(f"Unknown import format: {format}")
+
+
+def validate_chunk(chunk: List[RawRow]) -> Tuple[List[Tuple[int, ValidRow]], List[Tuple[int, str, Any]]]:
+    """
+    Validate parsed rows as AppointmentCreate (runs in a worker process)
+
+    Returns (line number, field tuple) for valid rows and (line number,
+    error, raw row) for rejected ones. Tuples keep the pickled results
+    small on their way back to the parent.
+    """
+    valid, rejected = [], []
+    for line_number, raw in chunk:
+        if isinstance(raw, str):
+            rejected.append((line_number, raw, None))  # the line did not parse
+            continue
+        if not isinstance(raw, dict):
+            rejected.append((line_number, "Row is not an object", raw))
+            continue
+        # Empty CSV cells count as missing, so model defaults apply
+        fields = {_FIELD_NAMES.get(key, key): value for key, value in raw.items() if value != ""}
+        created_at = fields.pop("created_at", None)
+        try:
+            if created_at is not None:
+                # One naive form every backend can store; offsets become UTC
+                created_at = parse_timestamp(created_at).isoformat()
+            data = AppointmentCreate.model_validate({key: fields[key] for key in fields.keys() & _MODEL_FIELDS})
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(part) for part in error["loc"])
+            rejected.append((line_number, f"{field}: {error['msg']}" if field else error["msg"], raw))
+            continue
+        except (TypeError, ValueError) as e:
+            rejected.append((line_number, f"created_at: {e}", raw))
+            continue
+        valid.append((line_number, (
+            data.patient_name, data.date, data.time, data.duration, data.doctor_name,
+            data.status or "Scheduled", data.mode, created_at
+        )))
+    return valid, rejected
+
+
+def _fresh_ids(count: int) -> List[str]:
+    """
+    `count` random (version 4) UUID strings, as str(uuid.uuid4()) makes them
+
+    Formatted from a single urandom read; uuid4() costs a syscall and a
+    UUID object per id, which adds seconds to a million-row import.
+    """
+    random_hex = os.urandom(16 * count).hex()
+    ids = []
+    for offset in range(0, 32 * count, 32):
+        h = random_hex[offset:offset + 32]
+        ids.append(f"{h[:8]}-{h[8:12]}-4{h[13:16]}-{_UUID_VARIANT[h[16]]}{h[17:20]}-{h[20:]}")
+    return ids
+
+
+def _chunks(rows: Iterator[RawRow], size: int) -> Iterator[List[RawRow]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _validated(chunks: Iterator[List[RawRow]], workers: int):
+    """Validation results in file order, with at most 2 chunks per worker in flight"""
+    if workers <= 1:
+        for chunk in chunks:
+            yield validate_chunk(chunk)
+        return
+    # Spawned workers import only this module, never the server's globals
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(validate_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def import_workers() -> int:
+    """Validation processes: IMPORT_WORKERS, else one per CPU"""
+    return int(os.getenv("IMPORT_WORKERS", os.cpu_count() or 1))
+
+
+def import_appointments(
+    service,
+    lines: Iterable[str],
+    format: str = "csv",
+    rejects: Optional[IO[str]] = None,
+    workers: Optional[int] = None,
+    chunk_rows: int = IMPORT_CHUNK_ROWS
+) -> ImportReport:
+    """
+    Load an appointment file into an AppointmentService
+
+    The file is parsed as it is read and validated chunk by chunk in
+    `workers` processes (inline when 1), so raw text and parsed dicts
+    never outnumber a few chunks. Valid rows become records with fresh
+    ids and are collected, then handed to service.import_appointments in
+    one call once the whole file is read: it sorts them by (doctor, date,
+    time) and rejects overlaps across the file in one sweep. Memory is
+    therefore proportional to the number of valid rows (about as much as
+    storing them), and nothing is loaded if reading fails part way.
+    Every rejected row is written to `rejects` as an NDJSON line of
+    {"line", "error", "row"}.
+    """
+    started = time.perf_counter()
+    workers = import_workers() if workers is None else workers
+    imported_at = datetime.now().isoformat()
+    appointments: List[Appointment] = []
+    line_numbers: List[int] = []
+    rows = rejected = 0
+
+    def reject(line_number: int, error: str, row: Any) -> None:
+        nonlocal rejected
+        rejected += 1
+        if rejects is not None:
+            rejects.write(json.dumps({"line": line_number, "error": error, "row": row}, default=str) + "\n")
+
+    for valid, invalid in _validated(_chunks(read_rows(lines, format), chunk_rows), workers):
+        rows += len(valid) + len(invalid)
+        ids = _fresh_ids(len(valid))
+        for appointment_id, (line_number, (patient_name, date, time_, duration, doctor_name, status, mode, created_at)) in zip(ids, valid):
+            appointments.append(Appointment(
+                appointment_id, patient_name, date, time_, duration, doctor_name, status, mode, created_at or imported_at
+            ))
+            line_numbers.append(line_number)
+        for line_number, error, row in invalid:
+            reject(line_number, error, row)
+
+    errors: Dict[int, str] = service.import_appointments(appointments)
+    for position, error in sorted(errors.items()):
+        row = appointments[position].to_dict()
+        del row["id"]
+        reject(line_numbers[position], error, row)
+
+    return ImportReport(rows, len(appointments) - len(errors), rejected, time.perf_counter() - started)
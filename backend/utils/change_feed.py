@@ -0,0 +1,163 @@
+"""
+In-process change feed for GraphQL subscriptions
+Fans appointment writes out to bounded per-subscriber queues on the event loop
+"""
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Set, Tuple
+
+CREATED = "CREATED"
+UPDATED = "UPDATED"
+DELETED = "DELETED"
+
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_COALESCE_SECONDS = 0.05
+
+# (doctor_name, date); None matches any doctor or any day
+Topic = Tuple[Optional[str], Optional[str]]
+
+
+class Change(NamedTuple):
+    """One appointment delta; `row` is the written row, None for deletes"""
+    kind: str
+    appointment_id: str
+    row: Any
+
+
+class SubscriberOverflow(Exception):
+    """Raised inside a subscription that fell too far behind the feed"""
+
+
+def _topics(doctor_name: str, date: str) -> Set[Topic]:
+    """Every subscription topic a row on (doctor_name, date) belongs to"""
+    return {(doctor_name, date), (doctor_name, None), (None, date), (None, None)}
+
+
+def _merge(earlier: Optional[Change], later: Change) -> Optional[Change]:
+    """Coalesce two changes to one appointment into what a subscriber needs to see"""
+    if earlier is None or earlier.kind != CREATED:
+        return later
+    if later.kind == DELETED:
+        return None  # created and gone within one window: nothing to show
+    return later._replace(kind=CREATED)
+
+
+class ChangeFeed:
+    """
+    Topic-based pub/sub hub between writers and subscription resolvers
+
+    publish() may be called from any thread and costs one dict check when
+    nobody is subscribed. Changes are buffered and flushed on the event
+    loop every coalesce_seconds, so a burst of writes to one appointment
+    reaches each subscriber as a single delta. Each subscriber has a
+    bounded queue; one that cannot take a whole flush is dropped with
+    SubscriberOverflow instead of buffering without limit, and is
+    expected to refetch and resubscribe.
+    """
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE, coalesce_seconds: float = DEFAULT_COALESCE_SECONDS):
+        self._queue_size = queue_size
+        self._coalesce_seconds = coalesce_seconds
+        self._subscribers: Dict[Topic, Set["asyncio.Queue[Optional[Change]]"]] = {}
+        self._pending: List[Tuple[str, str, Topic, Optional[Topic], Any]] = []
+        self._flush_scheduled = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.dropped_subscribers = 0
+
+    def __len__(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(
+        self,
+        kind: str,
+        appointment_id: str,
+        doctor_name: str,
+        date: str,
+        row: Any = None,
+        previous: Optional[Topic] = None
+    ) -> None:
+        """
+        Queue a change for delivery
+
+        `previous` is the (doctor_name, date) an updated row moved from;
+        subscribers that only watch the old place see it as deleted.
+        """
+        if not self._subscribers:
+            return
+        with self._lock:
+            self._pending.append((kind, appointment_id, (doctor_name, date), previous, row))
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+            loop = self._loop
+        try:
+            loop.call_soon_threadsafe(loop.call_later, self._coalesce_seconds, self._flush)
+        except RuntimeError:
+            # The loop is gone, and with it every subscriber
+            with self._lock:
+                self._pending.clear()
+                self._flush_scheduled = False
+
+    async def subscribe(self, doctor_name: Optional[str] = None, date: Optional[str] = None) -> AsyncIterator[Change]:
+        """Yield changes to one doctor and/or day until the consumer stops or overflows"""
+        topic = (doctor_name, date)
+        queue: "asyncio.Queue[Optional[Change]]" = asyncio.Queue(self._queue_size)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.setdefault(topic, set()).add(queue)
+        try:
+            while True:
+                change = await queue.get()
+                if change is None:
+                    raise SubscriberOverflow(
+                        f"Subscriber fell more than {self._queue_size} changes behind; refetch and resubscribe"
+                    )
+                yield change
+        finally:
+            self._unsubscribe(topic, queue)
+
+    def _unsubscribe(self, topic: Topic, queue: "asyncio.Queue[Optional[Change]]") -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    def _flush(self) -> None:
+        """Coalesce the buffered changes per topic and fan them out (runs on the loop)"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._flush_scheduled = False
+
+        deltas: Dict[Topic, Dict[str, Change]] = {}
+        for kind, appointment_id, place, previous, row in batch:
+            targets = [(topic, Change(kind, appointment_id, row)) for topic in _topics(*place)]
+            if previous is not None and previous != place:
+                left = Change(DELETED, appointment_id, None)
+                targets.extend((topic, left) for topic in _topics(*previous) - _topics(*place))
+            for topic, change in targets:
+                if topic not in self._subscribers:
+                    continue
+                changes = deltas.setdefault(topic, {})
+                merged = _merge(changes.pop(appointment_id, None), change)
+                if merged is not None:
+                    changes[appointment_id] = merged
+
+        for topic, changes in deltas.items():
+            for queue in list(self._subscribers.get(topic, ())):
+                if queue.maxsize - queue.qsize() < len(changes):
+                    self._drop(topic, queue)
+                    continue
+                for change in changes.values():
+                    queue.put_nowait(change)
+
+    def _drop(self, topic: Topic, queue: "asyncio.Queue[Optional[Change]]") -> None:
+        """Discard a slow subscriber's backlog and wake it with the overflow marker"""
+        self._unsubscribe(topic, queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+        self.dropped_subscribers += 1
@@ -0,0 +1,31 @@
+"""
+Opaque pagination cursors
+Encodes an index sort key (date, time, id) as URL-safe base64
+"""
+
+import base64
+import binascii
+from typing import Tuple
+
+_PREFIX = "appointment:"
+
+# Upper bound on `first` so one request never materializes more than a page
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(date: str, time: str, appointment_id: str) -> str:
+    """Build an opaque cursor for a (date, time, id) position"""
+    raw = f"{_PREFIX}{date}|{time}|{appointment_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str, str]:
+    """Recover the (date, time, id) position from a cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not raw.startswith(_PREFIX) or raw.count("|") < 2:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    date, time, appointment_id = raw[len(_PREFIX):].split("|", 2)
+    return date, time, appointment_id
@@ -0,0 +1,182 @@
+"""
+HTTP middleware for polling clients
+Conditional GET with version-based ETags, and response compression
+"""
+
+import json
+import os
+import secrets
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+
+from graphql import GraphQLError, OperationDefinitionNode, OperationType, get_operation_ast
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.persisted_queries import OperationCache
+from utils.response_cache import ScopeVersions, parse_document, query_scope
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # optional: pip install brotli-asgi
+    BrotliMiddleware = None
+
+DEFAULT_COMPRESSION_MIN_BYTES = 1024
+
+# Versions restart with the process, so tags carry a per-boot token
+_BOOT = secrets.token_hex(4)
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison against an If-None-Match header, as RFC 9110 requires"""
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    opaque = etag.removeprefix("W/")
+    return "*" in candidates or any(tag.removeprefix("W/") == opaque for tag in candidates)
+
+
+def _has_errors(body: bytes) -> bool:
+    """Whether a JSON response body is an object with a top-level "errors" member"""
+    if b'"errors"' not in body:
+        return False
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return True  # not the JSON the tag vouches for
+    return not isinstance(payload, dict) or "errors" in payload
+
+
+class ConditionalGetMiddleware:
+    """
+    ETag / If-None-Match for reads whose body is a function of the store version
+
+    GraphQL queries sent by GET are tagged with the version of the
+    narrowest (date, doctor) scope their arguments cover; `version_paths`
+    are tagged with the global version, and persisted queries sent as a
+    hash alone are tagged like their text when `operations` knows the
+    hash. A matching If-None-Match is answered with 304 before the
+    request reaches the app, so nothing is executed or serialized. The
+    version is read before the app runs, so a write racing the request
+    can only make the tag older than the body, never newer.
+
+    Tags are weak: the compression middleware outside this one sends
+    the same representation as identity, gzip or br bytes. Responses are
+    held until their body is complete and only tagged when it carries no
+    GraphQL "errors", so a rejected or failed query (QUERY_TOO_COMPLEX,
+    validation errors) is never revalidated into a 304.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        versions: ScopeVersions,
+        graphql_path: str = "/graphql",
+        version_paths: tuple = (),
+        operations: Optional[OperationCache] = None
+    ):
+        self.app = app
+        self.versions = versions
+        self.graphql_path = graphql_path
+        self.version_paths = set(version_paths)
+        self.operations = operations
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        etag = self._etag(scope)
+        if etag is None:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(b"etag", etag.encode()), (b"cache-control", b"no-cache")],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        held: list = []
+
+        async def send_tagged(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                if message["status"] != 200:
+                    await send(message)
+                    return
+                held.append(message)
+                return
+            if not held or message["type"] != "http.response.body":
+                await send(message)
+                return
+            held.append(message)
+            if message.get("more_body", False):
+                return
+            start, *bodies = held
+            held.clear()
+            if not _has_errors(b"".join(body.get("body", b"") for body in bodies)):
+                headers = MutableHeaders(scope=start)
+                headers["ETag"] = etag
+                headers.setdefault("Cache-Control", "no-cache")  # revalidate on every poll
+            await send(start)
+            for body in bodies:
+                await send(body)
+
+        await self.app(scope, receive, send_tagged)
+
+    def _etag(self, scope: Scope) -> Optional[str]:
+        """Weak tag for this request, or None if its body is not version-determined"""
+        path = scope["path"].rstrip("/") or "/"
+        if path in self.version_paths:
+            stamp = self.versions.stamp((None, None))
+        elif path == self.graphql_path.rstrip("/"):
+            stamp = self._query_stamp(parse_qs(scope["query_string"].decode("latin-1")))
+            if stamp is None:
+                return None
+        else:
+            return None
+        return f'W/"{_BOOT}-{stamp}"'
+
+    def _query_stamp(self, params: Dict[str, list]) -> Optional[int]:
+        """Version of the scope a GET query reads; None for anything that is not a valid query"""
+        operation_name = params.get("operationName", [None])[0]
+        try:
+            query = params.get("query", [None])[0] or self._persisted_query(params)
+            if not query:
+                return None
+            variables = json.loads(params["variables"][0]) if "variables" in params else None
+            document = parse_document(query)
+        except (ValueError, GraphQLError):
+            return None
+        operation = get_operation_ast(document, operation_name)
+        if not isinstance(operation, OperationDefinitionNode) or operation.operation != OperationType.QUERY:
+            return None
+        if variables is not None and not isinstance(variables, dict):
+            return None
+        return self.versions.stamp(query_scope(document, operation_name, variables))
+
+    def _persisted_query(self, params: Dict[str, list]) -> Optional[str]:
+        """Registered text of a GET sent as a persisted query hash alone"""
+        if self.operations is None or "extensions" not in params:
+            return None
+        extensions = json.loads(params["extensions"][0])
+        persisted = extensions.get("persistedQuery") if isinstance(extensions, dict) else None
+        if not isinstance(persisted, dict) or not isinstance(persisted.get("sha256Hash"), str):
+            return None
+        return self.operations.query_for_hash(persisted["sha256Hash"])
+
+
+def compression_middleware() -> tuple:
+    """
+    (middleware class, options) for response compression
+
+    Brotli when brotli-asgi is installed (falling back to gzip for clients
+    that do not accept br), Starlette's gzip otherwise. Bodies smaller
+    than RESPONSE_COMPRESSION_MIN_BYTES go out uncompressed.
+    """
+    minimum_size = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", DEFAULT_COMPRESSION_MIN_BYTES))
+    if BrotliMiddleware is not None:
+        return BrotliMiddleware, {"quality": 4, "minimum_size": minimum_size, "gzip_fallback": True}
+    return GZipMiddleware, {"minimum_size": minimum_size, "compresslevel": 6}
@@ -0,0 +1,20 @@
+"""
+Monotonic id allocation
+Replaces max(existing ids) + 1 scans with an O(1) thread-safe counter
+"""
+
+from itertools import count
+import threading
+
+
+class IdAllocator:
+    """Hands out strictly increasing integer ids, never the same one twice"""
+
+    def __init__(self, start: int = 1):
+        self._counter = count(start)
+        self._lock = threading.Lock()
+
+    def allocate(self) -> int:
+        """Next unused id"""
+        with self._lock:
+            return next(self._counter)
@@ -0,0 +1,108 @@
+"""
+Per-doctor, per-date interval index
+Keeps each doctor's busy intervals sorted so conflict checks are O(log k)
+"""
+
+from bisect import bisect_left
+import time
+from typing import Dict, List, Optional, Tuple
+
+from utils.metrics import observe_conflict_check
+
+
+class _DayIntervals:
+    """Sorted (start, end, id) intervals for one doctor on one date"""
+
+    __slots__ = ("starts", "entries", "max_length")
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.entries: List[Tuple[int, int, str]] = []
+        self.max_length = 0
+
+    def add(self, start: int, end: int, appointment_id: str) -> None:
+        entry = (start, end, appointment_id)
+        position = bisect_left(self.entries, entry)
+        self.entries.insert(position, entry)
+        self.starts.insert(position, start)
+        if end - start > self.max_length:
+            self.max_length = end - start
+
+    def remove(self, start: int, end: int, appointment_id: str) -> bool:
+        entry = (start, end, appointment_id)
+        position = bisect_left(self.entries, entry)
+        if position == len(self.entries) or self.entries[position] != entry:
+            return False
+        del self.entries[position]
+        del self.starts[position]
+        return True
+
+    def overlaps(self, start: int, end: int, gap: int, exclude_id: Optional[str]) -> Tuple[bool, int]:
+        """(whether any entry clashes, number of entries compared)"""
+        # Existing [s, e) clashes when s < end + gap and e > start - gap.
+        # Starts are sorted and no interval is longer than max_length, so
+        # only entries with s in (start - gap - max_length, end + gap) qualify.
+        lower = start - gap - self.max_length
+        first = position = bisect_left(self.starts, end + gap) - 1
+        while position >= 0 and self.starts[position] > lower:
+            _, existing_end, existing_id = self.entries[position]
+            if existing_end > start - gap and existing_id != exclude_id:
+                return True, first - position + 1
+            position -= 1
+        return False, first - position
+
+
+class DoctorDayIntervalIndex:
+    """Secondary index of active appointment intervals keyed by (doctor_name, date)"""
+
+    def __init__(self):
+        self._days: Dict[Tuple[str, str], _DayIntervals] = {}
+
+    def __len__(self) -> int:
+        return sum(len(day.entries) for day in self._days.values())
+
+    def add(self, doctor_name: str, date: str, start: int, end: int, appointment_id: str) -> None:
+        """Register a busy interval (minutes since midnight, end exclusive)"""
+        key = (doctor_name, date)
+        day = self._days.get(key)
+        if day is None:
+            day = self._days[key] = _DayIntervals()
+        day.add(start, end, appointment_id)
+
+    def remove(self, doctor_name: str, date: str, start: int, end: int, appointment_id: str) -> bool:
+        """Drop a busy interval; returns False if it was not indexed"""
+        key = (doctor_name, date)
+        day = self._days.get(key)
+        if day is None or not day.remove(start, end, appointment_id):
+            return False
+        if not day.entries:
+            del self._days[key]
+        return True
+
+    def has_conflict(
+        self,
+        doctor_name: str,
+        date: str,
+        start: int,
+        end: int,
+        exclude_id: Optional[str] = None,
+        buffer_minutes: int = 5
+    ) -> bool:
+        """
+        Check a proposed interval against the doctor's day
+
+        Both sides are padded by buffer_minutes, matching detect_time_conflict.
+        """
+        started = time.perf_counter()
+        day = self._days.get((doctor_name, date))
+        if day is None:
+            observe_conflict_check(time.perf_counter() - started, 0)
+            return False
+        conflict, candidates = day.overlaps(start, end, 2 * buffer_minutes, exclude_id)
+        observe_conflict_check(time.perf_counter() - started, candidates)
+        return conflict
+
+    def intervals(self, doctor_name: str, date: str) -> List[Tuple[int, int, str]]:
+        """Sorted (start, end, id) intervals for a doctor's day"""
+        day = self._days.get((doctor_name, date))
+        return list(day.entries) if day else []
@@ -0,0 +1,229 @@
+"""
+Prometheus-style metrics
+Histograms, counters and gauges rendered in the Prometheus text exposition format
+"""
+
+from bisect import bisect_left
+from contextvars import ContextVar
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from cached reads to slow exports
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds, for index probes that take microseconds
+PROBE_BUCKETS = (0.000002, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01)
+COUNT_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 1024)
+
+LabelValues = Tuple[str, ...]
+# A callback returns one value, or one value per tuple of label values
+Reading = Union[float, Dict[LabelValues, float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self._samples()
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic count per set of label values"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in values:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. requests in flight"""
+
+    kind = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+
+class CallbackMetric(_Metric):
+    """Gauge or counter read from the application only when scraped"""
+
+    def __init__(self, name: str, help: str, read: Callable[[], Reading], labels: Sequence[str] = (), kind: str = "gauge"):
+        super().__init__(name, help, labels)
+        self.kind = kind
+        self._read = read
+
+    def _samples(self) -> Iterator[str]:
+        reading = self._read()
+        values = reading.items() if isinstance(reading, dict) else [((), reading)]
+        for label_values, value in values:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """
+    Bucketed observations per set of label values
+
+    observe() bisects the bucket bounds and bumps one slot; buckets are
+    only made cumulative when rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: one count per bucket, one for +Inf, then the sum
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[slot] += 1
+            series[-1] += value
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            series = [(label_values, list(counts)) for label_values, counts in self._series.items()]
+        for label_values, counts in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labels, label_values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(counts[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Named metrics, rendered together for a /metrics scrape"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric; registering a name again replaces the earlier one"""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def callback(self, name: str, help: str, read: Callable[[], Reading], labels: Sequence[str] = (), kind: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, read, labels, kind))
+
+    def render(self) -> str:
+        """Every metric in the text exposition format"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class Trace:
+    """
+    Timing breakdown of one opted-in request
+
+    Spans with the same name (a field resolved once per row, say) are
+    summed, and rendered as a Server-Timing header value.
+    """
+
+    def __init__(self):
+        self._spans: Dict[str, List[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        span = self._spans.get(name)
+        if span is None:
+            self._spans[name] = [1, seconds]
+        else:
+            span[0] += 1
+            span[1] += seconds
+
+    def server_timing(self, total_seconds: float) -> str:
+        entries = [f"total;dur={total_seconds * 1000:.3f}"]
+        for name, (count, seconds) in self._spans.items():
+            calls = f';desc="{count} calls"' if count > 1 else ""
+            entries.append(f"{name}{calls};dur={seconds * 1000:.3f}")
+        return ", ".join(entries)
+
+
+# Set by the HTTP middleware for requests that asked for a timing breakdown
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+# Process-wide registry and the metrics recorded outside any one app
+registry = MetricsRegistry()
+
+CONFLICT_CHECK_SECONDS = registry.histogram(
+    "appointment_conflict_check_seconds",
+    "Time spent checking a booking against the doctor's schedule",
+    buckets=PROBE_BUCKETS
+)
+CONFLICT_CHECK_CANDIDATES = registry.histogram(
+    "appointment_conflict_check_candidates",
+    "Existing appointments compared per conflict check",
+    buckets=COUNT_BUCKETS
+)
+
+
+def observe_conflict_check(seconds: float, candidates: Optional[int] = None) -> None:
+    """Record one conflict check; candidates is None where the backend cannot tell"""
+    CONFLICT_CHECK_SECONDS.observe(seconds)
+    if candidates is not None:
+        CONFLICT_CHECK_CANDIDATES.observe(candidates)
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add("conflict_check", seconds)
@@ -0,0 +1,298 @@
+"""
+Automatic persisted queries and the compiled operation cache
+Clients may send a sha256 hash instead of the query text; each distinct text is parsed and validated once
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from graphql import (
+    BREAK,
+    REMOVE,
+    DocumentNode,
+    FieldNode,
+    GraphQLError,
+    NameNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    Visitor,
+    parse,
+    print_ast,
+    visit,
+)
+from strawberry.extensions import SchemaExtension
+from strawberry.schema.schema import validate_document
+
+from utils.metrics import registry
+
+APQ_VERSION = 1
+# Distinct query texts whose parsed and validated documents are kept,
+# and registered hashes kept alongside them
+DEFAULT_MAX_OPERATIONS = 1024
+
+PERSISTED_QUERY_LOOKUPS = registry.counter(
+    "graphql_persisted_query_lookups_total",
+    "Persisted query hash lookups by outcome",
+    labels=("outcome",)
+)
+
+
+class _Compiled(NamedTuple):
+    document: DocumentNode
+    errors: List[GraphQLError]  # validation errors, empty when valid
+    allowed: bool
+
+
+def query_hash(query: str) -> str:
+    """sha256 hex digest of a query text, as APQ clients compute it"""
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class _TypenameRemover(Visitor):
+    def enter_field(self, node: FieldNode, *_):
+        return REMOVE if node.name.value == "__typename" and not node.alias else None
+
+
+class _TypenameAdder(Visitor):
+    """Apollo Client's addTypename: __typename last in every selection set below the operation"""
+
+    def enter_selection_set(self, node: SelectionSetNode, key, parent, *_):
+        if isinstance(parent, OperationDefinitionNode):
+            return None
+        if any(isinstance(selection, FieldNode) and selection.name.value == "__typename" for selection in node.selections):
+            return None
+        return SelectionSetNode(selections=(*node.selections, FieldNode(name=NameNode(value="__typename"))))
+
+
+def operation_signature(document: DocumentNode) -> str:
+    """
+    Canonical text of a document, for matching it against the allowlist
+
+    Formatting is normalized by printing, and bare __typename selections
+    are dropped, so a document with Apollo's added __typename fields
+    matches its source in operations.ts.
+    """
+    return print_ast(visit(document, _TypenameRemover()))
+
+
+def as_sent_by_apollo(query: str) -> str:
+    """The text Apollo Client sends (and hashes) for a query in operations.ts"""
+    return print_ast(visit(parse(query), _TypenameAdder()))
+
+
+def _operation_name(document: DocumentNode) -> Optional[str]:
+    names = []
+
+    class Names(Visitor):
+        def enter_operation_definition(self, node, *_):
+            names.append(node.name.value if node.name else None)
+            return BREAK
+
+    visit(document, Names())
+    return names[0] if names else None
+
+
+def build_manifest(queries: Iterable[str]) -> List[Dict[str, str]]:
+    """Manifest entries {name, sha256, query} for the given source documents"""
+    manifest = []
+    for source in queries:
+        query = as_sent_by_apollo(source)
+        manifest.append({"name": _operation_name(parse(query)), "sha256": query_hash(query), "query": query})
+    return manifest
+
+
+def _persisted_query_error(message: str, code: str) -> GraphQLError:
+    return GraphQLError(message, extensions={"code": code})
+
+
+class OperationCache:
+    """
+    Compiled documents by query text, and query texts by sha256
+
+    Both are LRUs of max_operations entries. Manifest operations are
+    pinned: their hashes resolve from the first request and are never
+    evicted. In allowlist mode only documents whose signature matches a
+    manifest operation are executed, and only those may be registered
+    under a new hash (Apollo's text differs from the manifest's when its
+    printer does).
+    """
+
+    def __init__(
+        self,
+        max_operations: int = DEFAULT_MAX_OPERATIONS,
+        manifest: Optional[List[Dict[str, str]]] = None,
+        allowlist: bool = False
+    ):
+        if allowlist and not manifest:
+            raise ValueError("Allowlist mode needs a manifest of persisted operations")
+        self.max_operations = max_operations
+        self.allowlist = allowlist
+        self._pinned: Dict[str, str] = {entry["sha256"]: entry["query"] for entry in manifest or ()}
+        self._allowed = {operation_signature(parse(entry["query"])) for entry in manifest or ()}
+        self._texts: "OrderedDict[str, str]" = OrderedDict()
+        self._compiled: "OrderedDict[str, _Compiled]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(("hits", "misses"), 0)
+
+    def query_for_hash(self, digest: str) -> Optional[str]:
+        """Registered query text for a hash, or None"""
+        query = self._pinned.get(digest)
+        if query is not None:
+            return query
+        with self._lock:
+            query = self._texts.get(digest)
+            if query is not None:
+                self._texts.move_to_end(digest)
+            return query
+
+    def resolve(self, query: Optional[str], extensions: Optional[Dict[str, Any]]) -> Optional[str]:
+        """
+        The query text to execute for an APQ request
+
+        A hash alone is looked up; a hash with its text is checked and
+        registered. Raises GraphQLError with Apollo's codes, which make
+        clients resend the full text (PERSISTED_QUERY_NOT_FOUND) or give
+        up on persisted queries.
+        """
+        persisted = (extensions or {}).get("persistedQuery")
+        if persisted is None:
+            return query
+        if not isinstance(persisted, dict) or persisted.get("version") != APQ_VERSION:
+            raise _persisted_query_error("Unsupported persisted query version", "PERSISTED_QUERY_NOT_SUPPORTED")
+        digest = persisted.get("sha256Hash")
+        if not isinstance(digest, str):
+            raise _persisted_query_error("persistedQuery.sha256Hash must be a string", "BAD_USER_INPUT")
+
+        if query is None:
+            query = self.query_for_hash(digest)
+            PERSISTED_QUERY_LOOKUPS.inc("hit" if query is not None else "miss")
+            if query is None:
+                raise _persisted_query_error("PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND")
+            return query
+
+        if query_hash(query) != digest:
+            raise _persisted_query_error("provided sha does not match query", "BAD_USER_INPUT")
+        if digest not in self._pinned:
+            if self.allowlist and not self._is_allowed(query):
+                raise _persisted_query_error("Operation is not in the allowlist", "PERSISTED_QUERY_NOT_IN_LIST")
+            PERSISTED_QUERY_LOOKUPS.inc("registered")
+            with self._lock:
+                self._texts[digest] = query
+                self._texts.move_to_end(digest)
+                if len(self._texts) > self.max_operations:
+                    self._texts.popitem(last=False)
+        return query
+
+    def _is_allowed(self, query: str) -> bool:
+        compiled = self.compiled(query, count=False)
+        if compiled is not None:
+            return compiled.allowed
+        try:
+            return operation_signature(parse(query)) in self._allowed
+        except GraphQLError:
+            return False
+
+    def compiled(self, query: str, count: bool = True) -> Optional[_Compiled]:
+        """Parsed document and validation result of a query text seen before"""
+        with self._lock:
+            compiled = self._compiled.get(query)
+            if compiled is not None:
+                self._compiled.move_to_end(query)
+            if count:
+                self._counters["hits" if compiled is not None else "misses"] += 1
+        return compiled
+
+    def compile(self, schema, query: str, document: DocumentNode, rules) -> _Compiled:
+        """Validate a freshly parsed document and keep the outcome"""
+        compiled = _Compiled(
+            document,
+            validate_document(schema, document, rules),
+            not self.allowlist or operation_signature(document) in self._allowed
+        )
+        with self._lock:
+            self._compiled[query] = compiled
+            if len(self._compiled) > self.max_operations:
+                self._compiled.popitem(last=False)
+        return compiled
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self._counters["hits"], self._counters["misses"]
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+                "documents": len(self._compiled),
+                "registered_hashes": len(self._texts),
+                "pinned_hashes": len(self._pinned),
+                "allowlist": self.allowlist,
+            }
+
+
+class OperationCacheExtension(SchemaExtension):
+    """
+    Persisted query resolution, then parse and validation from the OperationCache
+
+    Replaces strawberry's ParserCache and ValidationCache: one bounded
+    LRU keyed by query text holds both the document and its validation
+    errors, and hashed requests are served from it without the text
+    ever being sent. Must be the first extension, so the others see the
+    resolved query text.
+    """
+
+    def __init__(self, operations: OperationCache):
+        self.operations = operations
+
+    def on_operation(self) -> Iterator[None]:
+        # Shared between requests: take this request's context before yielding
+        context = self.execution_context
+        # Raised errors come back as the operation's result
+        context.query = self.operations.resolve(context.query, context.operation_extensions)
+        yield
+
+    def on_parse(self) -> Iterator[None]:
+        context = self.execution_context
+        compiled = self.operations.compiled(context.query)
+        if compiled is not None:
+            context.graphql_document = compiled.document
+        yield
+
+    def on_validate(self) -> Iterator[None]:
+        context = self.execution_context
+        compiled = self.operations.compiled(context.query, count=False) or self.operations.compile(
+            context.schema._schema, context.query, context.graphql_document, context.validation_rules
+        )
+        if compiled.allowed:
+            context.pre_execution_errors = compiled.errors
+        else:
+            context.pre_execution_errors = [
+                _persisted_query_error("Operation is not in the allowlist", "PERSISTED_QUERY_NOT_IN_LIST")
+            ]
+        yield
+
+
+def load_manifest(path: str) -> List[Dict[str, str]]:
+    """Manifest written by `python -m persisted_operations`"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["operations"]
+
+
+def operation_cache_from_env() -> OperationCache:
+    """
+    OperationCache configured by GRAPHQL_* variables
+
+    GRAPHQL_PERSISTED_OPERATIONS names a manifest whose hashes are
+    registered up front; GRAPHQL_ALLOWLIST=1 serves nothing else.
+    GRAPHQL_OPERATION_CACHE_SIZE bounds the compiled documents and
+    registered hashes kept.
+    """
+    path = os.getenv("GRAPHQL_PERSISTED_OPERATIONS")
+    return OperationCache(
+        max_operations=int(os.getenv("GRAPHQL_OPERATION_CACHE_SIZE", DEFAULT_MAX_OPERATIONS)),
+        manifest=load_manifest(path) if path else None,
+        allowlist=os.getenv("GRAPHQL_ALLOWLIST", "0") == "1"
+    )
@@ -0,0 +1,321 @@
+"""
+GraphQL query cost limits
+Static cost estimate per operation, depth / alias limits and per-client token buckets
+"""
+
+from collections import OrderedDict
+from datetime import date as Date
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from graphql import (
+    ExecutionResult,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLList,
+    GraphQLNonNull,
+    GraphQLSchema,
+    InlineFragmentNode,
+    Undefined,
+    get_named_type,
+    get_operation_ast,
+)
+from graphql.utilities import value_from_ast_untyped
+from strawberry.extensions import SchemaExtension
+from strawberry.types.graphql import OperationType
+
+from utils.metrics import registry
+
+# Field resolutions one operation may cost: 6,000 rows of 8 columns
+DEFAULT_MAX_COST = 50_000
+DEFAULT_MAX_DEPTH = 8
+DEFAULT_MAX_ALIASES = 15
+# Cost each client may spend per second, with bursts up to the max cost
+DEFAULT_COST_PER_SECOND = 20_000
+# Assumed length of list fields without a size estimate
+DEFAULT_LIST_SIZE = 10
+# Clients with a token bucket; the least recently seen are forgotten first
+MAX_CLIENTS = 10_000
+
+# Estimated length of a list field from its arguments, or those of the
+# nearest enclosing field that takes any (a connection's, for its edges)
+ListSize = Callable[[Dict[str, Any]], int]
+
+COST_BUCKETS = (1, 10, 100, 1_000, 10_000, 50_000, 100_000, 1_000_000, 10_000_000)
+
+GRAPHQL_OPERATION_COST = registry.histogram(
+    "graphql_operation_cost",
+    "Estimated field resolutions per GraphQL operation",
+    buckets=COST_BUCKETS
+)
+GRAPHQL_OPERATIONS_REJECTED = registry.counter(
+    "graphql_operations_rejected_total",
+    "GraphQL operations refused before execution",
+    ("reason",)
+)
+
+
+class QueryCost(NamedTuple):
+    cost: int
+    depth: int
+    aliases: int
+
+
+def days_between(date_from: Optional[str], date_to: Optional[str]) -> int:
+    """Days in an inclusive YYYY-MM-DD range; 0 when it is empty or unparsable"""
+    try:
+        return max((Date.fromisoformat(date_to) - Date.fromisoformat(date_from)).days + 1, 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class _Measure:
+    """One walk over an operation, following fragments and list sizes"""
+
+    def __init__(self, schema: GraphQLSchema, fragments: Dict[str, FragmentDefinitionNode],
+                 variables: Optional[Dict[str, Any]], list_sizes: Dict[str, ListSize], default_list_size: int):
+        self.schema = schema
+        self.fragments = fragments
+        self.variables = variables
+        self.list_sizes = list_sizes
+        self.default_list_size = default_list_size
+        self.cost = self.depth = self.aliases = 0
+
+    def walk(self, parent_type, selection_set, multiplier: int, inherited: Dict[str, Any], depth: int, spread: frozenset) -> None:
+        fields = getattr(parent_type, "fields", {})
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                name = selection.name.value
+                if name.startswith("__"):
+                    continue  # introspection: static and small
+                self.cost += multiplier
+                self.depth = max(self.depth, depth)
+                if selection.alias:
+                    self.aliases += 1
+                field = fields.get(name)
+                if selection.selection_set is None or field is None:
+                    continue
+                arguments = self._arguments(field, selection) if field.args else inherited
+                size = 1
+                estimate = self.list_sizes.get(f"{parent_type.name}.{name}")
+                if estimate is not None:
+                    try:
+                        size = max(int(estimate(arguments)), 0)
+                    except (TypeError, ValueError):
+                        size = 0  # the resolver reports bad arguments itself
+                elif _is_list(field.type):
+                    size = self.default_list_size
+                self.walk(get_named_type(field.type), selection.selection_set, multiplier * size, arguments, depth + 1, spread)
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = self._type(selection.type_condition, parent_type)
+                self.walk(fragment_type, selection.selection_set, multiplier, inherited, depth, spread)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = self.fragments.get(selection.name.value)
+                if fragment is None or fragment.name.value in spread:
+                    continue
+                fragment_type = self._type(fragment.type_condition, parent_type)
+                self.walk(fragment_type, fragment.selection_set, multiplier, inherited, depth, spread | {fragment.name.value})
+
+    def _arguments(self, field, node: FieldNode) -> Dict[str, Any]:
+        """Argument values with the schema defaults filled in"""
+        arguments = {name: argument.default_value for name, argument in field.args.items()
+                     if argument.default_value is not Undefined}
+        for argument in node.arguments:
+            value = value_from_ast_untyped(argument.value, self.variables)
+            if value is not Undefined:
+                arguments[argument.name.value] = value
+        return arguments
+
+    def _type(self, type_condition, parent_type):
+        return self.schema.get_type(type_condition.name.value) if type_condition else parent_type
+
+
+def _is_list(field_type) -> bool:
+    if isinstance(field_type, GraphQLNonNull):
+        field_type = field_type.of_type
+    return isinstance(field_type, GraphQLList)
+
+
+def operation_cost(
+    schema: GraphQLSchema,
+    document,
+    operation_name: Optional[str],
+    variables: Optional[Dict[str, Any]],
+    list_sizes: Dict[str, ListSize],
+    default_list_size: int = DEFAULT_LIST_SIZE
+) -> QueryCost:
+    """
+    Estimated field resolutions, nesting depth and aliases of a validated operation
+
+    Every selected field costs one per object it is resolved on; a list
+    field multiplies the cost of its selections by the length list_sizes
+    estimates for "Type.field", so the same unfiltered listing costs more
+    as the store grows while a one-day listing stays cheap.
+    """
+    operation = get_operation_ast(document, operation_name)
+    root_type = schema.get_root_type(operation.operation)
+    fragments = {
+        definition.name.value: definition
+        for definition in document.definitions if isinstance(definition, FragmentDefinitionNode)
+    }
+    measure = _Measure(schema, fragments, variables, list_sizes, default_list_size)
+    measure.walk(root_type, operation.selection_set, 1, {}, 1, frozenset())
+    return QueryCost(measure.cost, measure.depth, measure.aliases)
+
+
+class TokenBucket:
+    """
+    Per-client budget refilled at `rate` per second, up to `capacity`
+
+    A bucket is only updated when its client spends, so idle clients cost
+    nothing; past max_clients the least recently seen one is dropped and
+    starts full when it returns.
+    """
+
+    def __init__(self, rate: float, capacity: float, max_clients: int = MAX_CLIENTS):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()  # client -> [tokens, updated]
+        self._lock = threading.Lock()
+
+    def take(self, client: str, amount: float) -> float:
+        """Spend amount; returns 0.0 when granted, else the seconds until it would be"""
+        amount = min(amount, self.capacity)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [self.capacity, now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+                bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < amount:
+                return (amount - bucket[0]) / self.rate
+            bucket[0] -= amount
+            return 0.0
+
+
+class QueryCostLimiter(SchemaExtension):
+    """
+    Refuses operations that are too deep, too aliased or too expensive
+
+    Runs after validation and after the response cache, so cached
+    answers are served without being costed. The cost of everything
+    else is also charged to the client's token bucket; a client out of
+    budget gets a 429 with Retry-After instead of a result. Clients are
+    told apart by `client_header` when set (an API key, or
+    X-Forwarded-For behind a trusted proxy), else by peer address.
+    """
+
+    def __init__(
+        self,
+        list_sizes: Dict[str, ListSize],
+        max_cost: int = DEFAULT_MAX_COST,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        max_aliases: int = DEFAULT_MAX_ALIASES,
+        rate_limiter: Optional[TokenBucket] = None,
+        client_header: Optional[str] = None,
+        default_list_size: int = DEFAULT_LIST_SIZE
+    ):
+        self.list_sizes = list_sizes
+        self.max_cost = max_cost
+        self.max_depth = max_depth
+        self.max_aliases = max_aliases
+        self.rate_limiter = rate_limiter
+        self.client_header = client_header
+        self.default_list_size = default_list_size
+
+    def on_execute(self) -> Iterator[None]:
+        # Shared between requests: take this request's context before yielding
+        context = self.execution_context
+        if context.result is not None or context.operation_type == OperationType.SUBSCRIPTION:
+            yield
+            return
+
+        measured = operation_cost(
+            context.schema._schema, context.graphql_document, context.operation_name,
+            context.variables, self.list_sizes, self.default_list_size
+        )
+        GRAPHQL_OPERATION_COST.observe(measured.cost)
+        error = self._check(measured)
+        if error is None and self.rate_limiter is not None:
+            retry_after = self.rate_limiter.take(self._client(context.context), measured.cost)
+            if retry_after:
+                error = self._throttled(context.context, retry_after)
+        if error is not None:
+            context.result = ExecutionResult(data=None, errors=[error])
+        yield
+
+    def _check(self, measured: QueryCost) -> Optional[GraphQLError]:
+        for reason, value, limit, message in (
+            ("depth", measured.depth, self.max_depth, "Query depth {} exceeds the limit of {}"),
+            ("aliases", measured.aliases, self.max_aliases, "{} aliases exceed the limit of {}"),
+            ("cost", measured.cost, self.max_cost, "Query cost {} exceeds the limit of {}; narrow the filters or paginate"),
+        ):
+            if limit and value > limit:
+                GRAPHQL_OPERATIONS_REJECTED.inc(reason)
+                return GraphQLError(message.format(value, limit), extensions={
+                    "code": "QUERY_TOO_COMPLEX", "cost": measured.cost, "depth": measured.depth, "aliases": measured.aliases,
+                })
+        return None
+
+    def _throttled(self, request_context: Any, retry_after: float) -> GraphQLError:
+        GRAPHQL_OPERATIONS_REJECTED.inc("rate_limited")
+        response = _context_value(request_context, "response")
+        if response is not None:
+            response.status_code = 429
+            response.headers["Retry-After"] = str(max(int(retry_after + 0.999), 1))
+        return GraphQLError(
+            f"Rate limit exceeded; retry in {retry_after:.3f}s",
+            extensions={"code": "RATE_LIMITED", "retryAfter": round(retry_after, 3)}
+        )
+
+    def _client(self, request_context: Any) -> str:
+        request = _context_value(request_context, "request")
+        if request is None:
+            return "local"
+        if self.client_header:
+            value = request.headers.get(self.client_header)
+            if value:
+                # A proxy appends the address it saw, so only the last hop is trusted
+                return value.rsplit(",", 1)[-1].strip()
+        return request.client.host if request.client else "unknown"
+
+
+def _context_value(request_context: Any, name: str) -> Any:
+    if isinstance(request_context, dict):
+        return request_context.get(name)
+    return getattr(request_context, name, None)
+
+
+def query_limit_extensions(list_sizes: Dict[str, ListSize]) -> List[SchemaExtension]:
+    """
+    QueryCostLimiter configured by GRAPHQL_* variables
+
+    GRAPHQL_MAX_COST / _MAX_DEPTH / _MAX_ALIASES / _COST_PER_SECOND set
+    to 0 turn that limit off (with all four off no extension is added);
+    GRAPHQL_CLIENT_HEADER names the header identifying clients.
+    """
+    max_cost = int(os.getenv("GRAPHQL_MAX_COST", DEFAULT_MAX_COST))
+    max_depth = int(os.getenv("GRAPHQL_MAX_DEPTH", DEFAULT_MAX_DEPTH))
+    max_aliases = int(os.getenv("GRAPHQL_MAX_ALIASES", DEFAULT_MAX_ALIASES))
+    rate = float(os.getenv("GRAPHQL_COST_PER_SECOND", DEFAULT_COST_PER_SECOND))
+    if not (max_cost or max_depth or max_aliases or rate):
+        return []
+    rate_limiter = TokenBucket(rate, max_cost or DEFAULT_MAX_COST) if rate > 0 else None
+    return [QueryCostLimiter(
+        list_sizes,
+        max_cost=max_cost,
+        max_depth=max_depth,
+        max_aliases=max_aliases,
+        rate_limiter=rate_limiter,
+        client_header=os.getenv("GRAPHQL_CLIENT_HEADER") or None
+    )]
@@ -0,0 +1,229 @@
+"""
+Secondary indexes and query planner for appointment listings
+Hash indexes on date/status/doctor plus a (date, time)-ordered key list
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+SortKey = Tuple[str, str, str]  # (date, time, id)
+# (id, date, time, status, doctor_name), as passed to add()
+IndexEntry = Tuple[str, str, str, str, str]
+
+_MAX_TIME = "\uffff"  # sorts after any HH:MM, closing an inclusive date_to bound
+_CHUNK_SIZE = 256
+# Below this many new keys, insort beats rebuilding the list
+_MERGE_MIN = 8
+
+
+def _with_keys(keys: List[SortKey], new_keys: List[SortKey]) -> List[SortKey]:
+    """
+    Sorted keys plus sorted new_keys
+
+    Inserting one key at a time shifts the tail of the list on every
+    insort, costing O(batch * n). Large batches instead build a new list:
+    every insertion point is bisected up front and each run of old keys
+    moves once, back to front, for O(batch * log n + n). Readers still
+    walking the old list are unaffected.
+    """
+    if len(new_keys) < _MERGE_MIN:
+        for key in new_keys:
+            insort(keys, key)
+        return keys
+    positions = [bisect_right(keys, key) for key in new_keys]
+    merged = keys + new_keys
+    end = len(keys)
+    for shift in range(len(new_keys) - 1, -1, -1):
+        position = positions[shift]
+        merged[position + shift + 1:end + shift + 1] = keys[position:end]
+        merged[position + shift] = new_keys[shift]
+        end = position
+    return merged
+
+
+class _Bucket:
+    """Ids sharing one indexed value, kept both as a set and in (date, time) order"""
+
+    __slots__ = ("keys", "ids")
+
+    def __init__(self):
+        self.keys: List[SortKey] = []
+        self.ids: Set[str] = set()
+
+    def add(self, key: SortKey) -> None:
+        insort(self.keys, key)
+        self.ids.add(key[2])
+
+    def add_many(self, keys: List[SortKey]) -> None:
+        """Add already sorted keys"""
+        self.keys = _with_keys(self.keys, keys)
+        self.ids.update(key[2] for key in keys)
+
+    def remove(self, key: SortKey) -> None:
+        position = bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            del self.keys[position]
+        self.ids.discard(key[2])
+
+
+class AppointmentQueryIndex:
+    """Maintained indexes answering filtered listings in (date, time) order"""
+
+    def __init__(self):
+        self._ordered: List[SortKey] = []
+        self._by_date: Dict[str, _Bucket] = {}
+        self._by_status: Dict[str, _Bucket] = {}
+        self._by_doctor: Dict[str, _Bucket] = {}
+
+    def __len__(self) -> int:
+        return len(self._ordered)
+
+    def add(self, appointment_id: str, date: str, time: str, status: str, doctor_name: str) -> None:
+        """Index one appointment"""
+        key = (date, time, appointment_id)
+        insort(self._ordered, key)
+        for index, value in ((self._by_date, date), (self._by_status, status), (self._by_doctor, doctor_name)):
+            bucket = index.get(value)
+            if bucket is None:
+                bucket = index[value] = _Bucket()
+            bucket.add(key)
+
+    def add_many(self, entries: Iterable[IndexEntry]) -> None:
+        """Index a batch of appointments with one merge per touched key list"""
+        keys = []
+        grouped: Tuple[Dict[str, List[SortKey]], ...] = ({}, {}, {})  # by date, status, doctor
+        for appointment_id, date, time, status, doctor_name in entries:
+            key = (date, time, appointment_id)
+            keys.append(key)
+            for groups, value in zip(grouped, (date, status, doctor_name)):
+                groups.setdefault(value, []).append(key)
+        self._ordered = _with_keys(self._ordered, sorted(keys))
+        for index, groups in zip((self._by_date, self._by_status, self._by_doctor), grouped):
+            for value, group in groups.items():
+                bucket = index.get(value)
+                if bucket is None:
+                    bucket = index[value] = _Bucket()
+                bucket.add_many(sorted(group))
+
+    def remove(self, appointment_id: str, date: str, time: str, status: str, doctor_name: str) -> None:
+        """Drop one appointment from every index"""
+        key = (date, time, appointment_id)
+        position = bisect_left(self._ordered, key)
+        if position < len(self._ordered) and self._ordered[position] == key:
+            del self._ordered[position]
+        for index, value in ((self._by_date, date), (self._by_status, status), (self._by_doctor, doctor_name)):
+            bucket = index.get(value)
+            if bucket is not None:
+                bucket.remove(key)
+                if not bucket.ids:
+                    del index[value]
+
+    @staticmethod
+    def _window(keys: List[SortKey], date_from: Optional[str], date_to: Optional[str]) -> Tuple[int, int]:
+        """Positions bounding keys with date_from <= date <= date_to"""
+        lo = bisect_left(keys, (date_from,)) if date_from else 0
+        hi = bisect_left(keys, (date_to, _MAX_TIME)) if date_to else len(keys)
+        return lo, hi
+
+    def _plan(
+        self,
+        date: Optional[str],
+        status: Optional[str],
+        doctor_name: Optional[str],
+        date_from: Optional[str],
+        date_to: Optional[str]
+    ) -> Tuple[List[SortKey], int, int, List[Set[str]]]:
+        """
+        Pick the most selective index to drive the scan
+
+        Every index keeps its keys in (date, time, id) order, so the date
+        range narrows each candidate by bisection and the narrowest window
+        wins. Returns the driving key list, its window, and the id sets of
+        the remaining filters to intersect against.
+        """
+        buckets = []
+        for index, value in ((self._by_date, date), (self._by_status, status), (self._by_doctor, doctor_name)):
+            if value:
+                bucket = index.get(value)
+                if bucket is None:
+                    return [], 0, 0, []
+                buckets.append(bucket)
+
+        if not buckets:
+            return (self._ordered, *self._window(self._ordered, date_from, date_to), [])
+
+        best, lo, hi = None, 0, 0
+        for bucket in buckets:
+            bucket_lo, bucket_hi = self._window(bucket.keys, date_from, date_to)
+            if best is None or bucket_hi - bucket_lo < hi - lo:
+                best, lo, hi = bucket, bucket_lo, bucket_hi
+        return best.keys, lo, hi, [bucket.ids for bucket in buckets if bucket is not best]
+
+    def iter_keys(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        after: Optional[SortKey] = None
+    ) -> Iterator[SortKey]:
+        """
+        Yield matching (date, time, id) keys in order, starting after a cursor
+
+        Keys are copied out in small chunks and the position is re-found by
+        bisection between chunks, so memory stays bounded by the chunk size
+        and concurrent writes never invalidate the walk.
+        """
+        keys, lo, hi, others = self._plan(date, status, doctor_name, date_from, date_to)
+        if after is not None:
+            lo = max(lo, bisect_right(keys, after))
+        upper = (date_to, _MAX_TIME) if date_to else None
+
+        while lo < hi:
+            chunk = keys[lo:min(hi, lo + _CHUNK_SIZE)]
+            if not chunk:
+                return
+            for key in chunk:
+                if not others or all(key[2] in ids for ids in others):
+                    yield key
+            lo = bisect_right(keys, chunk[-1])
+            hi = bisect_left(keys, upper) if upper else len(keys)
+
+    def iter_ids(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> Iterator[str]:
+        """Yield matching ids already ordered by (date, time)"""
+        for key in self.iter_keys(date, status, doctor_name, date_from, date_to):
+            yield key[2]
+
+    def count(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """Count matches from the index; O(log n) when one index covers every filter"""
+        keys, lo, hi, others = self._plan(date, status, doctor_name, date_from, date_to)
+        if not others:
+            return max(hi - lo, 0)
+        return sum(1 for _ in self.iter_keys(date, status, doctor_name, date_from, date_to))
+
+    def estimate(
+        self,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> int:
+        """Upper bound on count(): the driving index window, O(log n) for any filters"""
+        keys, lo, hi, others = self._plan(date, status, doctor_name, date_from, date_to)
+        return max(hi - lo, 0)
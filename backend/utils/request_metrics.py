@@ -0,0 +1,235 @@
+"""
+Request instrumentation feeding utils.metrics
+Strawberry extension for operation / resolver latency, ASGI middleware for HTTP latency and tracing
+"""
+
+from inspect import isawaitable
+import time
+from typing import Any, Callable, Dict, Optional
+
+from graphql import OperationType
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from strawberry.extensions import SchemaExtension
+
+from utils.metrics import CONTENT_TYPE, Trace, current_trace, registry
+from utils.persisted_queries import OperationCacheExtension
+from utils.response_cache import ResponseCache
+
+# Requests sending this header (any value but 0 / false) get a Server-Timing breakdown
+TRACE_HEADER = "X-Trace-Timing"
+# Operation names come from clients; past this many distinct ones they share a label
+MAX_OPERATION_NAMES = 200
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency, until the last body chunk is sent",
+    ("method", "route", "status")
+)
+HTTP_IN_FLIGHT = registry.gauge("http_requests_in_flight", "HTTP requests being served")
+GRAPHQL_OPERATION_SECONDS = registry.histogram(
+    "graphql_operation_duration_seconds",
+    "GraphQL query and mutation latency, parse to result",
+    ("type", "name")
+)
+GRAPHQL_OPERATION_ERRORS = registry.counter(
+    "graphql_operation_errors_total",
+    "GraphQL operations that returned errors",
+    ("type", "name")
+)
+GRAPHQL_RESOLVER_SECONDS = registry.histogram(
+    "graphql_resolver_duration_seconds",
+    "Latency of root field resolvers",
+    ("field",)
+)
+
+
+class MetricsExtension(SchemaExtension):
+    """
+    Records operation latency and root resolver latency
+
+    Nested fields (one per row and column of a listing) are only timed
+    for traced requests, where they are summed per field into the
+    Server-Timing breakdown. No parse / validate / execute hooks: each
+    costs every request a generator, and both caches make the first two
+    near zero.
+    """
+
+    def __init__(self):
+        self._operation_names = set()
+
+    def on_operation(self):
+        # Shared between requests: take this request's context before yielding
+        context = self.execution_context
+        started = time.perf_counter()
+        yield
+        try:
+            operation_type = context.operation_type.value
+        except Exception:  # unparsable document or unknown operation name
+            operation_type = "invalid"
+        if operation_type == "subscription":
+            return  # lasts as long as the client stays subscribed
+        seconds = time.perf_counter() - started
+        name = self._operation_label(context.operation_name)
+        GRAPHQL_OPERATION_SECONDS.observe(seconds, operation_type, name)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add("graphql", seconds)
+        result = context.result
+        if context.pre_execution_errors or (result is not None and result.errors):
+            GRAPHQL_OPERATION_ERRORS.inc(operation_type, name)
+
+    def resolve(self, _next, root, info, *args, **kwargs) -> Any:
+        trace = current_trace.get()
+        root_field = info.path.prev is None
+        if (not root_field and trace is None) or info.operation.operation == OperationType.SUBSCRIPTION:
+            return _next(root, info, *args, **kwargs)
+
+        field = f"{info.parent_type.name}.{info.field_name}"
+        started = time.perf_counter()
+        result = _next(root, info, *args, **kwargs)
+        if isawaitable(result):
+            return self._timed(result, field, started, root_field, trace)
+        self._record(field, time.perf_counter() - started, root_field, trace)
+        return result
+
+    async def _timed(self, result, field: str, started: float, root_field: bool, trace: Optional[Trace]) -> Any:
+        try:
+            return await result
+        finally:
+            self._record(field, time.perf_counter() - started, root_field, trace)
+
+    @staticmethod
+    def _record(field: str, seconds: float, root_field: bool, trace: Optional[Trace]) -> None:
+        if root_field:
+            GRAPHQL_RESOLVER_SECONDS.observe(seconds, field)
+        if trace is not None:
+            trace.add(field, seconds)
+
+    def _operation_label(self, name: Optional[str]) -> str:
+        if not name:
+            return "anonymous"
+        if name not in self._operation_names:
+            if len(self._operation_names) >= MAX_OPERATION_NAMES:
+                return "other"
+            self._operation_names.add(name)
+        return name
+
+
+def _traced(value: Optional[str]) -> bool:
+    return value is not None and value.strip().lower() not in ("", "0", "false")
+
+
+class MetricsMiddleware:
+    """
+    HTTP latency by route template and requests in flight
+
+    Requests carrying TRACE_HEADER get a Trace for their duration; the
+    response's Server-Timing header lists its spans (the GraphQL operation,
+    resolvers, conflict checks) and the time to the first response byte.
+    """
+
+    def __init__(self, app: ASGIApp, trace_header: str = TRACE_HEADER):
+        self.app = app
+        self.trace_header = trace_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace() if _traced(Headers(scope=scope).get(self.trace_header)) else None
+        token = current_trace.set(trace)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_timed(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if trace is not None:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", trace.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            current_trace.reset(token)
+            # Label by route template, never the raw path, to bound the series
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], route, str(status))
+
+
+def _hit_ratio(hits: int, misses: int) -> float:
+    return round(hits / (hits + misses), 4) if hits + misses else 0.0
+
+
+def register_app_metrics(
+    storage_stats: Callable[[], Dict[str, Any]],
+    extensions: list,
+    response_cache: Optional[ResponseCache] = None
+) -> None:
+    """
+    Scrape-time gauges for one app
+
+    storage_stats returns {"appointments": int, "indexes": {name: entries}};
+    the compiled document cache hit ratio is read off the schema's
+    OperationCacheExtension, and the response cache counters off
+    response_cache when it is enabled.
+    """
+    registry.callback("appointments_stored", "Appointments in the store", lambda: storage_stats()["appointments"])
+    registry.callback(
+        "appointment_index_entries",
+        "Entries per in-process index",
+        lambda: {(name,): size for name, size in storage_stats()["indexes"].items()},
+        labels=("index",)
+    )
+
+    operations = [extension.operations for extension in extensions if isinstance(extension, OperationCacheExtension)]
+
+    def document_cache_ratios() -> Dict[tuple, float]:
+        if not operations:
+            return {}
+        stats = operations[0].stats()
+        return {("operation",): _hit_ratio(stats["hits"], stats["misses"])}
+
+    registry.callback(
+        "graphql_document_cache_hit_ratio",
+        "Hit ratio of the compiled (parsed and validated) GraphQL document cache",
+        document_cache_ratios,
+        labels=("cache",)
+    )
+    if operations:
+        registry.callback(
+            "graphql_persisted_query_hashes",
+            "Persisted query hashes known, pinned from the manifest or registered by clients",
+            lambda: {
+                ("pinned",): operations[0].stats()["pinned_hashes"],
+                ("registered",): operations[0].stats()["registered_hashes"],
+            },
+            labels=("source",)
+        )
+
+    if response_cache is not None:
+        registry.callback(
+            "graphql_response_cache_events_total",
+            "Response cache lookups and removals by outcome",
+            lambda: {
+                (event,): count for event, count in response_cache.stats().items()
+                if event in ("hits", "misses", "stale", "expired", "evictions")
+            },
+            labels=("event",),
+            kind="counter"
+        )
+        registry.callback("graphql_response_cache_hit_ratio", "Response cache hit ratio", lambda: response_cache.stats()["hit_ratio"])
+        registry.callback("graphql_response_cache_entries", "Cached responses", lambda: response_cache.stats()["entries"])
+        registry.callback("graphql_response_cache_bytes", "Bytes held by cached responses", lambda: response_cache.stats()["bytes"])
+
+
+def metrics_response() -> Response:
+    """Every registered metric, for GET /metrics"""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,243 @@
+"""
+Versioned read-through cache for GraphQL query responses
+Entries are keyed by normalized document + variables and expire on (date, doctor) version bumps
+"""
+
+from collections import OrderedDict
+from functools import lru_cache
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from graphql import ExecutionResult, FieldNode, get_operation_ast, parse, print_ast
+from graphql.utilities import value_from_ast_untyped
+from strawberry.extensions import SchemaExtension
+from strawberry.types.graphql import OperationType
+
+from utils.persisted_queries import OperationCache, OperationCacheExtension
+
+DEFAULT_TTL_SECONDS = 30.0
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Distinct query documents whose parse and validation results are kept
+DOCUMENT_CACHE_SIZE = 1024
+
+# (date, lower-cased doctor name); None covers every date or every doctor
+Scope = Tuple[Optional[str], Optional[str]]
+
+
+class ScopeVersions:
+    """
+    Version stamps per (date, doctor) scope
+
+    bump() stamps the exact scope and the three wildcard scopes containing
+    it with a fresh value from one global clock, so a response computed
+    over any of them can tell whether a write has touched it since.
+    """
+
+    def __init__(self):
+        self._clock = itertools.count(1)
+        self._versions: Dict[Scope, int] = {}
+
+    def bump(self, date: str, doctor_name: str) -> None:
+        """Record a write to one doctor's day"""
+        stamp = next(self._clock)
+        doctor = doctor_name.lower()
+        for scope in ((date, doctor), (date, None), (None, doctor), (None, None)):
+            self._versions[scope] = stamp
+
+    def stamp(self, scope: Scope) -> int:
+        """Current version of a scope"""
+        return self._versions.get(scope, 0)
+
+
+class _Entry(NamedTuple):
+    result: ExecutionResult
+    scope: Scope
+    stamp: int
+    expires: float
+    size: int
+
+
+class ResponseCache:
+    """
+    LRU cache of execution results bounded by entry count, bytes and TTL
+
+    An entry is served only while its scope's version still equals the
+    stamp read before the response was computed, so a write that lands
+    mid-query leaves a stale entry that the next lookup discards.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Any, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(("hits", "misses", "stale", "expired", "evictions"), 0)
+
+    def get(self, key: Any, versions: ScopeVersions) -> Optional[ExecutionResult]:
+        """Cached result for key, or None (counted as a miss)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires <= time.monotonic():
+                    self._discard(key, "expired")
+                elif entry.stamp != versions.stamp(entry.scope):
+                    self._discard(key, "stale")
+                else:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return entry.result
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, key: Any, scope: Scope, stamp: int, result: ExecutionResult) -> None:
+        """Store a result computed while scope was at version stamp"""
+        size = len(json.dumps(result.data, separators=(",", ":")))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = _Entry(result, scope, stamp, time.monotonic() + self.ttl_seconds, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)), "evictions")
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current occupancy"""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_ratio": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+    def _discard(self, key: Any, reason: Optional[str] = None) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        if reason:
+            self._counters[reason] += 1
+
+
+def response_cache_from_env() -> Optional[ResponseCache]:
+    """ResponseCache configured by RESPONSE_CACHE_* variables; RESPONSE_CACHE_TTL=0 disables it"""
+    ttl_seconds = float(os.getenv("RESPONSE_CACHE_TTL", DEFAULT_TTL_SECONDS))
+    if ttl_seconds <= 0:
+        return None
+    return ResponseCache(
+        ttl_seconds=ttl_seconds,
+        max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+        max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+    )
+
+
+@lru_cache(maxsize=DOCUMENT_CACHE_SIZE)
+def parse_document(query: str):
+    """Parsed document for a query string; callers must not mutate it"""
+    return parse(query)
+
+
+@lru_cache(maxsize=DOCUMENT_CACHE_SIZE)
+def normalize_query(query: str) -> str:
+    """Canonical printing of a document, so formatting differences share an entry"""
+    return print_ast(parse_document(query))
+
+
+def query_scope(document, operation_name: Optional[str], variables: Optional[Dict[str, Any]]) -> Scope:
+    """
+    Narrowest (date, doctor) scope covering every root field of the operation
+
+    A component is kept only when every root field filters on the same
+    `date` / `doctorName` value; anything else (ranges, lookups by id,
+    fragments) widens it to None.
+    """
+    operation = get_operation_ast(document, operation_name)
+    dates, doctors = set(), set()
+    for selection in operation.selection_set.selections:
+        if not isinstance(selection, FieldNode):
+            return None, None
+        if selection.name.value.startswith("__"):
+            continue
+        arguments = {
+            argument.name.value: value_from_ast_untyped(argument.value, variables)
+            for argument in selection.arguments
+        }
+        dates.add(arguments.get("date"))
+        doctor = arguments.get("doctorName")
+        doctors.add(doctor.lower() if isinstance(doctor, str) else None)
+    date = dates.pop() if len(dates) == 1 else None
+    doctor = doctors.pop() if len(doctors) == 1 else None
+    return date if isinstance(date, str) else None, doctor
+
+
+class ResponseCacheExtension(SchemaExtension):
+    """Serves repeated query operations from a ResponseCache instead of executing them"""
+
+    def __init__(self, cache: ResponseCache, versions: ScopeVersions):
+        self.cache = cache
+        self.versions = versions
+
+    def on_execute(self) -> Iterator[None]:
+        # Schema extensions are shared between requests: keep this request's context local
+        context = self.execution_context
+        if context.operation_type != OperationType.QUERY:
+            yield
+            return
+
+        key = (
+            normalize_query(context.query),
+            context.operation_name,
+            json.dumps(context.variables, sort_keys=True, default=str) if context.variables else None
+        )
+        cached = self.cache.get(key, self.versions)
+        if cached is not None:
+            context.result = cached
+            yield
+            return
+
+        scope = query_scope(context.graphql_document, context.operation_name, context.variables)
+        stamp = self.versions.stamp(scope)
+        yield
+        result = context.result
+        if isinstance(result, ExecutionResult) and not result.errors:
+            self.cache.put(key, scope, stamp, result)
+
+
+def caching_extensions(
+    cache: Optional[ResponseCache],
+    versions: ScopeVersions,
+    operations: Optional[OperationCache] = None
+) -> List[SchemaExtension]:
+    """
+    Schema extensions for serving repeated queries cheaply
+
+    Dashboards send a handful of documents over and over, so parsing and
+    validating each one again would dominate the cost of a cache hit.
+    `operations` also resolves persisted query hashes; list these first.
+    """
+    extensions: List[SchemaExtension] = [OperationCacheExtension(operations or OperationCache())]
+    if cache:
+        extensions.append(ResponseCacheExtension(cache, versions))
+    return extensions
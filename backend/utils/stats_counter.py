@@ -0,0 +1,89 @@
+"""
+Incrementally maintained appointment counters
+Keyed by (date, doctor, status, mode) so dashboard stats never scan rows
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from typing import Dict, List, Optional
+
+
+class AppointmentStatsCounter:
+    """Counts per (date, doctor, status, mode), updated in O(1) on every write"""
+
+    def __init__(self):
+        self._by_date: Dict[str, Dict[str, Counter]] = {}
+        self._by_doctor: Dict[str, Counter] = {}
+        self._totals: Counter = Counter()
+        self._dates: List[str] = []
+
+    def add(self, date: str, doctor_name: str, status: str, mode: str) -> None:
+        """Count one appointment"""
+        self._adjust(date, doctor_name, status, mode, 1)
+
+    def remove(self, date: str, doctor_name: str, status: str, mode: str) -> None:
+        """Uncount one appointment"""
+        self._adjust(date, doctor_name, status, mode, -1)
+
+    def _adjust(self, date: str, doctor_name: str, status: str, mode: str, delta: int) -> None:
+        key = (status, mode)
+        doctors = self._by_date.get(date)
+        if doctors is None:
+            doctors = self._by_date[date] = {}
+            insort(self._dates, date)
+        counts = doctors.get(doctor_name)
+        if counts is None:
+            counts = doctors[doctor_name] = Counter()
+        counts[key] += delta
+        counts = self._by_doctor.get(doctor_name)
+        if counts is None:
+            counts = self._by_doctor[doctor_name] = Counter()
+        counts[key] += delta
+        self._totals[key] += delta
+
+    def doctor_names(self) -> List[str]:
+        """Doctors with at least one counted appointment"""
+        return [name for name, counts in self._by_doctor.items() if any(counts.values())]
+
+    def summarize(
+        self,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        extra: Optional[Counter] = None
+    ) -> Dict:
+        """
+        Aggregate counts over an inclusive date range and optional doctor
+
+        Returns {"total": int, "by_status": {...}, "by_mode": {...}}.
+        Unbounded ranges read the running totals directly; bounded ranges
+        only touch the per-date counters inside the range. `extra` adds
+        (status, mode) counts kept elsewhere, such as recurring occurrences.
+        """
+        combined = Counter()
+        if not date_from and not date_to:
+            combined = self._by_doctor.get(doctor_name, Counter()) if doctor_name else self._totals
+        else:
+            lo = bisect_left(self._dates, date_from) if date_from else 0
+            hi = bisect_right(self._dates, date_to) if date_to else len(self._dates)
+            for date in self._dates[lo:hi]:
+                doctors = self._by_date[date]
+                if doctor_name:
+                    combined.update(doctors.get(doctor_name, Counter()))
+                else:
+                    for counts in doctors.values():
+                        combined.update(counts)
+
+        if extra:
+            combined = combined + extra
+        by_status: Counter = Counter()
+        by_mode: Counter = Counter()
+        for (status, mode), count in combined.items():
+            if count:
+                by_status[status] += count
+                by_mode[mode] += count
+        return {
+            "total": sum(by_status.values()),
+            "by_status": dict(by_status),
+            "by_mode": dict(by_mode),
+        }
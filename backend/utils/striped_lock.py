@@ -0,0 +1,35 @@
+"""
+Striped locks for per-key mutual exclusion
+A fixed pool of locks shared by hashing keys, e.g. (doctor_name, date)
+"""
+
+from contextlib import ExitStack, contextmanager
+import threading
+from typing import Hashable, Iterator
+
+DEFAULT_STRIPES = 64
+
+
+class StripedLock:
+    """
+    Maps any number of keys onto a fixed set of threading locks
+
+    Writers to the same key always meet on the same lock while unrelated
+    keys usually land on different stripes and proceed in parallel.
+    Memory stays constant no matter how many keys are seen.
+    """
+
+    def __init__(self, stripes: int = DEFAULT_STRIPES):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def stripe(self, key: Hashable) -> int:
+        """Index of the lock guarding a key"""
+        return hash(key) % len(self._locks)
+
+    @contextmanager
+    def holding(self, *keys: Hashable) -> Iterator[None]:
+        """Hold the stripes of every key, acquired in stripe order to avoid deadlock"""
+        with ExitStack() as stack:
+            for stripe in sorted({self.stripe(key) for key in keys}):
+                stack.enter_context(self._locks[stripe])
+            yield
@@ -19,10 +19,28 @@ import {
   FiFilter,
   FiX,
 } from "react-icons/fi";
-import { GET_APPOINTMENTS } from "@/lib/graphql/operations";
-import { Appointment } from "@/lib/types";
+import { API_BASE_URL } from "@/lib/graphql/client";
+import { GET_APPOINTMENTS_PAGE, GET_APPOINTMENT_STATS } from "@/lib/graphql/operations";
+import { AppointmentConnection, AppointmentStats } from "@/lib/types";
 import "./calendar.css";
 
+const PAGE_SIZE = 50;
+
+type DashboardStats = {
+  overall: Pick<AppointmentStats, "totalCount" | "byStatus">;
+  today: Pick<AppointmentStats, "totalCount">;
+  upcoming: Pick<AppointmentStats, "totalCount" | "byStatus">;
+};
+
+const countFor = (stats: Pick<AppointmentStats, "byStatus"> | undefined, status: string) =>
+  stats?.byStatus.find(entry => entry.status === status)?.count ?? 0;
+
+const shiftDate = (isoDate: string, days: number) => {
+  const date = new Date(`${isoDate}T00:00:00Z`);
+  date.setUTCDate(date.getUTCDate() + days);
+  return date.toISOString().split("T")[0];
+};
+
 const CalendarWidget = dynamic(() => import("@/components/Calendar"), { ssr: false });
 const DoctorTimeline = dynamic(() => import("@/components/DoctorTimeline"), { ssr: false });
 
@@ -38,52 +56,68 @@ export default function AppointmentsPage() {
   const [showTimeline, setShowTimeline] = useState(false);
   const [timelineDoctor, setTimelineDoctor] = useState("");
 
-  const { data, loading, error } = useQuery<{ appointments: Appointment[] }>(
-    GET_APPOINTMENTS,
-    {
-      variables: filters.date || filters.status || filters.doctorName ? filters : {},
-    }
-  );
-
   const today = useMemo(() => {
     const date = new Date();
     return date.toISOString().split("T")[0];
   }, []);
 
-  const filteredAppointments = useMemo(() => {
-    if (!data?.appointments) return [];
-    let appointments = data.appointments;
-
-    if (searchQuery) {
-      const query = searchQuery.toLowerCase();
-      appointments = appointments.filter(apt =>
-        apt.patientName.toLowerCase().includes(query) ||
-        apt.doctorName.toLowerCase().includes(query)
-      );
-    }
-
+  // Tabs map to server-side date ranges so only the visible page is fetched
+  const tabRange = useMemo(() => {
     switch (activeTab) {
       case "today":
-        return appointments.filter(apt => apt.date === today);
+        return { dateFrom: today, dateTo: today };
       case "upcoming":
-        return appointments.filter(apt => apt.date > today);
+        return { dateFrom: shiftDate(today, 1) };
       case "past":
-        return appointments.filter(apt => apt.date < today);
+        return { dateTo: shiftDate(today, -1) };
       default:
-        return appointments;
+        return {};
     }
-  }, [data, activeTab, today, searchQuery]);
+  }, [activeTab, today]);
+
+  const queryVariables = useMemo(() => {
+    const variables: Record<string, string | number> = { first: PAGE_SIZE, ...tabRange };
+    Object.entries(filters).forEach(([key, value]) => {
+      if (value) variables[key] = value;
+    });
+    return variables;
+  }, [filters, tabRange]);
+
+  const { data, loading, error, fetchMore } = useQuery<{ appointmentsConnection: AppointmentConnection }>(
+    GET_APPOINTMENTS_PAGE,
+    { variables: queryVariables }
+  );
 
-  const stats = useMemo(() => {
-    if (!data?.appointments) return { total: 0, today: 0, upcoming: 0, completed: 0 };
+  const { data: statsData } = useQuery<DashboardStats>(GET_APPOINTMENT_STATS, {
+    variables: { today, tomorrow: shiftDate(today, 1) },
+  });
+
+  const appointments = useMemo(
+    () => data?.appointmentsConnection.edges.map(edge => edge.node) ?? [],
+    [data]
+  );
+  const pageInfo = data?.appointmentsConnection.pageInfo;
+
+  const filteredAppointments = useMemo(() => {
+    if (!searchQuery) return appointments;
+    const query = searchQuery.toLowerCase();
+    return appointments.filter(apt =>
+      apt.patientName.toLowerCase().includes(query) ||
+      apt.doctorName.toLowerCase().includes(query)
+    );
+  }, [appointments, searchQuery]);
+
+  const stats = {
+    total: statsData?.overall.totalCount ?? 0,
+    today: statsData?.today.totalCount ?? 0,
+    upcoming: (statsData?.upcoming.totalCount ?? 0) - countFor(statsData?.upcoming, "Cancelled"),
+    completed: countFor(statsData?.overall, "Completed"),
+  };
 
-    return {
-      total: data.appointments.length,
-      today: data.appointments.filter(a => a.date === today).length,
-      upcoming: data.appointments.filter(a => a.date > today && a.status !== "Cancelled").length,
-      completed: data.appointments.filter(a => a.status === "Completed").length,
-    };
-  }, [data, today]);
+  const loadMore = () => {
+    if (!pageInfo?.hasNextPage) return;
+    fetchMore({ variables: { after: pageInfo.endCursor } });
+  };
 
   const handleFilterChange = (key: string, value: string) => {
     setFilters(prev => ({ ...prev, [key]: value }));
@@ -103,30 +137,27 @@ export default function AppointmentsPage() {
     setSearchQuery("");
   };
 
-  const uniqueDoctors = useMemo(() => {
-    if (!data?.appointments) return [];
-    return Array.from(new Set(data.appointments.map(apt => apt.doctorName)));
-  }, [data]);
+  const uniqueDoctors = useMemo(
+    () => Array.from(new Set(appointments.map(apt => apt.doctorName))),
+    [appointments]
+  );
 
+  // The server streams the export for the active tab and filters, so it is not
+  // limited to the pages loaded here (the free-text search stays client-side)
   const exportToCSV = () => {
-    if (!filteredAppointments.length) return;
-
-    const headers = ["Patient", "Date", "Time", "Duration", "Doctor", "Status", "Mode"];
-    const rows = filteredAppointments.map(apt => [
-      apt.patientName,
-      apt.date,
-      apt.time,
-      `${apt.duration} min`,
-      apt.doctorName,
-      apt.status,
-      apt.mode,
-    ]);
-
-    const csv = [headers, ...rows].map(row => row.join(",")).join("\n");
-    const blob = new Blob([csv], { type: "text/csv" });
-    const url = window.URL.createObjectURL(blob);
+    if (!appointments.length) return;
+
+    const range: { dateFrom?: string; dateTo?: string } = tabRange;
+    const lowerBounds = [filters.date, range.dateFrom].filter(Boolean) as string[];
+    const upperBounds = [filters.date, range.dateTo].filter(Boolean) as string[];
+    const params = new URLSearchParams({ format: "csv" });
+    if (lowerBounds.length) params.set("dateFrom", lowerBounds.sort()[lowerBounds.length - 1]);
+    if (upperBounds.length) params.set("dateTo", upperBounds.sort()[0]);
+    if (filters.doctorName) params.set("doctor", filters.doctorName);
+    if (filters.status) params.set("status", filters.status);
+
     const a = document.createElement("a");
-    a.href = url;
+    a.href = `${API_BASE_URL}/export/appointments?${params}`;
     a.download = `appointments-${new Date().toISOString().split("T")[0]}.csv`;
     a.click();
   };
@@ -204,7 +235,7 @@ export default function AppointmentsPage() {
 
         {/* Timeline Toggle */}
         <AnimatePresence>
-          {data && data.appointments.length > 0 && (
+          {appointments.length > 0 && (
             <motion.div
               initial={{ opacity: 0, y: -20 }}
               animate={{ opacity: 1, y: 0 }}
@@ -271,7 +302,7 @@ export default function AppointmentsPage() {
               className="mb-8"
             >
               <DoctorTimeline
-                appointments={data?.appointments || []}
+                appointments={appointments}
                 selectedDate={selectedCalendarDate}
                 selectedDoctor={timelineDoctor}
               />
@@ -347,7 +378,7 @@ export default function AppointmentsPage() {
               <div className="border-b-2 border-slate-200 bg-white">
                 <div className="flex px-6">
                   {[
-                    { key: "all", label: "All", count: data?.appointments.length || 0 },
+                    { key: "all", label: "All", count: stats.total },
                     { key: "today", label: "Today", count: stats.today },
                     { key: "upcoming", label: "Upcoming", count: stats.upcoming },
                     { key: "past", label: "Past", count: null },
@@ -499,6 +530,16 @@ export default function AppointmentsPage() {
                       </AnimatePresence>
                     </tbody>
                   </table>
+                  {pageInfo?.hasNextPage && (
+                    <div className="p-6 text-center border-t-2 border-slate-100">
+                      <button
+                        onClick={loadMore}
+                        className="px-6 py-3 bg-gradient-to-r from-slate-50 to-indigo-50 text-indigo-700 rounded-xl hover:from-slate-100 hover:to-indigo-100 text-sm font-semibold transition-all duration-200 border-2 border-indigo-200"
+                      >
+                        Load more ({appointments.length} of {data?.appointmentsConnection.totalCount})
+                      </button>
+                    </div>
+                  )}
                 </div>
               )}
 
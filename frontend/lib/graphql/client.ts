@@ -1,18 +1,55 @@
 import { ApolloClient, InMemoryCache, HttpLink } from "@apollo/client";
+import { PersistedQueryLink } from "@apollo/client/link/persisted-queries";
+import { relayStylePagination } from "@apollo/client/utilities";
 
 // Use environment variable in production, localhost in development
 const GRAPHQL_ENDPOINT =
     process.env.NEXT_PUBLIC_GRAPHQL_ENDPOINT ||
     "http://localhost:8000/graphql";
 
+// REST endpoints (e.g. /export/appointments) live next to /graphql
+export const API_BASE_URL = GRAPHQL_ENDPOINT.replace(/\/graphql\/?$/, "");
+
 const httpLink = new HttpLink({
     uri: GRAPHQL_ENDPOINT,
     credentials: "omit",
+    // Queries go out as GET so the browser revalidates them with the
+    // server's ETag and unchanged lists come back as empty 304s
+    useGETForQueries: true,
+});
+
+// Hex SHA-256 of a printed document, as the server's persisted query cache keys it
+async function sha256(query: string): Promise<string> {
+    const digest = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(query));
+    return Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, "0")).join("");
+}
+
+// Automatic persisted queries: operations are sent as their hash, and the
+// full text only when the server answers PersistedQueryNotFound. Hashed
+// queries stay GETs, so their URLs are short and still get ETags.
+const persistedQueryLink = new PersistedQueryLink({
+    sha256,
+    useGETForHashedQueries: true,
 });
 
 const client = new ApolloClient({
-    link: httpLink,
-    cache: new InMemoryCache(),
+    link: persistedQueryLink.concat(httpLink),
+    cache: new InMemoryCache({
+        typePolicies: {
+            Query: {
+                fields: {
+                    // Pages fetched with `after` are appended to the same list
+                    appointmentsConnection: relayStylePagination([
+                        "date",
+                        "status",
+                        "doctorName",
+                        "dateFrom",
+                        "dateTo",
+                    ]),
+                },
+            },
+        },
+    }),
     defaultOptions: {
         watchQuery: {
             fetchPolicy: "cache-and-network",
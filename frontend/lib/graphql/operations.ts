@@ -15,6 +15,69 @@ export const GET_APPOINTMENTS = gql`
   }
 `;
 
+export const GET_APPOINTMENTS_PAGE = gql`
+  query GetAppointmentsPage(
+    $first: Int
+    $after: String
+    $date: String
+    $status: String
+    $doctorName: String
+    $dateFrom: String
+    $dateTo: String
+  ) {
+    appointmentsConnection(
+      first: $first
+      after: $after
+      date: $date
+      status: $status
+      doctorName: $doctorName
+      dateFrom: $dateFrom
+      dateTo: $dateTo
+    ) {
+      totalCount
+      edges {
+        cursor
+        node {
+          id
+          patientName
+          date
+          time
+          duration
+          doctorName
+          status
+          mode
+        }
+      }
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
+    }
+  }
+`;
+
+export const GET_APPOINTMENT_STATS = gql`
+  query GetAppointmentStats($today: String!, $tomorrow: String!) {
+    overall: appointmentStats {
+      totalCount
+      byStatus {
+        status
+        count
+      }
+    }
+    today: appointmentStats(dateFrom: $today, dateTo: $today) {
+      totalCount
+    }
+    upcoming: appointmentStats(dateFrom: $tomorrow) {
+      totalCount
+      byStatus {
+        status
+        count
+      }
+    }
+  }
+`;
+
 export const GET_APPOINTMENT = gql`
   query GetAppointment($id: String!) {
     appointment(id: $id) {
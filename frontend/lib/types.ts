@@ -18,4 +18,20 @@ export interface AppointmentInput {
     status: string;
     mode: string;
 }
-  
\ No newline at end of file
+  
+export interface PageInfo {
+    hasNextPage: boolean;
+    endCursor: string | null;
+}
+
+export interface AppointmentConnection {
+    totalCount: number;
+    edges: { cursor: string; node: Appointment }[];
+    pageInfo: PageInfo;
+}
+
+export interface AppointmentStats {
+    totalCount: number;
+    byStatus: { status: string; count: number }[];
+    byMode: { mode: string; count: number }[];
+}